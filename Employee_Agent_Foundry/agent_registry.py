@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import hashlib
+from typing import Dict, List, Optional
+
+from helpers import (
+    create_agent_compat,
+    get_agent_compat,
+    update_agent_compat,
+    delete_agent_compat,
+)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Agent definition hashing
+# ────────────────────────────────────────────────────────────────────────────
+def _jsonable(value):
+    """SDK models (tool definitions) -> plain JSON types, for stable hashing."""
+    if hasattr(value, "as_dict"):
+        return _jsonable(value.as_dict())
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+def definition_hash(*, model: str, name: str, description: str, instructions: str, tools) -> str:
+    """Content hash of everything that shapes the agent's behavior."""
+    canonical = json.dumps(
+        {
+            "model": model,
+            "name": name,
+            "description": description,
+            "instructions": instructions,
+            "tools": _jsonable(tools),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+# ────────────────────────────────────────────────────────────────────────────
+# Local registry (hash -> agent id)
+# ────────────────────────────────────────────────────────────────────────────
+class AgentRegistry:
+    """
+    JSON file mapping definition hashes to agent ids for one project endpoint:
+      {"<endpoint>": {"agents": {"<hash>": {"agent_id", "name", "model", "registered_at"}},
+                      "stale": ["asst_...", ...]}}
+    """
+
+    def __init__(self, path: str, endpoint: str):
+        self.path = path
+        self.endpoint = endpoint
+        self._data = self._load()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            # A corrupt registry only costs one agent creation; start over.
+            return {}
+
+    def _project(self) -> Dict:
+        return self._data.setdefault(self.endpoint, {"agents": {}, "stale": []})
+
+    def lookup(self, digest: str) -> Optional[Dict]:
+        return self._project()["agents"].get(digest)
+
+    def lookup_by_name(self, name: str) -> Optional[tuple]:
+        for digest, entry in self._project()["agents"].items():
+            if entry.get("name") == name:
+                return digest, entry
+        return None
+
+    def record(self, digest: str, agent, *, name: str, model: str) -> None:
+        self._project()["agents"][digest] = {
+            "agent_id": agent.id,
+            "name": name,
+            "model": model,
+            "registered_at": int(time.time()),
+        }
+        self.save()
+
+    def forget(self, digest: str, *, stale: bool) -> None:
+        entry = self._project()["agents"].pop(digest, None)
+        if entry and stale and entry["agent_id"] not in self._project()["stale"]:
+            self._project()["stale"].append(entry["agent_id"])
+        self.save()
+
+    def stale_ids(self) -> List[str]:
+        return list(self._project()["stale"])
+
+    def agent_ids(self) -> List[str]:
+        return [entry["agent_id"] for entry in self._project()["agents"].values()]
+
+    def drop_stale(self, agent_ids) -> None:
+        project = self._project()
+        project["stale"] = [a for a in project["stale"] if a not in set(agent_ids)]
+        self.save()
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Reuse / update / create
+# ────────────────────────────────────────────────────────────────────────────
+async def ensure_agent(project_client, registry: AgentRegistry, *, model: str, name: str,
+                       description: str, instructions: str, tools, verify: bool = False):
+    """
+    Return (agent, action) where action is "reused", "updated" or "created".
+    - Same definition hash as last time -> reuse the recorded agent (no round trip unless `verify`).
+    - Same name, different hash        -> update that agent in place when the SDK allows it.
+    - Otherwise                        -> create a new agent; the superseded one is marked stale.
+    """
+    digest = definition_hash(model=model, name=name, description=description,
+                             instructions=instructions, tools=tools)
+
+    entry = registry.lookup(digest)
+    if entry:
+        if not verify:
+            return _AgentRef(entry["agent_id"], name, model), "reused"
+        agent = await get_agent_compat(project_client, entry["agent_id"])
+        if agent is not None:
+            return agent, "reused"
+        registry.forget(digest, stale=False)  # deleted out from under us
+
+    previous = registry.lookup_by_name(name)
+    if previous:
+        old_digest, old_entry = previous
+        agent = await update_agent_compat(
+            project_client, old_entry["agent_id"],
+            model=model, name=name, description=description, instructions=instructions, tools=tools,
+        )
+        if agent is not None:
+            registry.forget(old_digest, stale=False)
+            registry.record(digest, agent, name=name, model=model)
+            return agent, "updated"
+        registry.forget(old_digest, stale=True)
+
+    agent = await create_agent_compat(
+        project_client,
+        model=model,
+        name=name,
+        description=description,
+        instructions=instructions,
+        tools=tools,
+    )
+    registry.record(digest, agent, name=name, model=model)
+    return agent, "created"
+
+async def collect_stale_agents(project_client, registry: AgentRegistry, *, keep_id: str) -> List[str]:
+    """
+    Delete the agents this registry recorded and later marked stale. Returns deleted ids.
+    Agents the registry never recorded are never touched: a project is shared, and
+    another client (or teammate) may own an agent with the same name.
+    """
+    candidates = set(registry.stale_ids()) - set(registry.agent_ids())
+    candidates.discard(keep_id)
+
+    deleted = []
+    for agent_id in sorted(candidates):
+        await delete_agent_compat(project_client, agent_id)
+        deleted.append(agent_id)
+    registry.drop_stale(deleted)
+    return deleted
+
+class _AgentRef:
+    """Minimal stand-in for an agent object when reusing without a round trip."""
+
+    def __init__(self, agent_id: str, name: str, model: str):
+        self.id = agent_id
+        self.name = name
+        self.model = model
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import random
+import asyncio
+import fnmatch
+from typing import Dict, List, Optional, TextIO
+
+from helpers import (
+    create_thread_compat,
+    create_message_compat,
+    create_run_compat,
+    get_run_compat,
+    list_run_steps_compat,
+    list_run_messages_compat,
+)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Scripted conversations (JSONL)
+# ────────────────────────────────────────────────────────────────────────────
+TERMINAL_STATUSES = {"completed", "failed", "cancelled", "expired", "incomplete"}
+
+def _read_entries(path: str) -> List[tuple]:
+    if os.path.isdir(path) or path.endswith(".gz"):
+        # Recorded transcripts (TRANSCRIPT_DIR): replayed one conversation per thread
+        import transcripts
+        return list(enumerate(transcripts.conversations(transcripts.read(path)), start=1))
+    with open(path, "r", encoding="utf-8") as f:
+        return [(line_no, json.loads(line)) for line_no, line in enumerate(f, start=1) if line.strip()]
+
+def load_conversations(path: str) -> List[Dict]:
+    """
+    One conversation per line:
+      {"id": "conv-1", "turns": ["first prompt", "second prompt", ...]}
+    Turns may also be objects with a "prompt" key and, for regression runs, an
+    "expect_tools" list: the tool calls the turn must make, in order (glob patterns,
+    [] for none). Missing ids are numbered by line.
+    `path` may also be a transcript store (a directory, or one .jsonl.gz file):
+    each recorded thread becomes a conversation that expects the recorded tool calls.
+    """
+    conversations = []
+    for line_no, entry in _read_entries(path):
+        turns, expect_tools = [], []
+        for t in entry.get("turns") or []:
+            prompt = t.get("prompt", "") if isinstance(t, dict) else str(t)
+            if prompt.strip():
+                turns.append(prompt)
+                expect_tools.append(t.get("expect_tools") if isinstance(t, dict) else None)
+        if not turns:
+            raise ValueError(f"{path}:{line_no}: conversation has no turns")
+        conversations.append({"id": str(entry.get("id") or f"conv-{line_no}"), "turns": turns,
+                              "expect_tools": expect_tools})
+    return conversations
+
+def tools_match(tools: List[str], expected: List[str]) -> bool:
+    """Same number of tool calls, in the same order, each matching its glob pattern."""
+    return len(tools) == len(expected) and all(fnmatch.fnmatchcase(t, p) for t, p in zip(tools, expected))
+
+class JsonlSink:
+    """Appends one JSON object per line and flushes, so results stream out as turns finish."""
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+
+    def write(self, record: Dict) -> None:
+        # Called from the event loop only; no await between write and flush
+        self._stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._stream.flush()
+
+# ────────────────────────────────────────────────────────────────────────────
+# One turn: message -> run -> poll -> steps + messages
+# ────────────────────────────────────────────────────────────────────────────
+def _status(run) -> str:
+    status = getattr(run, "status", "") or ""
+    return str(getattr(status, "value", status)).lower()
+
+def _tool_call_names(steps: List) -> List[str]:
+    names = []
+    for step in steps:
+        details = getattr(step, "step_details", None)
+        for call in (getattr(details, "tool_calls", None) or []):
+            # openapi calls carry the operation under "function" (or "openapi"); fall back to the type
+            inner = call.get("function") or call.get("openapi") or {}
+            names.append(inner.get("name") or call.get("type") or "tool")
+    return names
+
+def _message_text(messages: List) -> str:
+    parts = []
+    for m in messages:
+        if str(getattr(m.role, "value", m.role)).lower() not in ("assistant", "agent"):
+            continue
+        for t in getattr(m, "text_messages", None) or []:
+            if t.text and t.text.value:
+                parts.append(t.text.value)
+    return "\n\n".join(parts)
+
+async def run_turn(agents_client, agent_id: str, thread_id: str, prompt: str, *,
+                   deadline: float = 120.0, initial_poll: float = 0.25, max_poll: float = 2.0) -> Dict:
+    """Drive one turn on `thread_id` and return its result record (without conversation fields)."""
+    started = time.perf_counter()
+    await create_message_compat(agents_client, thread_id, prompt)
+    run = await create_run_compat(agents_client, thread_id, agent_id)
+    first_poll = time.perf_counter()
+
+    delay, polls = initial_poll, 0
+    while _status(run) not in TERMINAL_STATUSES:
+        if time.perf_counter() - first_poll > deadline:
+            raise TimeoutError(f"Run {run.id} did not finish within {deadline:.0f}s")
+        await asyncio.sleep(delay * random.uniform(0.9, 1.1))
+        delay = min(max_poll, delay * 1.5)
+        run = await get_run_compat(agents_client, thread_id, run.id)
+        polls += 1
+
+    status = _status(run)
+    steps = await list_run_steps_compat(agents_client, thread_id, run.id)
+    answer = ""
+    if status == "completed":
+        answer = _message_text(await list_run_messages_compat(agents_client, thread_id, run.id))
+    tools = _tool_call_names(steps)
+    return {
+        "run_id": run.id,
+        "status": status,
+        "latency_ms": round((time.perf_counter() - started) * 1000.0, 1),
+        "polls": polls,
+        "tool_calls": len(tools),
+        "tools": tools,
+        "answer": answer,
+    }
+
+# ────────────────────────────────────────────────────────────────────────────
+# Sessions and batch
+# ────────────────────────────────────────────────────────────────────────────
+async def run_session(agents_client, agent_id: str, conversation: Dict, sink: JsonlSink,
+                      semaphore: asyncio.Semaphore, **turn_options) -> List[Dict]:
+    """One conversation on its own thread; holds a semaphore slot for the whole session."""
+    records = []
+    async with semaphore:
+        try:
+            thread = await create_thread_compat(agents_client)
+            thread_id = getattr(thread, "id", None) if thread else None
+            if not thread_id:
+                raise RuntimeError("No thread id returned from create thread")
+        except Exception as e:
+            record = {"conversation": conversation["id"], "turn": 0, "thread_id": None,
+                      "status": "error", "error": f"{type(e).__name__}: {e}"}
+            sink.write(record)
+            return [record]
+
+        for index, prompt in enumerate(conversation["turns"]):
+            record = {"conversation": conversation["id"], "turn": index, "thread_id": thread_id, "prompt": prompt}
+            try:
+                record.update(await run_turn(agents_client, agent_id, thread_id, prompt, **turn_options))
+            except Exception as e:
+                record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+            expected = (conversation.get("expect_tools") or [None] * (index + 1))[index]
+            if expected is not None:
+                record["expect_tools"] = expected
+                record["tools_match"] = tools_match(record.get("tools", []), expected)
+            sink.write(record)
+            records.append(record)
+            if record["status"] != "completed":
+                break  # later turns depend on this one
+    return records
+
+def summarize(records: List[Dict], wall_seconds: float) -> Dict:
+    latencies = sorted(r["latency_ms"] for r in records if "latency_ms" in r)
+
+    def pct(p: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    completed = sum(1 for r in records if r.get("status") == "completed")
+    checked = [r for r in records if "tools_match" in r]
+    return {
+        "turns": len(records),
+        "completed": completed,
+        "errors": len(records) - completed,
+        "tool_calls": sum(r.get("tool_calls", 0) for r in records),
+        "tool_checks": len(checked),
+        "tool_mismatches": sum(1 for r in checked if not r["tools_match"]),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "max_ms": latencies[-1] if latencies else 0.0,
+        "wall_s": round(wall_seconds, 2),
+        "turns_per_s": round(len(records) / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+async def run_batch(agents_client, agent_id: str, conversations: List[Dict], sink: JsonlSink, *,
+                    concurrency: int = 8, **turn_options) -> Dict:
+    """Run every conversation, at most `concurrency` at a time, on one shared client and agent."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+    sessions = await asyncio.gather(*(
+        run_session(agents_client, agent_id, conversation, sink, semaphore, **turn_options)
+        for conversation in conversations
+    ))
+    records = [r for session in sessions for r in session]
+    return summarize(records, time.perf_counter() - started)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Offline mode (fake backend over plain HTTP)
+# ────────────────────────────────────────────────────────────────────────────
+def offline_agents_client(endpoint: str):
+    """
+    AsyncAgentsClient for a local fake backend (benchmarks/fake_agents_backend.py).
+    The SDK refuses bearer tokens over http://, so a fixed header replaces the credential policy.
+    """
+    from azure.core.credentials import AccessToken
+    from azure.core.pipeline.policies import SansIOHTTPPolicy
+    from azure.ai.agents.aio import AgentsClient as AsyncAgentsClient
+
+    class _StaticAuth(SansIOHTTPPolicy):
+        def on_request(self, request):
+            request.http_request.headers["Authorization"] = "Bearer offline"
+
+    class _OfflineCredential:
+        async def get_token(self, *scopes, **kwargs):
+            return AccessToken("offline", int(time.time()) + 3600)
+
+        async def close(self):
+            pass
+
+    return AsyncAgentsClient(endpoint=endpoint, credential=_OfflineCredential(), authentication_policy=_StaticAuth())
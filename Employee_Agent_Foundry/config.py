@@ -1,15 +1,78 @@
 import os
-from dotenv import load_dotenv
 
 # ────────────────────────────────────────────────────────────────────────────
 # Load environment
 # ────────────────────────────────────────────────────────────────────────────
+# Importing this module reads nothing: `load()` (called by the entry points, or
+# on first `from config import NAME`) reads .env and then every setting below.
 
-load_dotenv(".env")
+_SETTINGS = None
 
-PROJECT_ENDPOINT  = os.getenv("AZURE_AI_PROJECT_ENDPOINT")
-MODEL_DEPLOYMENT  = os.getenv("AZURE_AI_MODEL_DEPLOYMENT_NAME")
-OPENAPI_V3_URL    = os.getenv("FUNCTION_OPENAPI_SCHEMA_URL")
-FUNC_UPDATE_URL   = os.getenv("EMPLOYEE_INFO_UPDATE_FUNCTION")
-FUNC_VALIDATE_URL = os.getenv("EMPLOYEE_INFO_VALIDATE_FUNCTION")
-ASSISTANT_NAME    = os.getenv("AGENT_NAME", "Employee-Assistance")
\ No newline at end of file
+# Required for an interactive or batch session against Azure
+REQUIRED = {
+    "AZURE_AI_PROJECT_ENDPOINT": "PROJECT_ENDPOINT",
+    "AZURE_AI_MODEL_DEPLOYMENT_NAME": "MODEL_DEPLOYMENT",
+    "FUNCTION_OPENAPI_SCHEMA_URL": "OPENAPI_V3_URL",
+}
+
+
+def _read() -> dict:
+    s = {}
+    s["PROJECT_ENDPOINT"]  = os.getenv("AZURE_AI_PROJECT_ENDPOINT")
+    s["MODEL_DEPLOYMENT"]  = os.getenv("AZURE_AI_MODEL_DEPLOYMENT_NAME")
+    s["OPENAPI_V3_URL"]    = os.getenv("FUNCTION_OPENAPI_SCHEMA_URL")
+    s["FUNC_UPDATE_URL"]   = os.getenv("EMPLOYEE_INFO_UPDATE_FUNCTION")
+    s["FUNC_VALIDATE_URL"] = os.getenv("EMPLOYEE_INFO_VALIDATE_FUNCTION")
+    s["ASSISTANT_NAME"]    = os.getenv("AGENT_NAME", "Employee-Assistance")
+
+    # Agent registry: reuse the assistant across launches while its definition is unchanged
+    s["AGENT_REGISTRY_PATH"]   = os.getenv("AGENT_REGISTRY_PATH", ".agent_registry.json")
+    s["AGENT_REGISTRY_VERIFY"] = os.getenv("AGENT_REGISTRY_VERIFY", "false").lower() == "true"
+    s["AGENT_REGISTRY_GC"]     = os.getenv("AGENT_REGISTRY_GC", "false").lower() == "true"
+    # OpenAPI spec cache: revalidated with ETag/Last-Modified, served offline when the URL is unreachable
+    s["OPENAPI_CACHE_DIR"]       = os.getenv("OPENAPI_CACHE_DIR", ".openapi_cache")
+    s["OPENAPI_TIMEOUT_SECONDS"] = float(os.getenv("OPENAPI_TIMEOUT_SECONDS", "10"))
+
+    # OpenAPI tools: one definition per operationId, filtered by glob on operationId or 'tag:<glob>'
+    s["OPENAPI_TOOLS_INCLUDE"]   = os.getenv("OPENAPI_TOOLS_INCLUDE", "*")
+    s["OPENAPI_TOOLS_EXCLUDE"]   = os.getenv("OPENAPI_TOOLS_EXCLUDE", "tag:System,tag:Testing")
+    s["OPENAPI_TOOL_NAMES"]      = os.getenv("OPENAPI_TOOL_NAMES",
+                                             "ValidateEmployeeProfile=EmployeeValidation,UpdateEmployeeProfile=EmployeeUpdate")
+    s["OPENAPI_TOOLS_MEMO_PATH"] = os.getenv("OPENAPI_TOOLS_MEMO_PATH", os.path.join(s["OPENAPI_CACHE_DIR"], "tools.json"))
+
+    # Prompt size: "compact" sends the condensed instructions (same phases and rules, fewer input tokens per run)
+    s["ASSISTANT_INSTRUCTIONS_MODE"] = os.getenv("ASSISTANT_INSTRUCTIONS_MODE", "full")
+    s["PROMPT_TOKEN_BUDGET"]         = int(os.getenv("PROMPT_TOKEN_BUDGET", "0"))  # warn above this many fixed tokens; 0 = off
+
+    # Transcripts of the interactive chat (redacted, gzip JSONL); empty = off. Replay with --batch <dir>
+    s["TRANSCRIPT_DIR"]        = os.getenv("TRANSCRIPT_DIR", "")
+    s["TRANSCRIPT_MAX_MB"]     = float(os.getenv("TRANSCRIPT_MAX_MB", "10"))
+    s["TRANSCRIPT_KEEP_FILES"] = int(os.getenv("TRANSCRIPT_KEEP_FILES", "20"))
+    return s
+
+
+def load(dotenv_path: str = ".env") -> dict:
+    """Read `dotenv_path` into the environment (once), then the settings."""
+    global _SETTINGS
+    if _SETTINGS is None:
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            pass  # plain environment variables still work
+        else:
+            load_dotenv(dotenv_path)
+        _SETTINGS = _read()
+    return _SETTINGS
+
+
+def missing() -> list:
+    """Required variables that are not set (checked before any SDK is imported)."""
+    settings = load()
+    return [env for env, name in REQUIRED.items() if not settings[name]]
+
+
+def __getattr__(name: str):
+    settings = load()
+    if name in settings:
+        return settings[name]
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
@@ -1,15 +1,15 @@
 import json
-import copy
 import urllib.request
 from urllib.parse import urlparse
-from typing import Dict
+from typing import Dict, List, Set
+from azure.core.exceptions import ResourceNotFoundError
 from azure.ai.agents.aio import AgentsClient as AsyncAgentsClient
 
 # ────────────────────────────────────────────────────────────────────────────
 # Helpers
 # ────────────────────────────────────────────────────────────────────────────
-def load_openapi(oas_url: str) -> Dict:
-    with urllib.request.urlopen(oas_url) as resp:
+def load_openapi(oas_url: str, timeout: float = 10.0) -> Dict:
+    with urllib.request.urlopen(oas_url, timeout=timeout) as resp:
         return json.loads(resp.read().decode("utf-8"))
 
 def normalize_spec_path_from_url(func_url: str) -> str:
@@ -26,18 +26,75 @@ def normalize_spec_path_from_url(func_url: str) -> str:
         path = "/" + path
     return path
 
+def resolve_path_key(paths: Dict, path_key: str) -> str:
+    """Find `path_key` in the spec's paths, also trying with/without the '/api' prefix."""
+    if path_key in paths:
+        return path_key
+    alt_key = "/api" + path_key if not path_key.startswith("/api") else path_key[4:]
+    if alt_key in paths:
+        return alt_key
+    raise RuntimeError(f"Path '{path_key}' not found in OpenAPI spec (also tried '{alt_key}').")
+
+def _collect_refs(node, found: Set[str]) -> None:
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            found.add(ref)
+        for value in node.values():
+            _collect_refs(value, found)
+    elif isinstance(node, list):
+        for value in node:
+            _collect_refs(value, found)
+
+def component_closure(full_spec: Dict, roots) -> Dict:
+    """Components (by section) transitively referenced from `roots` via local '#/components/...' refs."""
+    components = full_spec.get("components") or {}
+    kept: Dict[str, Dict] = {}
+    pending: Set[str] = set()
+    _collect_refs(roots, pending)
+    seen: Set[str] = set()
+    while pending:
+        ref = pending.pop()
+        if ref in seen or not ref.startswith("#/components/"):
+            continue
+        seen.add(ref)
+        parts = ref[len("#/components/"):].split("/")
+        if len(parts) < 2:
+            continue
+        section, name = parts[0], parts[1].replace("~1", "/").replace("~0", "~")
+        target = (components.get(section) or {}).get(name)
+        if target is None or name in kept.get(section, {}):
+            continue
+        kept.setdefault(section, {})[name] = target
+        _collect_refs(target, pending)
+    # Security requirements name schemes instead of $ref'ing them; keep those whole
+    if components.get("securitySchemes"):
+        kept["securitySchemes"] = components["securitySchemes"]
+    return kept
+
+def slice_spec_paths(full_spec: Dict, path_keys) -> Dict[str, Dict]:
+    """
+    Build one spec per requested path in a single pass over the full spec.
+    Each slice keeps only the components its path actually references ($ref closure).
+    Objects are shared with `full_spec`, not copied: treat the slices as read-only.
+    Returns {requested_path_key: spec}.
+    """
+    paths = full_spec.get("paths", {})
+    top_level = {k: v for k, v in full_spec.items() if k not in ("paths", "components")}
+    slices = {}
+    for path_key in path_keys:
+        actual = resolve_path_key(paths, path_key)
+        spec = dict(top_level)
+        spec["paths"] = {actual: paths[actual]}
+        components = component_closure(full_spec, paths[actual])
+        if components:
+            spec["components"] = components
+        slices[path_key] = spec
+    return slices
+
 def single_path_spec(full_spec: Dict, path_key: str) -> Dict:
-    """Return a copy of the spec containing only one path; keep components intact."""
-    spec = copy.deepcopy(full_spec)
-    paths = spec.get("paths", {})
-    if path_key not in paths:
-        alt_key = "/api" + path_key if not path_key.startswith("/api") else path_key[4:]
-        if alt_key in paths:
-            path_key = alt_key
-        else:
-            raise RuntimeError(f"Path '{path_key}' not found in OpenAPI spec (also tried '{alt_key}').")
-    spec["paths"] = {path_key: paths[path_key]}
-    return spec
+    """Return a spec containing only one path and the components it references."""
+    return slice_spec_paths(full_spec, [path_key])[path_key]
 
 # ────────────────────────────────────────────────────────────────────────────
 # SDK compatibility helpers
@@ -65,6 +122,47 @@ async def create_agent_compat(project_client, *, model: str, name: str, descript
     }
     return await project_client.agents.create(name=name, definition=definition)
 
+async def get_agent_compat(project_client, agent_id: str):
+    """
+    - Newer SDKs: project_client.agents.get_agent(agent_id)
+    - 2.0.0b1:    project_client.agents.get(agent_id)
+    Returns None when the agent no longer exists.
+    """
+    getter = getattr(project_client.agents, "get_agent", None) or getattr(project_client.agents, "get", None)
+    try:
+        return await getter(agent_id)
+    except ResourceNotFoundError:
+        return None
+
+async def update_agent_compat(project_client, agent_id: str, *, model: str, name: str, description: str, instructions: str, tools):
+    """
+    - Newer SDKs: project_client.agents.update_agent(agent_id, ...)
+    - 2.0.0b1:    no in-place update; returns None so the caller creates a new agent
+    """
+    if hasattr(project_client.agents, "update_agent"):
+        return await project_client.agents.update_agent(
+            agent_id,
+            model=model,
+            name=name,
+            description=description,
+            instructions=instructions,
+            tools=tools
+        )
+    return None
+
+async def delete_agent_compat(project_client, agent_id: str) -> bool:
+    """
+    - Newer SDKs: project_client.agents.delete_agent(agent_id)
+    - 2.0.0b1:    project_client.agents.delete(agent_id)
+    Returns False when the agent was already gone.
+    """
+    deleter = getattr(project_client.agents, "delete_agent", None) or getattr(project_client.agents, "delete", None)
+    try:
+        await deleter(agent_id)
+        return True
+    except ResourceNotFoundError:
+        return False
+
 async def create_thread_compat(agents_client: AsyncAgentsClient):
     """
     - Newer SDKs: agents_client.create_thread()
@@ -76,4 +174,52 @@ async def create_thread_compat(agents_client: AsyncAgentsClient):
     if hasattr(agents_client, "threads") and hasattr(agents_client.threads, "create"):
         return await agents_client.threads.create()
     # If neither exists, return None; ChatAgent may still create internally (but we prefer explicit)
-    return None
\ No newline at end of file
+    return None
+
+async def create_message_compat(agents_client: AsyncAgentsClient, thread_id: str, content: str):
+    """
+    - Newer SDKs: agents_client.messages.create(thread_id=..., role="user", content=...)
+    - Older variants: agents_client.create_message(...)
+    """
+    if hasattr(agents_client, "messages"):
+        return await agents_client.messages.create(thread_id=thread_id, role="user", content=content)
+    return await agents_client.create_message(thread_id=thread_id, role="user", content=content)
+
+async def create_run_compat(agents_client: AsyncAgentsClient, thread_id: str, agent_id: str):
+    """
+    - Newer SDKs: agents_client.runs.create(thread_id=..., agent_id=...)
+    - Older variants: agents_client.create_run(thread_id=..., assistant_id=...)
+    """
+    if hasattr(agents_client, "runs"):
+        return await agents_client.runs.create(thread_id=thread_id, agent_id=agent_id)
+    return await agents_client.create_run(thread_id=thread_id, assistant_id=agent_id)
+
+async def get_run_compat(agents_client: AsyncAgentsClient, thread_id: str, run_id: str):
+    """
+    - Newer SDKs: agents_client.runs.get(thread_id=..., run_id=...)
+    - Older variants: agents_client.get_run(...)
+    """
+    if hasattr(agents_client, "runs"):
+        return await agents_client.runs.get(thread_id=thread_id, run_id=run_id)
+    return await agents_client.get_run(thread_id=thread_id, run_id=run_id)
+
+async def list_run_steps_compat(agents_client: AsyncAgentsClient, thread_id: str, run_id: str) -> List:
+    """
+    - Newer SDKs: agents_client.run_steps.list(thread_id=..., run_id=...)  (async pager)
+    - Older variants: agents_client.list_run_steps(...)
+    """
+    if hasattr(agents_client, "run_steps"):
+        return [step async for step in agents_client.run_steps.list(thread_id=thread_id, run_id=run_id)]
+    steps = await agents_client.list_run_steps(thread_id=thread_id, run_id=run_id)
+    return list(getattr(steps, "data", steps))
+
+async def list_run_messages_compat(agents_client: AsyncAgentsClient, thread_id: str, run_id: str) -> List:
+    """
+    Messages produced by one run, oldest first.
+    - Newer SDKs: agents_client.messages.list(thread_id=..., run_id=..., order="asc")  (async pager)
+    - Older variants: agents_client.list_messages(...)
+    """
+    if hasattr(agents_client, "messages"):
+        return [m async for m in agents_client.messages.list(thread_id=thread_id, run_id=run_id, order="asc")]
+    messages = await agents_client.list_messages(thread_id=thread_id, run_id=run_id, order="asc")
+    return list(getattr(messages, "data", messages))
@@ -1,101 +1,253 @@
 # Entry point — uses Microsoft Agent Framework end-to-end (unchanged behavior)
+#
+# Startup order: only the standard library and the light local modules load on
+# import; .env is read and checked first, and the Azure SDKs / Agent Framework
+# are imported inside main() once the configuration is known to be good.
 
+import os
+import sys
+import json
+import time
 import asyncio
+import argparse
+import contextlib
 from typing import List
 
-# ── Azure identity (async) & Azure AI SDKs
-from azure.identity.aio import AzureCliCredential
-from azure.ai.projects.aio import AIProjectClient                  # <-- Agent creation (Project-scoped)
-from azure.ai.agents.aio import AgentsClient as AsyncAgentsClient  # <-- Async Agents client
-
-# ── Microsoft Agent Framework (core)
-from agent_framework.azure import AzureAIAgentClient               # <-- Framework chat client for Azure AI Foundry
-from agent_framework import ChatAgent                              # <-- Framework high-level chat orchestrator
-
-# ── Tool modeling (OpenAPI tools)
-from azure.ai.agents.models import OpenApiTool, OpenApiAuthDetails
-
-# Local modules (same logic split for clarity)
-from config import (
-PROJECT_ENDPOINT,
-MODEL_DEPLOYMENT,
-OPENAPI_V3_URL,
-FUNC_UPDATE_URL,
-FUNC_VALIDATE_URL,
-ASSISTANT_NAME,
-)
-from instructions import ASSISTANT_DESCRIPTION, ASSISTANT_INSTRUCTIONS
-from helpers import load_openapi, normalize_spec_path_from_url, single_path_spec, create_agent_compat, create_thread_compat
+# Local modules (same logic split for clarity; none of these import an SDK)
+import config
+from instructions import ASSISTANT_DESCRIPTION, get_instructions
+from prompt_budget import measure_prompt, check_budget
+from spec_loader import load_openapi_async
+
+# Transcript recording is shared with the Function wrapper, which deploys it: its one copy
+# lives in ../Employee_Agent_Foundry_Wrapper. Appended, so this directory's modules still win.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Employee_Agent_Foundry_Wrapper"))
+from transcripts import TranscriptRecorder
+
+# ────────────────────────────────────────────────────────────────────────────
+# Batch mode — scripted conversations, N sessions at a time
+# ────────────────────────────────────────────────────────────────────────────
+async def run_batch_mode(agents_client, agent_id: str, args, results) -> None:
+    """One JSONL record per turn to `results` (--out -) or the --out file; printed progress goes to stderr."""
+    from batch_driver import load_conversations, run_batch, JsonlSink
+
+    conversations = load_conversations(args.batch)
+    print(f"\n🚀 Running {len(conversations)} conversation(s), concurrency {args.concurrency}")
+    out = results if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        summary = await run_batch(agents_client, agent_id, conversations, JsonlSink(out),
+                                  concurrency=args.concurrency)
+    finally:
+        if out is not results:
+            out.close()
+    print("\n📊 Batch summary: " + json.dumps(summary))
+    if summary["tool_mismatches"]:
+        raise SystemExit(f"❌ {summary['tool_mismatches']} of {summary['tool_checks']} turn(s) "
+                         f"did not make the expected tool calls (see expect_tools / tools_match)")
+
+# ────────────────────────────────────────────────────────────────────────────
+# Interactive turn — stream the reply, optionally record it
+# ────────────────────────────────────────────────────────────────────────────
+def collect_tool_call(calls: dict, content) -> None:
+    """Fold one streamed content item into `calls` (call id -> call) when it is a tool call.
+
+    Any "<kind>_call" content counts (function, OpenAPI, code interpreter, MCP, ...);
+    fragments of one call share its call id and their arguments are joined.
+    """
+    kind = getattr(content, "type", None) or ""
+    if not kind.endswith("_call"):
+        return
+    call_id = getattr(content, "call_id", None) or f"#{len(calls)}"
+    arguments = getattr(content, "arguments", None)
+    call = calls.get(call_id)
+    if call is None:
+        calls[call_id] = {"name": getattr(content, "name", None) or kind[:-len("_call")],
+                          "type": "function" if kind == "function_call" else kind[:-len("_call")],
+                          "arguments": arguments}
+    elif isinstance(arguments, str) and isinstance(call["arguments"], str):
+        call["arguments"] += arguments
+    elif arguments is not None:
+        call["arguments"] = arguments
+
+async def chat_turn(agent, prompt: str, thread_id, recorder: TranscriptRecorder) -> None:
+    """Stream one reply to stdout; with TRANSCRIPT_DIR set, queue the turn for the transcript writer."""
+    started = time.perf_counter()
+    first_text, parts, calls, run_id = None, [], {}, None
+    status, error = "cancelled", None
+    try:
+        # Streaming tokens + tool-call aware events (when available)
+        async for chunk in agent.run_stream(prompt):
+            if getattr(chunk, "text", None):
+                first_text = first_text or time.perf_counter()
+                parts.append(chunk.text)
+                print(chunk.text, end="", flush=True)
+            run_id = getattr(chunk, "response_id", None) or run_id
+            for content in getattr(chunk, "contents", None) or []:
+                collect_tool_call(calls, content)
+        status = "completed"
+    except Exception as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if recorder.enabled:
+            ended = time.perf_counter()
+            stages = {"turn": {"count": 1, "ms": round((ended - started) * 1000.0, 1)}}
+            if first_text:
+                stages["first_text"] = {"count": 1, "ms": round((first_text - started) * 1000.0, 1)}
+            recorder.record({"thread_id": thread_id, "run_id": run_id, "status": status, "prompt": prompt,
+                             "answer": "".join(parts), "error": error, "stages": stages,
+                             "tool_calls": list(calls.values())})
+    print()  # newline
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Employee Self-Service Assistant (Agent Framework client)")
+    parser.add_argument("--batch", metavar="JSONL",
+                        help='run scripted conversations ({"id":..., "turns":[...]} per line), or replay a '
+                             'transcript store (TRANSCRIPT_DIR or one .jsonl.gz), instead of chatting')
+    parser.add_argument("--concurrency", type=int, default=8, help="sessions in flight at once (batch mode)")
+    parser.add_argument("--out", default="-", help="per-turn results as JSONL (default: stdout)")
+    parser.add_argument("--offline-endpoint", metavar="URL",
+                        help="run the batch against a local fake backend (benchmarks/fake_agents_backend.py)")
+    parser.add_argument("--agent-id", default="asst_offline", help="agent id to use with --offline-endpoint")
+    args = parser.parse_args(argv)
+    if args.offline_endpoint and not args.batch:
+        parser.error("--offline-endpoint requires --batch")
+    return args
 
 # ────────────────────────────────────────────────────────────────────────────
 # Main — FULL Agent Framework usage
 # ────────────────────────────────────────────────────────────────────────────
-async def main():
-    # Guardrails
-    missing = [k for k, v in {
-        "AZURE_AI_PROJECT_ENDPOINT": PROJECT_ENDPOINT,
-        "AZURE_AI_MODEL_DEPLOYMENT_NAME": MODEL_DEPLOYMENT,
-        "FUNCTION_OPENAPI_SCHEMA_URL": OPENAPI_V3_URL,
-        "EMPLOYEE_INFO_VALIDATE_FUNCTION": FUNC_VALIDATE_URL,
-        "EMPLOYEE_INFO_UPDATE_FUNCTION": FUNC_UPDATE_URL,
-    }.items() if not v]
+async def main(args=None):
+    args = args or parse_args([])
+    if not args.batch:
+        return await run(args, sys.stdout)
+    # Batch mode: stdout carries only the JSONL results (--out -); setup and progress go to stderr
+    results = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        return await run(args, results)
+
+async def run(args, results) -> None:
+    # Offline batch: no Azure sign-in, no agent resolution
+    if args.offline_endpoint:
+        from batch_driver import offline_agents_client
+        async with offline_agents_client(args.offline_endpoint) as agents_client:
+            await run_batch_mode(agents_client, args.agent_id, args, results)
+        return
+
+    # Guardrails — before any SDK import, so a bad .env fails in milliseconds
+    config.load()
+    missing = config.missing()
     if missing:
         raise SystemExit(f"Missing variables in .env: {', '.join(missing)}")
+    from config import (
+    PROJECT_ENDPOINT,
+    MODEL_DEPLOYMENT,
+    OPENAPI_V3_URL,
+    ASSISTANT_NAME,
+    AGENT_REGISTRY_PATH,
+    AGENT_REGISTRY_VERIFY,
+    AGENT_REGISTRY_GC,
+    OPENAPI_CACHE_DIR,
+    OPENAPI_TIMEOUT_SECONDS,
+    OPENAPI_TOOLS_INCLUDE,
+    OPENAPI_TOOLS_EXCLUDE,
+    OPENAPI_TOOL_NAMES,
+    OPENAPI_TOOLS_MEMO_PATH,
+    ASSISTANT_INSTRUCTIONS_MODE,
+    PROMPT_TOKEN_BUDGET,
+    TRANSCRIPT_DIR,
+    TRANSCRIPT_MAX_MB,
+    TRANSCRIPT_KEEP_FILES,
+    )
 
     print("Using configuration (.env):")
     print(f"  Project Endpoint : {PROJECT_ENDPOINT}")
     print(f"  Model Deployment : {MODEL_DEPLOYMENT}")
     print(f"  OpenAPI v3 URL   : {OPENAPI_V3_URL}")
-    print(f"  Validate URL     : {FUNC_VALIDATE_URL}")
-    print(f"  Update URL       : {FUNC_UPDATE_URL}")
-
-    # Load OpenAPI once; slice into per-operation specs
-    full_spec = load_openapi(OPENAPI_V3_URL)
-    validate_path = normalize_spec_path_from_url(FUNC_VALIDATE_URL)
-    update_path   = normalize_spec_path_from_url(FUNC_UPDATE_URL)
-
-    SPEC_VALIDATE = single_path_spec(full_spec, validate_path)
-    SPEC_UPDATE   = single_path_spec(full_spec, update_path)
-
-    # Build OpenAPI tools (anonymous, PoC)
-    anon_auth = OpenApiAuthDetails(type="anonymous")
-    tool_validate = OpenApiTool(
-        name="EmployeeValidation",
-        description="Validate employee via POST /ValidateEmployeeProfile (employee_id, first_name, last_name).",
-        spec=SPEC_VALIDATE,
-        auth=anon_auth,
-    )
-    tool_update = OpenApiTool(
-        name="EmployeeUpdate",
-        description="Update profile via POST /UpdateEmployeeProfile (employee_id + fields to change).",
-        spec=SPEC_UPDATE,
-        auth=anon_auth,
-    )
-    tool_definitions = []
-    tool_definitions.extend(tool_validate.definitions)
-    tool_definitions.extend(tool_update.definitions)
-    print(f"\nTool definitions prepared: {len(tool_definitions)}")
+    print(f"  Tools include    : {OPENAPI_TOOLS_INCLUDE}")
+    print(f"  Tools exclude    : {OPENAPI_TOOLS_EXCLUDE}")
+    print(f"  Instructions     : {ASSISTANT_INSTRUCTIONS_MODE}")
+    instructions = get_instructions(ASSISTANT_INSTRUCTIONS_MODE)
+
+    # Fetch (or revalidate) the OpenAPI spec in the background while the SDKs load and we sign in
+    spec_task = asyncio.create_task(load_openapi_async(OPENAPI_V3_URL, OPENAPI_CACHE_DIR, OPENAPI_TIMEOUT_SECONDS))
+    await asyncio.sleep(0)  # let the fetch reach its worker thread before the imports below block the loop
+
+    # ── Azure identity (async) & Azure AI SDKs
+    from azure.identity.aio import AzureCliCredential
+    from azure.ai.projects.aio import AIProjectClient                  # <-- Agent creation (Project-scoped)
+    from azure.ai.agents.aio import AgentsClient as AsyncAgentsClient  # <-- Async Agents client
+
+    # ── Microsoft Agent Framework (core)
+    from agent_framework.azure import AzureAIAgentClient               # <-- Framework chat client for Azure AI Foundry
+    from agent_framework import ChatAgent                              # <-- Framework high-level chat orchestrator
+
+    # ── Tool modeling (OpenAPI tools)
+    from azure.ai.agents.models import OpenApiAuthDetails
+
+    # Local modules built on the SDK
+    from helpers import create_thread_compat
+    from tool_builder import load_tool_specs, build_tool_definitions, parse_patterns, parse_name_overrides
+    from agent_registry import AgentRegistry, ensure_agent, collect_stale_agents
 
     # ── Agent Framework + Azure AI Foundry (ASYNC) ──────────────────────────
     async with AzureCliCredential() as credential:
-        # (A) Create the assistant via the **Project-scoped** client
+        # (A) Reuse (or create/update) the assistant via the **Project-scoped** client
         async with AIProjectClient(endpoint=PROJECT_ENDPOINT, credential=credential) as project_client:
-            print("\n📋 Creating assistant in Azure AI Foundry (via Project client)...")
-            assistant = await create_agent_compat(
+            # One tool definition per operationId (single pass, referenced components only)
+            full_spec, spec_source = await spec_task
+            print(f"\nOpenAPI spec: {spec_source}")
+            tool_specs, tools_source = load_tool_specs(
+                full_spec,
+                include=parse_patterns(OPENAPI_TOOLS_INCLUDE),
+                exclude=parse_patterns(OPENAPI_TOOLS_EXCLUDE),
+                name_overrides=parse_name_overrides(OPENAPI_TOOL_NAMES),
+                memo_path=OPENAPI_TOOLS_MEMO_PATH,
+            )
+            if not tool_specs:
+                raise SystemExit("No OpenAPI operations matched OPENAPI_TOOLS_INCLUDE / OPENAPI_TOOLS_EXCLUDE.")
+
+            # Build OpenAPI tools (anonymous, PoC)
+            tool_definitions = build_tool_definitions(tool_specs, OpenApiAuthDetails(type="anonymous"))
+            print(f"Tool definitions prepared: {len(tool_definitions)} ({tools_source})")
+            for entry in tool_specs:
+                print(f"   {entry['name']:<24} {entry['method'].upper()} {entry['path']}")
+
+            prompt_size = measure_prompt(instructions, tool_specs)
+            print(f"Fixed prompt per run: {prompt_size['total_tokens']} tokens "
+                  f"(instructions {prompt_size['instructions_tokens']}, tools {prompt_size['tools_tokens']}; "
+                  f"{prompt_size['tokenizer']})")
+            warning = check_budget(prompt_size, PROMPT_TOKEN_BUDGET)
+            if warning:
+                print(f"⚠️  {warning}")
+
+            print("\n📋 Resolving assistant in Azure AI Foundry (via Project client)...")
+            registry = AgentRegistry(AGENT_REGISTRY_PATH, PROJECT_ENDPOINT)
+            assistant, action = await ensure_agent(
                 project_client,
+                registry,
                 model=MODEL_DEPLOYMENT,
                 name=ASSISTANT_NAME,
                 description=ASSISTANT_DESCRIPTION,
-                instructions=ASSISTANT_INSTRUCTIONS,
+                instructions=instructions,
                 tools=tool_definitions,
+                verify=AGENT_REGISTRY_VERIFY,
             )
-            print("✅ Assistant created")
+            print(f"✅ Assistant {action}")
             print(f"   Name : {getattr(assistant, 'name', '')}")
             print(f"   Id   : {getattr(assistant, 'id', '')}")  # asst_...
             print(f"   Model: {getattr(assistant, 'model', '')}")
 
+            if AGENT_REGISTRY_GC:
+                deleted = await collect_stale_agents(project_client, registry, keep_id=assistant.id)
+                print(f"🧹 Deleted {len(deleted)} stale assistant(s)")
+
             # (B) Open an **async Agents client** and pass it to the **Agent Framework** chat client.
             async with AsyncAgentsClient(endpoint=PROJECT_ENDPOINT, credential=credential) as agents_client:
+                if args.batch:
+                    await run_batch_mode(agents_client, assistant.id, args, results)
+                    return
+
                 # Create a PERSISTENT THREAD once and reuse it for the whole interactive loop
                 thread = await create_thread_compat(agents_client)
                 thread_id = getattr(thread, "id", None) if thread else None
@@ -120,6 +272,12 @@ async def main():
                     print("💬 Interactive Chat via Microsoft Agent Framework (type 'quit' to exit)")
                     print("="*72 + "\n")
 
+                    recorder = TranscriptRecorder(TRANSCRIPT_DIR, source="cli",
+                                                  max_bytes=int(TRANSCRIPT_MAX_MB * 1024 * 1024),
+                                                  keep_files=TRANSCRIPT_KEEP_FILES)
+                    if recorder.enabled:
+                        print(f"📝 Recording redacted transcripts to {TRANSCRIPT_DIR}\n")
+
                     while True:
                         try:
                             user_input = input("You: ").strip()
@@ -133,13 +291,9 @@ async def main():
                             print("\n👋 Goodbye!")
                             break
 
-                        # Streaming tokens + tool-call aware events (when available)
                         print("Agent: ", end="", flush=True)
-                        async for chunk in agent.run_stream(user_input):
-                            if getattr(chunk, "text", None):
-                                print(chunk.text, end="", flush=True)
-                        print()  # newline
+                        await chat_turn(agent, user_input, thread_id, recorder)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,103 @@
+import sys
+import json
+import math
+import argparse
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# ────────────────────────────────────────────────────────────────────────────
+# Token counting
+# ────────────────────────────────────────────────────────────────────────────
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o / gpt-4.1 family
+
+@lru_cache(maxsize=4)
+def _encoder(encoding: str):
+    """tiktoken encoder, or None when tiktoken (or its encoding file) is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding)
+    except Exception:
+        return None
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> tuple:
+    """
+    Return (tokens, method) where method is the tiktoken encoding name, or
+    "estimate" (about 4 characters per token) when tiktoken cannot be loaded.
+    """
+    enc = _encoder(encoding)
+    if enc is not None:
+        return len(enc.encode(text)), encoding
+    return math.ceil(len(text) / 4), "estimate"
+
+def tool_spec_text(tool_specs: List[Dict]) -> str:
+    """The part of each tool definition the service expands into the prompt: name, description, spec."""
+    return "\n".join(
+        json.dumps({"name": t["name"], "description": t["description"], "spec": t["spec"]},
+                   separators=(",", ":"), ensure_ascii=False)
+        for t in tool_specs
+    )
+
+# ────────────────────────────────────────────────────────────────────────────
+# Prompt size per run
+# ────────────────────────────────────────────────────────────────────────────
+def measure_prompt(instructions: str, tool_specs: Optional[List[Dict]] = None,
+                   encoding: str = DEFAULT_ENCODING) -> Dict:
+    """Fixed input tokens every run pays before the conversation itself: instructions plus tool specs."""
+    instructions_tokens, method = count_tokens(instructions, encoding)
+    tools_tokens = count_tokens(tool_spec_text(tool_specs), encoding)[0] if tool_specs else 0
+    return {
+        "instructions_tokens": instructions_tokens,
+        "tools_tokens": tools_tokens,
+        "total_tokens": instructions_tokens + tools_tokens,
+        "tokenizer": method,
+    }
+
+def check_budget(measure: Dict, budget: int) -> Optional[str]:
+    """Warning text when the fixed prompt exceeds PROMPT_TOKEN_BUDGET (0 disables the check)."""
+    if budget > 0 and measure["total_tokens"] > budget:
+        return (f"Fixed prompt is {measure['total_tokens']} tokens, over PROMPT_TOKEN_BUDGET={budget} "
+                f"(instructions {measure['instructions_tokens']}, tools {measure['tools_tokens']}). "
+                f"Try ASSISTANT_INSTRUCTIONS_MODE=compact or narrow OPENAPI_TOOLS_INCLUDE.")
+    return None
+
+# ────────────────────────────────────────────────────────────────────────────
+# CLI — compare instruction variants
+# ────────────────────────────────────────────────────────────────────────────
+def _load_tool_specs(spec_arg: Optional[str]) -> List[Dict]:
+    # Imported here: instruction-only measurement needs neither the SDK nor the network
+    from config import (OPENAPI_V3_URL, OPENAPI_CACHE_DIR, OPENAPI_TIMEOUT_SECONDS,
+                        OPENAPI_TOOLS_INCLUDE, OPENAPI_TOOLS_EXCLUDE, OPENAPI_TOOL_NAMES)
+    from spec_loader import load_openapi_cached
+    from tool_builder import discover_tool_specs, parse_patterns, parse_name_overrides
+
+    source = spec_arg or OPENAPI_V3_URL
+    if source.startswith(("http://", "https://")):
+        full_spec, _ = load_openapi_cached(source, OPENAPI_CACHE_DIR, OPENAPI_TIMEOUT_SECONDS)
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            full_spec = json.load(f)
+    return discover_tool_specs(full_spec, parse_patterns(OPENAPI_TOOLS_INCLUDE),
+                               parse_patterns(OPENAPI_TOOLS_EXCLUDE), parse_name_overrides(OPENAPI_TOOL_NAMES))
+
+def main(argv=None) -> None:
+    from instructions import INSTRUCTION_VARIANTS
+
+    parser = argparse.ArgumentParser(description="Input tokens per run for each instruction variant")
+    parser.add_argument("--spec", metavar="FILE_OR_URL",
+                        help="OpenAPI spec to include tool tokens (default: FUNCTION_OPENAPI_SCHEMA_URL with --tools)")
+    parser.add_argument("--tools", action="store_true", help="include tool specs from FUNCTION_OPENAPI_SCHEMA_URL")
+    parser.add_argument("--encoding", default=DEFAULT_ENCODING)
+    args = parser.parse_args(argv)
+
+    tool_specs = _load_tool_specs(args.spec) if (args.spec or args.tools) else None
+    baseline = None
+    print(f"{'mode':<9} {'instructions':>12} {'tools':>7} {'total':>7} {'vs full':>8}  tokenizer")
+    for mode, text in INSTRUCTION_VARIANTS.items():
+        m = measure_prompt(text, tool_specs, args.encoding)
+        baseline = baseline or m["total_tokens"]
+        change = f"{(m['total_tokens'] - baseline) / baseline:+.0%}"
+        print(f"{mode:<9} {m['instructions_tokens']:>12} {m['tools_tokens']:>7} {m['total_tokens']:>7} "
+              f"{change:>8}  {m['tokenizer']}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import urllib.error
+import urllib.request
+from typing import Dict, Optional
+
+# ────────────────────────────────────────────────────────────────────────────
+# On-disk OpenAPI cache (ETag / Last-Modified revalidation)
+# ────────────────────────────────────────────────────────────────────────────
+class SpecLoadError(RuntimeError):
+    """The spec could not be fetched and no cached copy exists."""
+
+def _cache_file(cache_dir: str, url: str) -> str:
+    return os.path.join(cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] + ".json")
+
+def _read_cache(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        return entry if isinstance(entry.get("spec"), dict) else None
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, AttributeError):
+        return None  # corrupt entry: treat as a miss and refetch
+
+def _write_cache(path: str, entry: Dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+
+def load_openapi_cached(url: str, cache_dir: str, timeout: float = 10.0) -> tuple:
+    """
+    Return (spec, source) where source is one of:
+      "fetched"     - 200 from the server (cache updated)
+      "revalidated" - 304, cached copy still current
+      "offline"     - server unreachable / erroring, cached copy served
+    Raises SpecLoadError when the server cannot be reached and nothing is cached.
+    """
+    path = _cache_file(cache_dir, url)
+    cached = _read_cache(path)
+
+    headers = {"Accept": "application/json"}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as resp:
+            spec = json.loads(resp.read().decode("utf-8"))
+            entry = {
+                "url": url,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "fetched_at": int(time.time()),
+                "spec": spec,
+            }
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return cached["spec"], "revalidated"
+        if cached:
+            return cached["spec"], "offline"
+        raise SpecLoadError(f"GET {url} failed with HTTP {e.code} and no cached spec exists.") from e
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        # URLError, socket timeouts and a malformed body all fall back the same way
+        if cached:
+            return cached["spec"], "offline"
+        raise SpecLoadError(f"GET {url} failed ({e}) and no cached spec exists.") from e
+
+    try:
+        _write_cache(path, entry)
+    except OSError:
+        pass  # a read-only cache dir only costs the next revalidation
+    return spec, "fetched"
+
+async def load_openapi_async(url: str, cache_dir: str, timeout: float = 10.0) -> tuple:
+    """`load_openapi_cached` off the event loop, so startup work can overlap the fetch."""
+    return await asyncio.to_thread(load_openapi_cached, url, cache_dir, timeout)
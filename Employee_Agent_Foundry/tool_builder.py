@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import hashlib
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional
+
+from azure.ai.agents.models import OpenApiAuthDetails, OpenApiFunctionDefinition, OpenApiToolDefinition
+
+from helpers import component_closure
+
+# ────────────────────────────────────────────────────────────────────────────
+# Operation discovery (one OpenAPI tool definition per operationId)
+# ────────────────────────────────────────────────────────────────────────────
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+MAX_DESCRIPTION = 1024
+MEMO_VERSION = 1  # bump when the shape of a tool spec changes
+
+def parse_patterns(value: Optional[str]) -> List[str]:
+    """'a, tag:B ,c*' -> ['a', 'tag:B', 'c*']"""
+    return [p.strip() for p in (value or "").split(",") if p.strip()]
+
+def parse_name_overrides(value: Optional[str]) -> Dict[str, str]:
+    """'OpId=ToolName,Other=Name2' -> {'OpId': 'ToolName', 'Other': 'Name2'}"""
+    overrides = {}
+    for pair in parse_patterns(value):
+        op_id, sep, name = pair.partition("=")
+        if sep and op_id.strip() and name.strip():
+            overrides[op_id.strip()] = name.strip()
+    return overrides
+
+def _matches(patterns: List[str], operation_id: str, tags: List[str]) -> bool:
+    """Glob on the operationId, or 'tag:<glob>' on any of the operation's tags."""
+    for pattern in patterns:
+        if pattern.startswith("tag:"):
+            if any(fnmatchcase(t, pattern[4:]) for t in tags):
+                return True
+        elif fnmatchcase(operation_id, pattern):
+            return True
+    return False
+
+def _tool_name(operation_id: str) -> str:
+    # Tool names must match ^[a-zA-Z0-9_-]{1,64}$
+    return re.sub(r"[^A-Za-z0-9_-]", "_", operation_id)[:64] or "operation"
+
+def _tool_description(op: Dict, method: str, path: str) -> str:
+    parts = [p.strip().rstrip(".") for p in (op.get("summary"), op.get("description")) if p and p.strip()]
+    text = ". ".join(dict.fromkeys(parts))  # summary and description are often identical
+    route = f"{method.upper()} {path}"
+    text = f"{text} ({route})." if text else f"Calls {route}."
+    return text[:MAX_DESCRIPTION]
+
+def discover_tool_specs(full_spec: Dict,
+                        include: Optional[List[str]] = None,
+                        exclude: Optional[List[str]] = None,
+                        name_overrides: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """
+    Walk `paths` once and return one entry per selected operation:
+      {"name", "description", "operation_id", "method", "path", "spec"}
+    Each spec holds just that operation (plus path-level parameters) and the
+    components it references. Operations without an operationId are skipped.
+    """
+    include = include or ["*"]
+    exclude = exclude or []
+    name_overrides = name_overrides or {}
+    top_level = {k: v for k, v in full_spec.items() if k not in ("paths", "components")}
+
+    tool_specs = []
+    used_names = set()
+    for path, path_item in (full_spec.get("paths") or {}).items():
+        if not isinstance(path_item, dict):
+            continue
+        shared = {k: v for k, v in path_item.items() if k not in HTTP_METHODS}
+        for method in HTTP_METHODS:
+            op = path_item.get(method)
+            if not isinstance(op, dict) or not op.get("operationId"):
+                continue
+            operation_id = op["operationId"]
+            tags = op.get("tags") or []
+            if not _matches(include, operation_id, tags) or _matches(exclude, operation_id, tags):
+                continue
+
+            name = name_overrides.get(operation_id) or _tool_name(operation_id)
+            base, n = name, 2
+            while name in used_names:
+                name = f"{base[:60]}_{n}"
+                n += 1
+            used_names.add(name)
+
+            item = dict(shared)
+            item[method] = op
+            spec = dict(top_level)
+            spec["paths"] = {path: item}
+            components = component_closure(full_spec, item)
+            if components:
+                spec["components"] = components
+
+            tool_specs.append({
+                "name": name,
+                "description": _tool_description(op, method, path),
+                "operation_id": operation_id,
+                "method": method,
+                "path": path,
+                "spec": spec,
+            })
+    return tool_specs
+
+# ────────────────────────────────────────────────────────────────────────────
+# Memoization across restarts
+# ────────────────────────────────────────────────────────────────────────────
+def tool_specs_key(full_spec: Dict, include, exclude, name_overrides) -> str:
+    canonical = json.dumps(
+        {"v": MEMO_VERSION, "spec": full_spec, "include": include, "exclude": exclude,
+         "names": name_overrides},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def load_tool_specs(full_spec: Dict, *, include=None, exclude=None, name_overrides=None,
+                    memo_path: Optional[str] = None) -> tuple:
+    """
+    Return (tool_specs, source) where source is "memo" (same spec and filters as
+    the last run, read back from `memo_path`) or "built".
+    """
+    key = tool_specs_key(full_spec, include, exclude, name_overrides)
+    if memo_path:
+        try:
+            with open(memo_path, "r", encoding="utf-8") as f:
+                memo = json.load(f)
+            if memo.get("key") == key and isinstance(memo.get("tools"), list):
+                return memo["tools"], "memo"
+        except (OSError, ValueError, AttributeError):
+            pass  # missing or corrupt memo: rebuild
+
+    tool_specs = discover_tool_specs(full_spec, include, exclude, name_overrides)
+    if memo_path:
+        try:
+            os.makedirs(os.path.dirname(memo_path) or ".", exist_ok=True)
+            tmp = f"{memo_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "tools": tool_specs}, f)
+            os.replace(tmp, memo_path)
+        except OSError:
+            pass
+    return tool_specs, "built"
+
+# ────────────────────────────────────────────────────────────────────────────
+# SDK tool
+# ────────────────────────────────────────────────────────────────────────────
+def build_tool_definitions(tool_specs: List[Dict],
+                           auth: Optional[OpenApiAuthDetails] = None) -> List[OpenApiToolDefinition]:
+    """
+    Tool definitions for the discovered operations (what OpenApiTool.definitions would hold).
+    Built directly: OpenApiTool.add_definition re-scans every existing name per add,
+    which is quadratic for large specs; names are already unique here.
+    """
+    auth = auth or OpenApiAuthDetails(type="anonymous")
+    return [
+        OpenApiToolDefinition(openapi=OpenApiFunctionDefinition(
+            name=entry["name"], description=entry["description"], spec=entry["spec"],
+            auth=auth, default_params=[],
+        ))
+        for entry in tool_specs
+    ]
@@ -0,0 +1,251 @@
+import time
+import json
+import asyncio
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable
+
+import tracing
+from backend_client import (
+    EndpointStats,
+    IDEMPOTENT_METHODS,
+    RETRY_STATUSES_IDEMPOTENT,
+    RETRY_STATUSES_POST,
+    backoff_delay,
+)
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# ---------------- async backend client ----------------
+
+class BackendHTTPError(Exception):
+    """Final non-2xx answer from the Agents backend (async path)."""
+
+    def __init__(self, status: int, text: str):
+        super().__init__(f"Backend HTTP {status}")
+        self.status = status
+        self.text = text
+
+
+class BackendTransportError(Exception):
+    """The backend call failed below HTTP after all retries (async path).
+
+    Raised for aiohttp's socket timeouts in particular: those subclass
+    TimeoutError, which the routes read as "the run missed its deadline".
+    """
+
+
+class AsyncBackendClient:
+    """aiohttp counterpart of `BackendClient`: same retry policy, 401 handling and per-endpoint stats.
+
+    One instance per worker event loop; thousands of turns can be awaiting the
+    backend concurrently over `pool_size` keep-alive connections.
+    """
+
+    def __init__(self,
+                 base: str,
+                 api_version: str,
+                 token_provider: Callable[[], Awaitable[str]],
+                 pool_size: int = 100,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.25,
+                 backoff_cap: float = 8.0,
+                 on_unauthorized: Callable[[], None] | None = None):
+        self.base = base.rstrip("/")
+        self.api_version = api_version
+        self._token_provider = token_provider
+        self._on_unauthorized = on_unauthorized
+        self._pool_size = pool_size
+        # Imported with the first client rather than the module (cold start)
+        import aiohttp
+
+        # No total timeout: streamed runs stay open for the whole run, only gaps are bounded
+        self._timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._session: "aiohttp.ClientSession | None" = None
+        self._stats: dict[str, EndpointStats] = {}
+
+    # ---------------- public API ----------------
+
+    async def get(self, path: str, *, endpoint: str, params: dict | None = None) -> dict:
+        return await self.request("GET", path, endpoint=endpoint, params=params)
+
+    async def post(self, path: str, body: Any = None, *, endpoint: str, params: dict | None = None) -> dict:
+        return await self.request("POST", path, endpoint=endpoint, params=params,
+                                  json_body=body if body is not None else {})
+
+    async def request(self, method: str, path: str, *, endpoint: str,
+                      params: dict | None = None, json_body: Any = None) -> dict:
+        """Send one logical call (with retries); raise `BackendHTTPError` on final failure."""
+        with tracing.span(f"backend.{endpoint}", {"http.request.method": method, "url.path": path}):
+            return await self._send(method, path, endpoint, params, json_body)
+
+    async def _send(self, method: str, path: str, endpoint: str, params: dict | None, json_body: Any) -> dict:
+        import aiohttp  # loaded by __init__; only binds the name
+
+        query = {"api-version": self.api_version}
+        if params:
+            query.update(params)
+        idempotent = method in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES_IDEMPOTENT if idempotent else RETRY_STATUSES_POST
+        session = self._get_session()
+
+        attempt = 0
+        reauthorized = False
+        started = time.perf_counter()
+        ok = False
+        try:
+            while True:
+                retry_after = None
+                try:
+                    async with session.request(
+                        method,
+                        f"{self.base}{path}",
+                        params=query,
+                        json=json_body,
+                        headers={"Authorization": f"Bearer {await self._token_provider()}"},
+                    ) as resp:
+                        text = await resp.text()
+                        if self._reauthorize(resp.status, reauthorized):
+                            reauthorized = True
+                            continue
+                        if resp.status not in retry_statuses or attempt >= self._max_retries:
+                            tracing.annotate({"http.response.status_code": resp.status, "http.retries": attempt})
+                            if resp.status >= 400:
+                                raise BackendHTTPError(resp.status, text)
+                            ok = True
+                            return await resp.json(content_type=None) if text else {}
+                        retry_after = resp.headers.get("Retry-After")
+                except aiohttp.ClientConnectionError as e:
+                    # Includes ServerTimeoutError (sock_read / sock_connect); a request that
+                    # never connected is safe to resend whatever the method
+                    connect_timeout = getattr(aiohttp, "ConnectionTimeoutError", ())  # aiohttp >= 3.10
+                    retryable = isinstance(e, (aiohttp.ClientConnectorError, connect_timeout)) or idempotent
+                    if not retryable or attempt >= self._max_retries:
+                        if isinstance(e, TimeoutError):
+                            raise BackendTransportError(f"Backend {endpoint} timed out: {e}") from e
+                        raise
+
+                await asyncio.sleep(backoff_delay(attempt, retry_after, self._backoff_base, self._backoff_cap))
+                attempt += 1
+        finally:
+            self._record(endpoint, (time.perf_counter() - started) * 1000.0, ok, attempt)
+
+    async def stream_events(self, method: str, path: str, *, endpoint: str,
+                            json_body: Any = None) -> AsyncIterator[tuple[str, Any]]:
+        """Send a streaming call and yield its server-sent events as (event, data).
+
+        Retries (429/503, and requests that never reached the backend) only
+        happen before the first byte; later socket errors and read timeouts
+        raise `BackendTransportError`. `data` is decoded JSON, or None for the
+        terminal `done` event. Latency is recorded to the end of the stream.
+        """
+        import aiohttp  # loaded by __init__; only binds the name
+
+        session = self._get_session()
+        attempt = 0
+        reauthorized = False
+        started = time.perf_counter()
+        ok = False
+        try:
+            while True:
+                retry_after = None
+                answered = False
+                try:
+                    async with session.request(
+                        method,
+                        f"{self.base}{path}",
+                        params={"api-version": self.api_version},
+                        json=json_body,
+                        headers={
+                            "Authorization": f"Bearer {await self._token_provider()}",
+                            "Accept": "text/event-stream",
+                        },
+                    ) as resp:
+                        answered = True
+                        if self._reauthorize(resp.status, reauthorized):
+                            reauthorized = True
+                            continue
+                        if resp.status in RETRY_STATUSES_POST and attempt < self._max_retries:
+                            retry_after = resp.headers.get("Retry-After")
+                        elif resp.status >= 400:
+                            raise BackendHTTPError(resp.status, await resp.text())
+                        else:
+                            async for event, data in _iter_sse(resp.content):
+                                yield event, data
+                            ok = True
+                            return
+                except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+                    # As in `_send` for a POST: resend only what the backend cannot have seen
+                    # (no connection, or a pooled keep-alive socket it had already closed);
+                    # a body cut mid-run is a ClientPayloadError
+                    connect_timeout = getattr(aiohttp, "ConnectionTimeoutError", ())  # aiohttp >= 3.10
+                    unsent = isinstance(e, (aiohttp.ClientConnectorError, connect_timeout)) or (
+                        isinstance(e, aiohttp.ServerDisconnectedError) and not answered)
+                    if not unsent or attempt >= self._max_retries:
+                        # A TimeoutError here would read as "the run missed its deadline"
+                        raise BackendTransportError(f"Backend {endpoint} stream failed: {e!r}") from e
+
+                await asyncio.sleep(backoff_delay(attempt, retry_after, self._backoff_base, self._backoff_cap))
+                attempt += 1
+        finally:
+            self._record(endpoint, (time.perf_counter() - started) * 1000.0, ok, attempt)
+
+    def stats(self) -> dict:
+        return {name: s.snapshot() for name, s in sorted(self._stats.items())}
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ---------------- internals ----------------
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        import aiohttp  # loaded by __init__; only binds the name
+
+        # Built lazily so the session binds to the worker's running loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._pool_size, keepalive_timeout=60),
+                timeout=self._timeout,
+                headers={"Content-Type": "application/json"},
+            )
+        return self._session
+
+    def _reauthorize(self, status: int, reauthorized: bool) -> bool:
+        # The token was revoked or rotated before its expiry: fetch a new one, resend once
+        if status != 401 or self._on_unauthorized is None or reauthorized:
+            return False
+        self._on_unauthorized()
+        return True
+
+    def _record(self, endpoint: str, elapsed_ms: float, ok: bool, retries: int) -> None:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = EndpointStats()
+        stats.record(elapsed_ms, ok, retries)
+
+
+async def _iter_sse(content: "aiohttp.StreamReader") -> AsyncIterator[tuple[str, Any]]:
+    """Minimal text/event-stream parser (event + data fields only)."""
+    event, data_lines = "message", []
+    async for raw in content:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data_lines:
+                data = "\n".join(data_lines)
+                yield event, None if data == "[DONE]" else json.loads(data)
+            event, data_lines = "message", []
+        elif line.startswith(":"):
+            continue  # comment / keep-alive
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip())
+    if data_lines:
+        data = "\n".join(data_lines)
+        yield event, None if data == "[DONE]" else json.loads(data)
@@ -0,0 +1,242 @@
+import time
+import random
+import threading
+import email.utils
+from typing import TYPE_CHECKING, Any, Callable
+
+import tracing
+
+if TYPE_CHECKING:
+    import requests
+
+# ---------------- backend client ----------------
+
+# Status codes that are safe to retry. POSTs are only retried when the backend
+# has clearly not processed the request (throttled / unavailable).
+RETRY_STATUSES_IDEMPOTENT = {429, 500, 502, 503, 504}
+RETRY_STATUSES_POST = {429, 503}
+IDEMPOTENT_METHODS = ("GET", "DELETE")
+
+
+class EndpointStats:
+    """Latency samples for one logical backend endpoint (bounded reservoir)."""
+
+    MAX_SAMPLES = 512
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._samples: list[float] = []
+
+    def record(self, elapsed_ms: float, ok: bool, retries: int) -> None:
+        self.count += 1
+        self.retries += retries
+        if not ok:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if len(self._samples) >= self.MAX_SAMPLES:
+            self._samples[random.randrange(self.MAX_SAMPLES)] = elapsed_ms
+        else:
+            self._samples.append(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        samples = sorted(self._samples)
+
+        def pct(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Parse a Retry-After header value (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, retry_after: str | None, base: float, cap: float) -> float:
+    """Delay before retry `attempt` (0-based): Retry-After if given, else full-jitter backoff."""
+    hinted = retry_after_seconds(retry_after)
+    if hinted is not None:
+        return min(hinted, cap)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _unsent_failure(error: "requests.ConnectionError") -> str | None:
+    """Why the backend cannot have acted on a request that failed with `error`, if it cannot.
+
+    "refused": no connection was made. "dropped": the socket was closed or reset
+    before any answer, which is how a pooled keep-alive connection the server has
+    just closed fails on reuse (a fresh one rarely fails like that).
+    """
+    import http.client
+    from urllib3.exceptions import NewConnectionError, ProtocolError
+
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", None) or reason  # MaxRetryError wraps the cause
+    if isinstance(reason, NewConnectionError):
+        return "refused"
+    if isinstance(reason, ProtocolError) and len(reason.args) > 1 and isinstance(
+            reason.args[1], (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+        return "dropped"
+    return None
+
+
+class BackendClient:
+    """Pooled, keep-alive client for the Agents REST API under PROJECT_BASE.
+
+    One instance is shared by every request in a worker process, so TCP/TLS
+    connections are reused across calls and across turns. A 401 calls
+    `on_unauthorized` (drop the cached token) and resends once with a new token.
+    """
+
+    def __init__(self,
+                 base: str,
+                 api_version: str,
+                 token_provider: Callable[[], str],
+                 pool_size: int = 16,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.25,
+                 backoff_cap: float = 8.0,
+                 session: "requests.Session | None" = None,
+                 on_unauthorized: Callable[[], None] | None = None):
+        self.base = base.rstrip("/")
+        self.api_version = api_version
+        self._token_provider = token_provider
+        self._on_unauthorized = on_unauthorized
+        self._timeout = (connect_timeout, read_timeout)
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+
+        # Imported with the first client rather than the module (cold start)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._session = session or requests.Session()
+        # urllib3 retries are disabled: retry policy lives in `request` so it
+        # can honour Retry-After and be reported per endpoint.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers.update({"Content-Type": "application/json"})
+
+        self._stats_lock = threading.Lock()
+        self._stats: dict[str, EndpointStats] = {}
+
+    # ---------------- public API ----------------
+
+    def get(self, path: str, *, endpoint: str, params: dict | None = None) -> dict:
+        return self.request("GET", path, endpoint=endpoint, params=params)
+
+    def post(self, path: str, body: Any = None, *, endpoint: str, params: dict | None = None) -> dict:
+        return self.request("POST", path, endpoint=endpoint, params=params, json_body=body if body is not None else {})
+
+    def delete(self, path: str, *, endpoint: str) -> dict:
+        return self.request("DELETE", path, endpoint=endpoint)
+
+    def request(self, method: str, path: str, *, endpoint: str,
+                params: dict | None = None, json_body: Any = None) -> dict:
+        """Send one logical call (with retries); raise `requests.HTTPError` on final failure."""
+        with tracing.span(f"backend.{endpoint}", {"http.request.method": method, "url.path": path}):
+            return self._send(method, path, endpoint, params, json_body)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {name: s.snapshot() for name, s in sorted(self._stats.items())}
+
+    def close(self) -> None:
+        self._session.close()
+
+    # ---------------- internals ----------------
+
+    def _send(self, method: str, path: str, endpoint: str, params: dict | None, json_body: Any) -> dict:
+        import requests  # loaded by __init__; only binds the name
+
+        query = {"api-version": self.api_version}
+        if params:
+            query.update(params)
+        idempotent = method in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES_IDEMPOTENT if idempotent else RETRY_STATUSES_POST
+
+        attempt = 0
+        reauthorized = resent_dropped = False
+        started = time.perf_counter()
+        ok = False
+        try:
+            while True:
+                resp = None
+                try:
+                    resp = self._session.request(
+                        method,
+                        f"{self.base}{path}",
+                        params=query,
+                        json=json_body,
+                        headers={"Authorization": f"Bearer {self._token_provider()}"},
+                        timeout=self._timeout,
+                    )
+                except (requests.Timeout, requests.ConnectionError) as e:
+                    # A read timeout may have reached the server: only idempotent calls resend,
+                    # and a POST only what it never saw (a stale pooled connection once)
+                    unsent = None if isinstance(e, requests.Timeout) else _unsent_failure(e)
+                    retryable = (isinstance(e, requests.ConnectTimeout) or idempotent or unsent == "refused"
+                                 or (unsent == "dropped" and not resent_dropped))
+                    if not retryable or attempt >= self._max_retries:
+                        raise
+                    resent_dropped = resent_dropped or unsent == "dropped"
+                else:
+                    if resp.status_code == 401 and self._on_unauthorized is not None and not reauthorized:
+                        # The token was revoked or rotated before its expiry: fetch a new one, resend once
+                        self._on_unauthorized()
+                        reauthorized = True
+                        continue
+                    if resp.status_code not in retry_statuses or attempt >= self._max_retries:
+                        tracing.annotate({"http.response.status_code": resp.status_code, "http.retries": attempt})
+                        resp.raise_for_status()
+                        ok = True
+                        return resp.json() if resp.content else {}
+
+                time.sleep(self._backoff(attempt, resp))
+                attempt += 1
+        finally:
+            self._record(endpoint, (time.perf_counter() - started) * 1000.0, ok, attempt)
+
+    def _backoff(self, attempt: int, resp: "requests.Response | None") -> float:
+        return backoff_delay(
+            attempt,
+            resp.headers.get("Retry-After") if resp is not None else None,
+            self._backoff_base,
+            self._backoff_cap,
+        )
+
+    def _record(self, endpoint: str, elapsed_ms: float, ok: bool, retries: int) -> None:
+        with self._stats_lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats()
+            stats.record(elapsed_ms, ok, retries)
@@ -0,0 +1,184 @@
+import time
+import queue
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from run_start import error_status
+
+# ---------------- errors ----------------
+
+class RunTimeoutError(TimeoutError):
+    """A run missed the request deadline; `cancelled` tells whether the backend accepted a cancel."""
+
+    def __init__(self, thread_id: str, run_id: str | None, deadline: float, cancelled: bool):
+        super().__init__(f"Run did not finish within {deadline:.0f}s")
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.cancelled = cancelled
+
+    def payload(self) -> dict:
+        """504 body: enough for the client to resume on the same thread.
+
+        An accepted cancel leaves the run "cancelling" until the backend stops it;
+        the thread takes a new run once the run reads "cancelled".
+        """
+        return {
+            "error": str(self),
+            "thread_id": self.thread_id,
+            "run_id": self.run_id,
+            "status": "cancelling" if self.cancelled else "in_progress",
+        }
+
+# ---------------- run canceller ----------------
+
+# Answers meaning the run already reached a terminal state (nothing left to cancel)
+ALREADY_DONE_STATUSES = (400, 404, 409)
+
+
+def _cancel_path(thread_id: str, run_id: str) -> str:
+    return f"/threads/{thread_id}/runs/{run_id}/cancel"
+
+
+class RunCanceller:
+    """Stops backend runs nobody is waiting for any more, so they stop using model and tool capacity.
+
+    Reasons: "timeout" (deadline passed), "disconnect" (client went away on the
+    async/streaming routes), "shutdown" (worker exiting with runs in flight) and
+    "tool_error" (the run waits on a tool no local handler can answer).
+    In-flight runs are tracked so `cancel_in_flight` can stop them on shutdown.
+    """
+
+    REASONS = ("timeout", "disconnect", "shutdown", "tool_error")
+    SHUTDOWN_WORKERS = 16
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, str] = {}  # run_id -> thread_id
+        self._pending: set[asyncio.Task] = set()
+        self.requested = {reason: 0 for reason in self.REASONS}
+        self.cancelled = 0
+        self.already_done = 0
+        self.failures = 0
+
+    # ---------------- in-flight runs ----------------
+
+    def add(self, thread_id: str, run_id: str | None) -> None:
+        if run_id:
+            with self._lock:
+                self._in_flight[run_id] = thread_id
+
+    def discard(self, run_id: str | None) -> None:
+        with self._lock:
+            self._in_flight.pop(run_id, None)
+
+    @contextmanager
+    def track(self, thread_id: str, run_id: str | None) -> Iterator[None]:
+        """Mark the run as waited on for the duration of the block."""
+        self.add(thread_id, run_id)
+        try:
+            yield
+        finally:
+            self.discard(run_id)
+
+    def cancel_in_flight(self, backend, timeout: float = 5.0) -> int:
+        """Cancel every tracked run (sync client; called once when the worker exits).
+
+        Cancels go out concurrently and the call returns after `timeout` seconds
+        at most, whatever the backend does: the host kills a worker that is slow
+        to exit. Returns the number of cancels accepted in time.
+        """
+        with self._lock:
+            runs: queue.SimpleQueue = queue.SimpleQueue()
+            for run_id, thread_id in self._in_flight.items():
+                runs.put((thread_id, run_id))
+            count = len(self._in_flight)
+        accepted = []
+
+        def work() -> None:
+            while True:
+                try:
+                    thread_id, run_id = runs.get_nowait()
+                except queue.Empty:
+                    return
+                if self.cancel(backend, thread_id, run_id, "shutdown"):
+                    accepted.append(run_id)
+
+        # Daemon threads, not an executor: at interpreter exit an executor refuses new work
+        workers = [threading.Thread(target=work, name="cancel-in-flight", daemon=True)
+                   for _ in range(min(count, self.SHUTDOWN_WORKERS))]
+        for worker in workers:
+            worker.start()
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        return len(accepted)
+
+    # ---------------- cancel ----------------
+
+    def cancel(self, backend, thread_id: str, run_id: str | None, reason: str) -> bool:
+        """Sync path (BackendClient). True when the backend accepted the cancel."""
+        if not self._begin(run_id, reason):
+            return False
+        try:
+            backend.post(_cancel_path(thread_id, run_id), {}, endpoint="cancel_run")
+        except Exception as e:
+            return self._failed(e, run_id)
+        return self._done()
+
+    async def cancel_async(self, backend, thread_id: str, run_id: str | None, reason: str) -> bool:
+        """Async path (AsyncBackendClient)."""
+        if not self._begin(run_id, reason):
+            return False
+        try:
+            await backend.post(_cancel_path(thread_id, run_id), {}, endpoint="cancel_run")
+        except Exception as e:
+            return self._failed(e, run_id)
+        return self._done()
+
+    def cancel_soon(self, backend, thread_id: str, run_id: str | None, reason: str) -> None:
+        """Cancel from a request task that is itself being cancelled (client disconnect).
+
+        The cancel runs as its own task on the worker's loop, so it completes
+        after the request task is gone.
+        """
+        task = asyncio.get_running_loop().create_task(self.cancel_async(backend, thread_id, run_id, reason))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "requested": dict(self.requested),
+                "cancelled": self.cancelled,
+                "already_done": self.already_done,
+                "failures": self.failures,
+                "in_flight": len(self._in_flight),
+            }
+
+    # ---------------- internals ----------------
+
+    def _begin(self, run_id: str | None, reason: str) -> bool:
+        if not self.enabled or not run_id:
+            return False
+        with self._lock:
+            self.requested[reason] += 1
+        return True
+
+    def _done(self) -> bool:
+        with self._lock:
+            self.cancelled += 1
+        return True
+
+    def _failed(self, error: Exception, run_id: str) -> bool:
+        with self._lock:
+            if error_status(error) in ALREADY_DONE_STATUSES:
+                self.already_done += 1
+                return False
+            self.failures += 1
+        logging.warning("Could not cancel run %s: %s", run_id, error)
+        return False
@@ -1,10 +1,30 @@
 import os
+import hmac
 import json
-import time
+import atexit
+import signal
+import asyncio
 import logging
-import requests
+import threading
+from contextlib import nullcontext
+from typing import AsyncIterator
 import azure.functions as func
-from azure.identity import DefaultAzureCredential
+
+from token_cache import TokenCache, AsyncTokenCache
+from backend_client import BackendClient
+from async_backend_client import AsyncBackendClient, BackendHTTPError
+from run_waiter import WaitMetrics, WaitPolicy, make_waiter
+from streaming import format_sse, register_route as register_stream_route, stream_turn
+from messages import (ThreadCursors, fetch_run_messages, fetch_run_messages_async, fetch_run_steps,
+                      fetch_run_steps_async, run_assistant_text)
+from thread_pool import WarmThreadPool
+from run_start import RunStarter
+from turn_guard import IdempotencyConflictError, ThreadBusyError, TurnGuard, make_turn_store
+from cancellation import RunCanceller, RunTimeoutError
+from jobs import RunPoller, callback_url_error, make_job_store, new_job, post_callback, public_job
+from tool_dispatch import ToolDispatcher, UnknownToolError, load_handlers
+import transcripts
+import tracing
 
 # ---------------- helpers ----------------
 
@@ -14,162 +34,855 @@ def _env(name: str, default: str | None = None, required: bool = False) -> str |
         raise RuntimeError(f"Missing env var: {name}")
     return v
 
+# azure.identity, requests and aiohttp are imported on first use (or by the warm-up below),
+# not while the host loads this module
+def _credential():
+    from azure.identity import DefaultAzureCredential
+    return DefaultAzureCredential()
+
+def _async_credential():
+    from azure.identity.aio import DefaultAzureCredential
+    return DefaultAzureCredential()
+
+# One credential + cached token per worker process (az login locally; Managed Identity in Azure)
+_TOKEN_CACHE = TokenCache(
+    _credential,
+    "https://ai.azure.com/.default",
+    refresh_margin=float(_env("TOKEN_REFRESH_MARGIN_SECONDS", "300")),
+)
+
 def _bearer_token() -> str:
-    # Uses az login locally; Managed Identity in Azure
-    cred = DefaultAzureCredential()
-    tok = cred.get_token("https://ai.azure.com/.default")
-    return tok.token
-
-def _latest_assistant_text(messages_payload: dict) -> str:
-    data = (messages_payload or {}).get("data", [])
-    # newest assistant first
-    assistant = sorted(
-        [m for m in data if m.get("role") == "assistant"],
-        key=lambda m: m.get("created_at", 0),
-        reverse=True
-    )
-    if not assistant:
-        return ""
-    content = (assistant[0] or {}).get("content") or []
-    if not content:
-        return ""
-    # text may appear as {"text":{"value":"..."}} or "text":"..."
-    first = content[0]
-    t = first.get("text")
-    if isinstance(t, dict):
-        return t.get("value") or ""
-    if isinstance(t, str):
-        return t
-    return ""
+    with tracing.span("auth"):
+        return _TOKEN_CACHE.get()
 
-# ---------------- function app ----------------
+# Shared keep-alive client for PROJECT_BASE, built on first use
+_BACKEND: BackendClient | None = None
+_BACKEND_LOCK = threading.Lock()
 
-app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
+def _backend() -> BackendClient:
+    global _BACKEND
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                # Size the pool to the worker's thread count so no request waits for a connection
+                pool_size = _env("BACKEND_POOL_SIZE") or _env("PYTHON_THREADPOOL_THREAD_COUNT", "16")
+                _BACKEND = BackendClient(
+                    base=_env("PROJECT_BASE", required=True),
+                    api_version=_env("API_VERSION", "v1"),
+                    token_provider=_bearer_token,
+                    pool_size=int(pool_size),
+                    connect_timeout=float(_env("BACKEND_CONNECT_TIMEOUT", "5")),
+                    read_timeout=float(_env("BACKEND_READ_TIMEOUT", "30")),
+                    max_retries=int(_env("BACKEND_MAX_RETRIES", "3")),
+                    on_unauthorized=_TOKEN_CACHE.invalidate,
+                )
+    return _BACKEND
 
-@app.route(route="chat", methods=["POST"])
-def chat(req: func.HttpRequest) -> func.HttpResponse:
-    """POST /api/chat
-    Body: {"prompt":"...", "thread_id":"thread_...(optional)"}
-    Returns: {"thread_id","run_id","status","answer"}
+# Async path (/api/chat/async): aio credential + aiohttp client on the worker's event loop
+_ASYNC_TOKEN_CACHE = AsyncTokenCache(
+    _async_credential,
+    "https://ai.azure.com/.default",
+    refresh_margin=float(_env("TOKEN_REFRESH_MARGIN_SECONDS", "300")),
+)
+_ASYNC_BACKEND: AsyncBackendClient | None = None
+
+async def _async_bearer_token() -> str:
+    with tracing.span("auth"):
+        return await _ASYNC_TOKEN_CACHE.get()
+
+def _async_backend() -> AsyncBackendClient:
+    global _ASYNC_BACKEND
+    if _ASYNC_BACKEND is None:
+        _ASYNC_BACKEND = AsyncBackendClient(
+            base=_env("PROJECT_BASE", required=True),
+            api_version=_env("API_VERSION", "v1"),
+            token_provider=_async_bearer_token,
+            pool_size=int(_env("ASYNC_BACKEND_POOL_SIZE", "100")),
+            connect_timeout=float(_env("BACKEND_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(_env("BACKEND_READ_TIMEOUT", "30")),
+            max_retries=int(_env("BACKEND_MAX_RETRIES", "3")),
+            on_unauthorized=_ASYNC_TOKEN_CACHE.invalidate,
+        )
+    return _ASYNC_BACKEND
+
+_WAIT_METRICS = WaitMetrics()
+_CURSORS = ThreadCursors()
+
+# Message + run in one request where the API supports it (RUN_START_MODE: auto | combined | separate)
+_RUN_STARTER = RunStarter(_env("RUN_START_MODE", "auto"))
+
+# Per-thread serialization + Idempotency-Key replay (TURN_STORE: memory | sqlite:<path>)
+_TURNS = TurnGuard(
+    make_turn_store(_env("TURN_STORE", "memory")),
+    result_ttl=float(_env("IDEMPOTENCY_TTL_SECONDS", "3600")),
+)
+
+# Empty threads created ahead of time so a new conversation skips POST /threads
+_THREAD_POOL = WarmThreadPool(
+    create_thread=lambda: _backend().post("/threads", {}, endpoint="create_thread_pooled").get("id"),
+    delete_thread=lambda thread_id: _backend().delete(f"/threads/{thread_id}", endpoint="delete_thread"),
+    size=int(_env("THREAD_POOL_SIZE", "4")),
+    ttl=float(_env("THREAD_POOL_TTL_SECONDS", "600")),
+)
+
+def _warm_thread() -> str | None:
+    """A pooled thread for a new conversation, or None to let the run request create one."""
+    if not _RUN_STARTER.combined:
+        return _THREAD_POOL.take()
+    # Thread+run in one request already skips POST /threads: pooled threads would only
+    # add a create and a delete each, so the pool is retired (off the request path)
+    if _THREAD_POOL.enabled and not _THREAD_POOL.stopped:
+        threading.Thread(target=_THREAD_POOL.stop, kwargs={"drain": True},
+                         name="warm-thread-pool-retire", daemon=True).start()
+    return None
+
+# Runs nobody waits for any more are cancelled: deadline passed, client gone, worker exiting
+_CANCELLER = RunCanceller(enabled=_env("CANCEL_RUNS", "true").lower() == "true")
+# How long a run we cancelled may hold its thread while "cancelling" before others ignore it
+_CANCEL_LEASE = float(_env("CANCEL_LEASE_SECONDS", "30"))
+
+def _cancel_on_shutdown() -> None:
+    in_flight = _CANCELLER.stats()["in_flight"]
+    if in_flight:
+        # Sync client even when the runs came from the async routes: the loop may be gone
+        cancelled = _CANCELLER.cancel_in_flight(_backend(), timeout=float(_env("SHUTDOWN_CANCEL_SECONDS", "5")))
+        logging.warning("Worker shutting down: cancelled %d of %d in-flight run(s)", cancelled, in_flight)
+
+def _install_shutdown_hooks() -> None:
+    """Cancel in-flight runs at interpreter exit and on SIGTERM (scale-in, redeploy)."""
+    atexit.register(_cancel_on_shutdown)
+    if threading.current_thread() is not threading.main_thread():
+        return  # signal handlers can only be set from the main thread
+    previous = signal.getsignal(signal.SIGTERM)
+    if previous is signal.SIG_IGN:
+        return
+
+    def on_sigterm(signum, frame):
+        _cancel_on_shutdown()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+_install_shutdown_hooks()
+
+# Local handlers for function tools: a run in requires_action gets all outputs in one submit
+# (TOOL_HANDLERS: comma-separated modules exposing register(dispatcher))
+_TOOLS = ToolDispatcher(
+    max_workers=int(_env("TOOL_DISPATCH_WORKERS", "8")),
+    timeout=float(_env("TOOL_TIMEOUT_SECONDS", "30")),
+)
+load_handlers(_TOOLS, _env("TOOL_HANDLERS", ""))
+
+# Submit-and-poll turns (/api/chat/jobs): one background poller for all runs (JOB_STORE: memory | sqlite:<path>)
+_JOBS = make_job_store(_env("JOB_STORE", "memory"))
+_JOB_TTL = float(_env("JOB_TTL_SECONDS", "86400"))
+_JOB_POLLER = RunPoller(
+    _JOBS,
+    fetch_run=lambda thread_id, run_id: _backend().get(f"/threads/{thread_id}/runs/{run_id}", endpoint="get_run"),
+    on_done=lambda job, run: _finish_job(job, run),
+    on_action=lambda job, run: _TOOLS.submit(_backend(), job["thread_id"], run),
+    ttl=_JOB_TTL,
+    concurrency=int(_env("JOB_POLL_CONCURRENCY", "8")),
+    batch_window=float(_env("JOB_POLL_BATCH_WINDOW_SECONDS", "0.05")),
+    metrics=_WAIT_METRICS,
+)
+
+# Spans per stage (TRACING_EXPORTER: "" | console | azure_monitor); stage breakdown in a
+# Server-Timing response header when TRACE_RESPONSE_HEADER=true
+tracing.configure(_env("TRACING_EXPORTER", ""))
+_TIMING_HEADER = _env("TRACE_RESPONSE_HEADER", "false").lower() == "true"
+
+def _warm_up() -> None:
+    """Build the credential, token and clients before the first request needs them."""
+    try:
+        with tracing.span("warm_up"):
+            _TOKEN_CACHE.get()
+            _backend()
+            _async_backend()
+            import azure.identity.aio  # noqa: F401  (aio credential itself binds to the request loop)
+    except Exception as e:
+        logging.warning("Warm-up failed; the first request will build the clients: %s", e)
+
+# WARMUP_ON_LOAD=true: warm up on a background thread as soon as the worker loads the app,
+# so the host can finish indexing functions while the SDKs import
+if _env("WARMUP_ON_LOAD", "true").lower() == "true":
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+# Per-turn transcripts for /api/chat and /api/chat/async (TRANSCRIPT_DIR; off when empty):
+# prompt, ids, status, stage timings, tool calls and answer, PII redacted, as rotating gzip JSONL
+_TRANSCRIPTS = transcripts.TranscriptRecorder(
+    _env("TRANSCRIPT_DIR", ""),
+    max_bytes=int(float(_env("TRANSCRIPT_MAX_MB", "10")) * 1024 * 1024),
+    keep_files=int(_env("TRANSCRIPT_KEEP_FILES", "20")),
+    queue_size=int(_env("TRANSCRIPT_QUEUE_SIZE", "10000")),
+)
+
+def _collect_timings(recording: bool = False):
+    # Transcripts keep the stages too (their tool calls are fetched on the writer thread)
+    return tracing.collect() if _TIMING_HEADER or recording else nullcontext()
+
+def _with_timings(response: func.HttpResponse, timings) -> func.HttpResponse:
+    if timings is not None and _TIMING_HEADER:
+        response.headers["Server-Timing"] = timings.server_timing()
+    return response
+
+def _json_response(payload: dict, status_code: int = 200) -> func.HttpResponse:
+    return func.HttpResponse(json.dumps(payload), status_code=status_code, mimetype="application/json")
+
+def _parse_chat_request(raw_body: bytes | None, headers):
+    """Shared request handling for the chat routes.
+    Returns (prompt, thread_id, waiter, None) or (None, None, None, (status_code, error_body)).
     """
-    # --- robust JSON parsing (fixes silent=True issue) ---
+    # --- robust JSON parsing: tolerate empty / invalid bodies ---
     body = {}
     try:
-        body = req.get_json()  # no 'silent' parameter
-    except ValueError:
-        try:
-            raw = (req.get_body() or b"").decode("utf-8")
-            if raw.strip():
-                body = json.loads(raw)
-        except Exception:
-            body = {}
+        raw = (raw_body or b"").decode("utf-8")
+        if raw.strip():
+            body = json.loads(raw)
+    except Exception:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
 
     prompt = (body.get("prompt") or "").strip()
     thread_id = (body.get("thread_id") or "").strip()
 
-    # Optional: tiny API key gate for PoC
+    key_error = _check_api_key(headers)
+    if key_error is not None:
+        return None, None, None, key_error
+
+    if not prompt:
+        return None, None, None, (400, {"error": "Provide 'prompt'. Optional: 'thread_id'."})
+
+    options = body.get("options") if isinstance(body.get("options"), dict) else None
+    try:
+        policy = WaitPolicy.from_env().with_options(options)
+    except ValueError as e:
+        return None, None, None, (400, {"error": str(e)})
+    waiter = make_waiter(_env("RUN_WAITER", "backoff"), policy, metrics=_WAIT_METRICS)
+    return prompt, thread_id, waiter, None
+
+def _check_api_key(headers) -> tuple[int, str] | None:
+    """Optional: tiny API key gate for PoC (REQUIRE_X_API_KEY); an error tuple when it rejects."""
     require_key = (_env("REQUIRE_X_API_KEY", "false").lower() == "true")
     if require_key:
-        provided = req.headers.get("x-api-key", "")
+        provided = headers.get("x-api-key", "")
         expected = _env("X_API_KEY", "")
-        if not expected or provided != expected:
-            return func.HttpResponse("Missing or invalid x-api-key", status_code=401)
+        if not expected or not hmac.compare_digest(provided.encode("utf-8"), expected.encode("utf-8")):
+            return 401, "Missing or invalid x-api-key"
+    return None
 
-    if not prompt:
-        return func.HttpResponse(
-            json.dumps({"error": "Provide 'prompt'. Optional: 'thread_id'."}),
-            status_code=400, mimetype="application/json"
-        )
+def _error_response(error: tuple[int, dict | str]) -> func.HttpResponse:
+    status_code, payload = error
+    if isinstance(payload, str):
+        return func.HttpResponse(payload, status_code=status_code)
+    return _json_response(payload, status_code)
 
-    base = _env("PROJECT_BASE", required=True).rstrip("/")
-    api_version = _env("API_VERSION", "v1")
-    agent_id = _env("AGENT_ID", required=True)
+def _idempotency_key(headers) -> str | None:
+    return (headers.get("idempotency-key") or "").strip() or None
 
-    token = _bearer_token()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
+def _transcript_entry(route: str, raw_body: bytes | None, response: func.HttpResponse, timings, turn: dict) -> dict:
+    """One transcript entry for a chat turn (built on the recorder's writer thread)."""
+    def load(raw) -> dict:
+        try:
+            value = json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+        return value if isinstance(value, dict) else {}
+
+    request, result = load(raw_body), load(response.get_body())
+    steps = turn.get("steps")
+    if steps is None and result.get("run_id"):
+        try:
+            steps = fetch_run_steps(_backend().get, result["thread_id"], result["run_id"])
+        except Exception:
+            logging.warning("Could not fetch run steps for the transcript", exc_info=True)
+    return {
+        "route": route,
+        "http_status": response.status_code,
+        "thread_id": result.get("thread_id") or request.get("thread_id"),
+        "run_id": result.get("run_id"),
+        "status": result.get("status") or "error",
+        "prompt": (request.get("prompt") or "").strip(),
+        "answer": result.get("answer"),
+        "error": result.get("error"),
+        "stages": timings.as_dict() if timings is not None else {},
+        "tool_calls": transcripts.tool_calls(steps or []),
     }
 
+def _run_lease(waiter) -> float:
+    # How long other requests treat our run as active if this worker dies mid-turn
+    return waiter.policy.deadline + 60.0
+
+def _complete_turn(backend: BackendClient, thread_id: str, run: dict, after: str | None, waiter,
+                   dispatch: bool = True) -> dict:
+    """Poll a started run to a terminal state and build the /api/chat result.
+    With `dispatch`, tool calls the run requires are answered by the local handlers."""
+    run_id = run.get("id")
+    tracing.annotate({"agents.thread_id": thread_id, "agents.run_id": run_id})
+
+    # 4) Poll until terminal (fast first poll, then capped backoff)
+    with tracing.span("run_wait"):
+        run = waiter.wait(run, lambda: backend.get(
+            f"/threads/{thread_id}/runs/{run_id}",
+            endpoint="get_run"
+        ), on_action=(lambda r: _TOOLS.submit(backend, thread_id, r)) if dispatch else None)
+    return _turn_result(backend, thread_id, run, after)
+
+def _turn_result(backend: BackendClient, thread_id: str, run: dict, after: str | None) -> dict:
+    """The /api/chat result for a run that has left the wait statuses."""
+    run_id = run.get("id")
+    status = run.get("status", "")
+
+    # 5) If completed, fetch only this run's messages and return their text
+    answer = ""
+    if status == "completed":
+        with tracing.span("answer"):
+            messages = fetch_run_messages(backend.get, thread_id, run_id, after)
+            _CURSORS.set(thread_id, messages[-1].get("id") if messages else after)
+            answer = run_assistant_text(messages, run_id)
+
+    # Tool-call spans as the backend measured them (one extra call, only when spans are exported)
+    if tracing.active():
+        try:
+            steps = fetch_run_steps(backend.get, thread_id, run_id)
+            tracing.record_tool_steps(steps)
+            transcripts.note(steps=steps)
+        except Exception:
+            logging.warning("Could not fetch run steps for tracing", exc_info=True)
+
+    return {
+        "thread_id": thread_id,
+        "run_id": run_id,
+        "status": status,
+        "answer": answer
+    }
+
+def _other_run_waiter(backend: BackendClient, thread_id: str, waiter):
+    """`wait_for` of TurnGuard.claim_thread: poll a run another worker holds the thread with."""
+    def wait_for(other: str) -> None:
+        try:
+            waiter.wait({"id": other, "status": "in_progress"}, lambda: backend.get(
+                f"/threads/{thread_id}/runs/{other}",
+                endpoint="get_run"
+            ))
+        except TimeoutError:
+            raise ThreadBusyError(thread_id, other) from None
+    return wait_for
+
+def _other_run_waiter_async(backend: AsyncBackendClient, thread_id: str, waiter):
+    """`_other_run_waiter` for the async routes."""
+    async def wait_for(other: str) -> None:
+        try:
+            await waiter.wait_async({"id": other, "status": "in_progress"}, lambda: backend.get(
+                f"/threads/{thread_id}/runs/{other}",
+                endpoint="get_run"
+            ))
+        except TimeoutError:
+            raise ThreadBusyError(thread_id, other) from None
+    return wait_for
+
+def _start_turn(backend: BackendClient, agent_id: str, prompt: str, thread_id: str, key: str | None,
+                waiter) -> tuple[str, dict, str | None]:
+    """Steps 1-3 of a turn (caller holds the thread): returns (thread_id, run, message cursor)."""
+    # 1) Claim the thread across workers; a run another worker started on it must finish first
+    requested = thread_id
+    claim = _TURNS.claim_thread(requested, _run_lease(waiter), waiter.policy.deadline,
+                                _other_run_waiter(backend, thread_id, waiter))
     try:
-        # 1) Create a thread if not supplied
-        if not thread_id:
-            r = requests.post(
-                f"{base}/threads",
-                params={"api-version": api_version},
-                headers=headers,
-                json={}
-            )
-            r.raise_for_status()
-            thread_id = r.json().get("id")
-            if not thread_id:
-                raise RuntimeError("No thread_id returned from create thread")
-
-        # 2) Add the user message
-        r = requests.post(
-            f"{base}/threads/{thread_id}/messages",
-            params={"api-version": api_version},
-            headers=headers,
-            json={"role": "user", "content": prompt}
-        )
-        r.raise_for_status()
-
-        # 3) Run the agent
-        r = requests.post(
-            f"{base}/threads/{thread_id}/runs",
-            params={"api-version": api_version},
-            headers=headers,
-            json={"assistant_id": agent_id}
-        )
-        r.raise_for_status()
-        run = r.json()
+        # 2) Use a warm thread if none was supplied (None: the run request creates one)
+        thread_id = thread_id or _warm_thread()
+        after = _CURSORS.get(thread_id) if thread_id else None
+
+        # 3) Post the user message and run the agent (one request when the API allows)
+        thread_id, run, user_message_id = _RUN_STARTER.start(backend, agent_id, prompt, thread_id)
+    except BaseException:
+        _TURNS.release(requested, claim)
+        raise
+    _TURNS.started(key, thread_id, run.get("id"), _run_lease(waiter))
+    return thread_id, run, user_message_id or after
+
+def _run_turn(backend: BackendClient, agent_id: str, prompt: str, thread_id: str, key: str | None, waiter) -> dict:
+    """One turn, serialized with any other turn on the same thread."""
+    with _TURNS.hold(thread_id, waiter.policy.deadline):
+        thread_id, run, after = _start_turn(backend, agent_id, prompt, thread_id, key, waiter)
         run_id = run.get("id")
-        status = run.get("status", "queued")
-
-        # 4) Poll until terminal
-        deadline = time.time() + 120  # ~2 minutes
-        while status in ("queued", "in_progress", "requires_action"):
-            if time.time() > deadline:
-                raise TimeoutError("Run polling timed out")
-            time.sleep(0.9)
-            rr = requests.get(
-                f"{base}/threads/{thread_id}/runs/{run_id}",
-                params={"api-version": api_version},
-                headers=headers
-            )
-            rr.raise_for_status()
-            status = rr.json().get("status", "")
-
-        # 5) If completed, fetch messages and return latest assistant text
-        answer = ""
-        if status == "completed":
-            mm = requests.get(
-                f"{base}/threads/{thread_id}/messages",
-                params={"api-version": api_version},
-                headers=headers
-            )
-            mm.raise_for_status()
-            answer = _latest_assistant_text(mm.json())
-
-        result = {
-            "thread_id": thread_id,
-            "run_id": run_id,
-            "status": status,
-            "answer": answer
-        }
-        return func.HttpResponse(json.dumps(result), status_code=200, mimetype="application/json")
 
+        try:
+            with _CANCELLER.track(thread_id, run_id):
+                result = _complete_turn(backend, thread_id, run, after, waiter)
+        except TimeoutError:
+            # Stop the run so it frees the thread; the 504 carries the ids to resume with
+            cancelled = _CANCELLER.cancel(backend, thread_id, run_id, "timeout")
+            if cancelled:
+                _TURNS.cancelled(key, thread_id, run_id, _CANCEL_LEASE)
+            raise RunTimeoutError(thread_id, run_id, waiter.policy.deadline, cancelled) from None
+        except UnknownToolError:
+            # Nothing here can answer the run: stop it now rather than let it wait out its deadline
+            if _CANCELLER.cancel(backend, thread_id, run_id, "tool_error"):
+                _TURNS.cancelled(key, thread_id, run_id, _CANCEL_LEASE)
+            raise
+        _TURNS.finished(key, thread_id, result["run_id"], result)
+        return result
+
+def _attach_turn(backend: BackendClient, key: str, record: dict, waiter) -> dict:
+    """Retried request: wait on the run the original request started."""
+    record = _TURNS.wait_for_run(key, record)
+    if record.get("result"):
+        return record["result"]
+    thread_id, run_id = record["thread_id"], record["run_id"]
+    # No cursor: the original request may already have moved it past this run's messages
+    try:
+        # The original request answers any required action; we only wait
+        result = _complete_turn(backend, thread_id, {"id": run_id, "status": "in_progress"}, None, waiter,
+                                dispatch=False)
+    except TimeoutError:
+        # Not our run to cancel: the original request still owns it
+        raise RunTimeoutError(thread_id, run_id, waiter.policy.deadline, cancelled=False) from None
+    _TURNS.finished(key, thread_id, run_id, result)
+    return result
+
+def _finish_job(job: dict, run: dict) -> None:
+    """Poller callback: store the finished job's result (or timeout), then call its webhook."""
+    backend = _backend()
+    thread_id, run_id = job["thread_id"], job["run_id"]
+    _CANCELLER.discard(run_id)
+    if run.get("status") == "timeout":
+        cancelled = _CANCELLER.cancel(backend, thread_id, run_id, "timeout")
+        if cancelled:
+            _TURNS.cancelled(None, thread_id, run_id, _CANCEL_LEASE)
+        error = RunTimeoutError(thread_id, run_id, job["_deadline"], cancelled).payload()
+        job = _JOBS.update(job["id"], _JOB_TTL, status="timeout", error=error)
+    elif run.get("status") == "action_failed":
+        if _CANCELLER.cancel(backend, thread_id, run_id, "tool_error"):
+            _TURNS.cancelled(None, thread_id, run_id, _CANCEL_LEASE)
+        error = {"error": run["last_error"]["message"], "thread_id": thread_id, "run_id": run_id}
+        job = _JOBS.update(job["id"], _JOB_TTL, status="failed", error=error)
+    else:
+        result = _turn_result(backend, thread_id, run, job["_after"])
+        _TURNS.finished(None, thread_id, run_id, result)
+        job = _JOBS.update(job["id"], _JOB_TTL, status=result["status"], result=result)
+
+    if job and job.get("_callback_url"):
+        delivery = post_callback(job["_callback_url"], public_job(job), _env("JOB_CALLBACK_SECRET", ""),
+                                 allow_private=_env("JOB_CALLBACK_ALLOW_PRIVATE", "false").lower() == "true")
+        _JOBS.update(job["id"], _JOB_TTL, callback=delivery)
+
+def _parse_callback_url(raw_body: bytes | None) -> tuple[str | None, str | None]:
+    """Optional "callback_url" of a job request: (url, None) or (None, error)."""
+    try:
+        body = json.loads((raw_body or b"").decode("utf-8") or "{}")
+    except Exception:
+        return None, None
+    url = (body.get("callback_url") or "").strip() if isinstance(body, dict) else ""
+    if not url:
+        return None, None
+    hosts = [h for h in _env("JOB_CALLBACK_HOSTS", "").split(",") if h.strip()]
+    if not hosts:
+        return None, "'callback_url' is not enabled (JOB_CALLBACK_HOSTS is not set)"
+    error = callback_url_error(url, hosts, _env("JOB_CALLBACK_ALLOW_HTTP", "false").lower() == "true")
+    return (None, error) if error else (url, None)
+
+async def _complete_turn_async(backend: AsyncBackendClient, thread_id: str, run: dict, after: str | None,
+                               waiter, dispatch: bool = True) -> dict:
+    """`_complete_turn` for the async path."""
+    run_id = run.get("id")
+    tracing.annotate({"agents.thread_id": thread_id, "agents.run_id": run_id})
+
+    # 4) Poll until terminal (fast first poll, then capped backoff)
+    with tracing.span("run_wait"):
+        run = await waiter.wait_async(run, lambda: backend.get(
+            f"/threads/{thread_id}/runs/{run_id}",
+            endpoint="get_run"
+        ), on_action=(lambda r: _TOOLS.submit_async(backend, thread_id, r)) if dispatch else None)
+    status = run.get("status", "")
+
+    # 5) If completed, fetch only this run's messages and return their text
+    answer = ""
+    if status == "completed":
+        with tracing.span("answer"):
+            messages = await fetch_run_messages_async(backend.get, thread_id, run_id, after)
+            _CURSORS.set(thread_id, messages[-1].get("id") if messages else after)
+            answer = run_assistant_text(messages, run_id)
+
+    # Tool-call spans as the backend measured them (one extra call, only when spans are exported)
+    if tracing.active():
+        try:
+            steps = await fetch_run_steps_async(backend.get, thread_id, run_id)
+            tracing.record_tool_steps(steps)
+            transcripts.note(steps=steps)
+        except Exception:
+            logging.warning("Could not fetch run steps for tracing", exc_info=True)
+
+    return {
+        "thread_id": thread_id,
+        "run_id": run_id,
+        "status": status,
+        "answer": answer
+    }
+
+async def _run_turn_async(backend: AsyncBackendClient, agent_id: str, prompt: str, thread_id: str,
+                          key: str | None, waiter) -> dict:
+    """`_run_turn` for the async path."""
+    async with _TURNS.hold_async(thread_id, waiter.policy.deadline):
+        # 1) Claim the thread across workers; a run another worker started on it must finish first
+        requested = thread_id
+        claim = await _TURNS.claim_thread_async(requested, _run_lease(waiter), waiter.policy.deadline,
+                                                _other_run_waiter_async(backend, thread_id, waiter))
+        try:
+            # 2) Use a warm thread if none was supplied (None: the run request creates one)
+            thread_id = thread_id or _warm_thread()
+            after = _CURSORS.get(thread_id) if thread_id else None
+
+            # 3) Post the user message and run the agent (one request when the API allows)
+            thread_id, run, user_message_id = await _RUN_STARTER.start_async(backend, agent_id, prompt, thread_id)
+        except BaseException:
+            _TURNS.release(requested, claim)
+            raise
+        run_id = run.get("id")
+        _TURNS.started(key, thread_id, run_id, _run_lease(waiter))
+
+        try:
+            with _CANCELLER.track(thread_id, run_id):
+                result = await _complete_turn_async(backend, thread_id, run, user_message_id or after, waiter)
+        except TimeoutError:
+            cancelled = await _CANCELLER.cancel_async(backend, thread_id, run_id, "timeout")
+            if cancelled:
+                _TURNS.cancelled(key, thread_id, run_id, _CANCEL_LEASE)
+            raise RunTimeoutError(thread_id, run_id, waiter.policy.deadline, cancelled) from None
+        except UnknownToolError:
+            if await _CANCELLER.cancel_async(backend, thread_id, run_id, "tool_error"):
+                _TURNS.cancelled(key, thread_id, run_id, _CANCEL_LEASE)
+            raise
+        except asyncio.CancelledError:
+            # Invocation cancelled (client disconnected): nobody will read this run's answer
+            _CANCELLER.cancel_soon(backend, thread_id, run_id, "disconnect")
+            _TURNS.cancelled(key, thread_id, run_id, _CANCEL_LEASE)
+            raise
+        _TURNS.finished(key, thread_id, result["run_id"], result)
+        return result
+
+async def _attach_turn_async(backend: AsyncBackendClient, key: str, record: dict, waiter) -> dict:
+    """`_attach_turn` for the async path."""
+    record = await _TURNS.wait_for_run_async(key, record)
+    if record.get("result"):
+        return record["result"]
+    thread_id, run_id = record["thread_id"], record["run_id"]
+    try:
+        result = await _complete_turn_async(backend, thread_id, {"id": run_id, "status": "in_progress"}, None,
+                                            waiter, dispatch=False)
+    except TimeoutError:
+        raise RunTimeoutError(thread_id, run_id, waiter.policy.deadline, cancelled=False) from None
+    _TURNS.finished(key, thread_id, run_id, result)
+    return result
+
+# ---------------- function app ----------------
+
+app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
+
+@app.route(route="chat", methods=["POST"])
+def chat(req: func.HttpRequest) -> func.HttpResponse:
+    """POST /api/chat
+    Body: {"prompt":"...", "thread_id":"thread_...(optional)", "options":{...}(optional)}
+    Options: deadline_seconds, initial_poll_seconds, max_poll_seconds, backoff_multiplier
+    (finite numbers; poll intervals below RUN_POLL_CLIENT_MIN_SECONDS are raised to it)
+    Header: Idempotency-Key (optional) — a retry with the same key returns the original turn's result
+    Returns: {"thread_id","run_id","status","answer"}
+    409 while another turn holds the thread past the deadline; 422 when a key is reused for another prompt
+    504 {"error","thread_id","run_id","status"} when the run misses the deadline; the run is cancelled
+    (CANCEL_RUNS=true, status "cancelling") so the thread frees up for the next turn
+    Function tools the run requires are answered by the local handlers (TOOL_HANDLERS); a tool
+    without one cancels the run: 500 {"error","tools","thread_id","run_id"}
+    Response header Server-Timing (TRACE_RESPONSE_HEADER=true): time per stage
+    """
+    with _collect_timings(_TRANSCRIPTS.enabled) as timings, _TRANSCRIPTS.turn() as turn, \
+            tracing.span("chat", {"http.route": "/api/chat"}) as root:
+        response = _chat(req)
+        root.set_attribute("http.response.status_code", response.status_code)
+    if turn is not None:
+        _TRANSCRIPTS.record(lambda: _transcript_entry("/api/chat", req.get_body(), response, timings, turn))
+    return _with_timings(response, timings)
+
+def _chat(req: func.HttpRequest) -> func.HttpResponse:
+    prompt, thread_id, waiter, error = _parse_chat_request(req.get_body(), req.headers)
+    if error is not None:
+        return _error_response(error)
+
+    agent_id = _env("AGENT_ID", required=True)
+    backend = _backend()
+    key = _idempotency_key(req.headers)
+    import requests  # loaded by BackendClient; only binds the name
+
+    try:
+        # 0) A retry with a known Idempotency-Key replays or attaches instead of starting a run
+        record = _TURNS.claim(key, thread_id, prompt)
+        if record is None:
+            try:
+                result = _run_turn(backend, agent_id, prompt, thread_id, key, waiter)
+            except Exception:
+                _TURNS.abandon(key)
+                raise
+        elif record.get("result"):
+            result = record["result"]
+        else:
+            result = _attach_turn(backend, key, record, waiter)
+        return _json_response(result)
+
+    except RunTimeoutError as e:
+        return _json_response(e.payload(), 504)
+    except UnknownToolError as e:
+        return _json_response(e.payload(), 500)
+    except ThreadBusyError as e:
+        return _json_response({"error": str(e), "thread_id": e.thread_id, "run_id": e.run_id}, 409)
+    except IdempotencyConflictError as e:
+        return _json_response({"error": str(e)}, 422)
     except requests.HTTPError as e:
         logging.exception("HTTP error calling Agent backend")
         text = e.response.text if e.response is not None else str(e)
         code = e.response.status_code if e.response is not None else 500
-        return func.HttpResponse(
-            json.dumps({"error": f"Backend HTTP {code}", "details": text}),
-            status_code=500, mimetype="application/json"
-        )
+        return _json_response({"error": f"Backend HTTP {code}", "details": text}, 500)
     except Exception as e:
         logging.exception("Unhandled error")
-        return func.HttpResponse(
-            json.dumps({"error": str(e)}),
-            status_code=500, mimetype="application/json"
-        )
+        return _json_response({"error": str(e)}, 500)
+
+
+@app.route(route="chat/async", methods=["POST"])
+async def chat_async(req: func.HttpRequest) -> func.HttpResponse:
+    """POST /api/chat/async
+    Same contract as /api/chat, but awaits the backend instead of blocking a
+    worker thread, so one instance can keep many turns in flight. If the client
+    disconnects mid-turn the run is cancelled.
+    """
+    with _collect_timings(_TRANSCRIPTS.enabled) as timings, _TRANSCRIPTS.turn() as turn, \
+            tracing.span("chat_async", {"http.route": "/api/chat/async"}) as root:
+        response = await _chat_async(req)
+        root.set_attribute("http.response.status_code", response.status_code)
+    if turn is not None:
+        _TRANSCRIPTS.record(lambda: _transcript_entry("/api/chat/async", req.get_body(), response, timings, turn))
+    return _with_timings(response, timings)
+
+async def _chat_async(req: func.HttpRequest) -> func.HttpResponse:
+    prompt, thread_id, waiter, error = _parse_chat_request(req.get_body(), req.headers)
+    if error is not None:
+        return _error_response(error)
+
+    agent_id = _env("AGENT_ID", required=True)
+    backend = _async_backend()
+    key = _idempotency_key(req.headers)
+
+    try:
+        # 0) A retry with a known Idempotency-Key replays or attaches instead of starting a run
+        record = _TURNS.claim(key, thread_id, prompt)
+        if record is None:
+            try:
+                result = await _run_turn_async(backend, agent_id, prompt, thread_id, key, waiter)
+            except Exception:
+                _TURNS.abandon(key)
+                raise
+        elif record.get("result"):
+            result = record["result"]
+        else:
+            result = await _attach_turn_async(backend, key, record, waiter)
+        return _json_response(result)
+
+    except RunTimeoutError as e:
+        return _json_response(e.payload(), 504)
+    except UnknownToolError as e:
+        return _json_response(e.payload(), 500)
+    except ThreadBusyError as e:
+        return _json_response({"error": str(e), "thread_id": e.thread_id, "run_id": e.run_id}, 409)
+    except IdempotencyConflictError as e:
+        return _json_response({"error": str(e)}, 422)
+    except BackendHTTPError as e:
+        logging.exception("HTTP error calling Agent backend")
+        return _json_response({"error": f"Backend HTTP {e.status}", "details": e.text}, 500)
+    except Exception as e:
+        logging.exception("Unhandled error")
+        return _json_response({"error": str(e)}, 500)
+
+
+async def _chat_stream(req) -> tuple[tuple[int, dict | str] | None, AsyncIterator[bytes] | None]:
+    """POST /api/chat/stream (only with HTTP_STREAMING=true, see the end of this section)
+    Same body as /api/chat. Responds with server-sent events as the run progresses:
+      thread   {"thread_id"}
+      run      {"run_id","status"}            on every status change
+      progress {"stage","tool"}               stage: validating | updating | calling_tool
+      delta    {"text"}                       assistant text as it is generated
+      done     {"thread_id","run_id","status","answer"}
+      error    {"error", "details"?}    a missed deadline also carries thread_id, run_id and status
+    Function tool calls (requires_action) are answered by the TOOL_HANDLERS, as on /api/chat.
+    The run is cancelled when the deadline passes, a function tool has no handler ("error" then
+    carries "tools"), or the client disconnects before "done".
+    Returns (error, None) for a rejected request, else (None, the event stream).
+    """
+    prompt, thread_id, waiter, error = _parse_chat_request(await req.body(), req.headers)
+    if error is not None:
+        return error, None
+
+    agent_id = _env("AGENT_ID", required=True)
+    backend = _async_backend()
+
+    async def events():
+        ids = {"thread_id": thread_id, "run_id": None}
+        finished, cancelling, claim = False, False, None
+        try:
+            # Queue behind other turns on the same thread (a pooled thread is ours alone)
+            with tracing.span("chat_stream", {"http.route": "/api/chat/stream"}):
+                async with _TURNS.hold_async(thread_id, waiter.policy.deadline):
+                    claim = await _TURNS.claim_thread_async(thread_id, _run_lease(waiter), waiter.policy.deadline,
+                                                            _other_run_waiter_async(backend, thread_id, waiter))
+                    async for event, data in stream_turn(
+                            backend, agent_id, prompt, thread_id or _warm_thread(), waiter.policy.deadline,
+                            starter=_RUN_STARTER,
+                            on_action=lambda t, run: _TOOLS.submit_stream(backend, t, run)):
+                        if event == "thread":
+                            ids["thread_id"] = data["thread_id"]
+                        elif event == "run" and ids["run_id"] is None:
+                            ids["run_id"] = data["run_id"]
+                            _CANCELLER.add(ids["thread_id"], ids["run_id"])
+                            _TURNS.started(None, ids["thread_id"], ids["run_id"], _run_lease(waiter))
+                        elif event == "done":
+                            finished = True
+                        yield format_sse(event, data)
+        except TimeoutError:
+            cancelled = await _CANCELLER.cancel_async(backend, ids["thread_id"], ids["run_id"], "timeout")
+            cancelling = cancelled
+            yield format_sse("error", RunTimeoutError(ids["thread_id"], ids["run_id"], waiter.policy.deadline,
+                                                      cancelled).payload())
+        except (asyncio.CancelledError, GeneratorExit):
+            if not finished:
+                _CANCELLER.cancel_soon(backend, ids["thread_id"], ids["run_id"], "disconnect")
+                cancelling = True  # as on /api/chat/async: nobody reads this run any more
+            raise
+        except UnknownToolError as e:
+            # Nobody can answer the run: cancel it rather than leave the thread blocked until it expires
+            cancelling = await _CANCELLER.cancel_async(backend, ids["thread_id"], ids["run_id"], "tool_error")
+            yield format_sse("error", e.payload())
+        except ThreadBusyError as e:
+            yield format_sse("error", {"error": str(e), "thread_id": e.thread_id, "run_id": e.run_id})
+        except BackendHTTPError as e:
+            logging.exception("HTTP error calling Agent backend")
+            yield format_sse("error", {"error": f"Backend HTTP {e.status}", "details": e.text})
+        except Exception as e:
+            logging.exception("Unhandled error")
+            yield format_sse("error", {"error": str(e)})
+        finally:
+            _CANCELLER.discard(ids["run_id"])
+            _TURNS.release(thread_id, claim)  # no-op once the run replaced the claim
+            if cancelling:
+                _TURNS.cancelled(None, ids["thread_id"], ids["run_id"], _CANCEL_LEASE)
+            elif finished:
+                _TURNS.release(ids["thread_id"], ids["run_id"])
+
+    return None, events()
+
+# The route's signature needs the FastAPI HTTP extension, which costs ~0.9s of import and
+# switches the whole app to HTTP streams: only apps that serve /api/chat/stream load it
+if _env("HTTP_STREAMING", "false").lower() == "true":
+    register_stream_route(app, _chat_stream)
+
+
+@app.route(route="chat/jobs", methods=["POST"])
+def chat_jobs(req: func.HttpRequest) -> func.HttpResponse:
+    """POST /api/chat/jobs
+    Same body as /api/chat, plus optional "callback_url". Returns as soon as the run is created:
+    202 {"id","status","thread_id","run_id","created_at","updated_at","result":null,"error":null,"callback":null}
+    with Location: /api/chat/jobs/{id}. A background poller follows the run; when it ends the job
+    gets "result" (the /api/chat response) and is POSTed to callback_url, signed with
+    X-Job-Signature when JOB_CALLBACK_SECRET is set. callback_url must be https on a host listed in
+    JOB_CALLBACK_HOSTS (comma-separated, "*.example.com" for subdomains); IP literals, redirects and
+    hosts resolving to private addresses (unless JOB_CALLBACK_ALLOW_PRIVATE=true) are refused.
+    """
+    with _collect_timings() as timings, tracing.span("chat_jobs", {"http.route": "/api/chat/jobs"}) as root:
+        response = _chat_jobs(req)
+        root.set_attribute("http.response.status_code", response.status_code)
+    return _with_timings(response, timings)
+
+def _chat_jobs(req: func.HttpRequest) -> func.HttpResponse:
+    prompt, thread_id, waiter, error = _parse_chat_request(req.get_body(), req.headers)
+    if error is not None:
+        return _error_response(error)
+    callback_url, callback_error = _parse_callback_url(req.get_body())
+    if callback_error:
+        return _json_response({"error": callback_error}, 400)
+
+    agent_id = _env("AGENT_ID", required=True)
+    backend = _backend()
+    import requests  # loaded by BackendClient; only binds the name
+
+    try:
+        with _TURNS.hold(thread_id, waiter.policy.deadline):
+            thread_id, run, after = _start_turn(backend, agent_id, prompt, thread_id, None, waiter)
+        job = new_job(thread_id, run.get("id"), run.get("status", "queued"), waiter.policy.deadline, after,
+                      callback_url)
+        _JOBS.create(job, _JOB_TTL)
+        _CANCELLER.add(thread_id, job["run_id"])
+        _JOB_POLLER.watch(job, waiter.delays(), waiter.policy.deadline)
+
+    except ThreadBusyError as e:
+        return _json_response({"error": str(e), "thread_id": e.thread_id, "run_id": e.run_id}, 409)
+    except requests.HTTPError as e:
+        logging.exception("HTTP error calling Agent backend")
+        text = e.response.text if e.response is not None else str(e)
+        code = e.response.status_code if e.response is not None else 500
+        return _json_response({"error": f"Backend HTTP {code}", "details": text}, 500)
+    except Exception as e:
+        logging.exception("Unhandled error")
+        return _json_response({"error": str(e)}, 500)
+
+    response = _json_response(public_job(job), 202)
+    response.headers["Location"] = f"/api/chat/jobs/{job['id']}"
+    return response
+
+
+@app.route(route="chat/jobs/{job_id}", methods=["GET"])
+def chat_job(req: func.HttpRequest) -> func.HttpResponse:
+    """GET /api/chat/jobs/{job_id}
+    Returns the job. "status" follows the run (queued, in_progress, requires_action, ...) until it
+    ends as completed, failed, cancelled, expired, incomplete or timeout (deadline passed; "error"
+    then holds the /api/chat 504 body). 404 for unknown or expired jobs (JOB_TTL_SECONDS).
+    Header: x-api-key when REQUIRE_X_API_KEY=true, as for the other chat routes.
+    """
+    key_error = _check_api_key(req.headers)
+    if key_error is not None:
+        return _error_response(key_error)
+    job = _JOBS.get(req.route_params.get("job_id") or "")
+    if job is None:
+        return _json_response({"error": "Job not found"}, 404)
+    return _json_response(public_job(job))
+
+
+@app.route(route="metrics", methods=["GET"])
+def metrics(req: func.HttpRequest) -> func.HttpResponse:
+    """GET /api/metrics
+    Returns in-process counters for this worker.
+    Header: x-api-key when REQUIRE_X_API_KEY=true, as for the chat routes.
+    """
+    key_error = _check_api_key(req.headers)
+    if key_error is not None:
+        return _error_response(key_error)
+    result = {
+        "token": _TOKEN_CACHE.stats(),
+        "backend": _BACKEND.stats() if _BACKEND else {},
+        "async_token": _ASYNC_TOKEN_CACHE.stats(),
+        "async_backend": _ASYNC_BACKEND.stats() if _ASYNC_BACKEND else {},
+        "runs": _WAIT_METRICS.stats(),
+        "thread_pool": _THREAD_POOL.stats(),
+        "run_start": _RUN_STARTER.stats(),
+        "turns": _TURNS.stats(),
+        "cancellations": _CANCELLER.stats(),
+        "jobs": _JOB_POLLER.stats(),
+        "tools": _TOOLS.stats(),
+        "transcripts": _TRANSCRIPTS.stats(),
+    }
+    return _json_response(result)
+
+
+@app.warm_up_trigger("warmup")
+def warmup(warmup_context: func.Context) -> None:
+    """Premium / Elastic Premium: runs on each new instance before it takes traffic."""
+    _warm_up()
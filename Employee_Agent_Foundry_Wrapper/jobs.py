@@ -0,0 +1,426 @@
+import hmac
+import json
+import time
+import uuid
+import heapq
+import socket
+import hashlib
+import logging
+import sqlite3
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+from urllib.parse import urlsplit
+
+from run_waiter import WAIT_STATUSES, WaitMetrics
+
+# ---------------- job records ----------------
+
+def new_job(thread_id: str, run_id: str, status: str, deadline: float, after: str | None = None,
+            callback_url: str | None = None, clock: Callable[[], float] = time.time) -> dict:
+    """A job for a run that was just started. Keys starting with "_" never leave the worker."""
+    now = clock()
+    return {
+        "id": f"job_{uuid.uuid4().hex}",
+        "status": status,
+        "thread_id": thread_id,
+        "run_id": run_id,
+        "created_at": now,
+        "updated_at": now,
+        "result": None,
+        "error": None,
+        "callback": None,
+        "_deadline": deadline,
+        "_after": after,
+        "_callback_url": callback_url,
+    }
+
+
+def public_job(job: dict) -> dict:
+    return {k: v for k, v in job.items() if not k.startswith("_")}
+
+# ---------------- stores ----------------
+
+class MemoryJobStore:
+    """Job records for this worker process only (GET must reach the worker that took the job)."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._jobs: dict[str, tuple[float, dict]] = {}
+
+    def create(self, job: dict, ttl: float) -> None:
+        with self._lock:
+            now = self._clock()
+            for job_id in [j for j, (expires, _) in self._jobs.items() if expires <= now]:
+                del self._jobs[job_id]
+            self._jobs[job["id"]] = (now + ttl, dict(job))
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None or entry[0] <= self._clock():
+                return None
+            return dict(entry[1])
+
+    def update(self, job_id: str, ttl: float, **fields) -> dict | None:
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            now = self._clock()
+            job = {**entry[1], **fields, "updated_at": now}
+            self._jobs[job_id] = (now + ttl, job)
+            return dict(job)
+
+
+class SqliteJobStore:
+    """`MemoryJobStore` in a SQLite file, so any worker on the host can answer GET."""
+
+    SCHEMA = "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)"
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(self.SCHEMA)
+
+    def create(self, job: dict, ttl: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._db.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+            self._db.execute("INSERT INTO jobs VALUES (?, ?, ?)", (job["id"], json.dumps(job), now + ttl))
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT record FROM jobs WHERE id = ? AND expires_at > ?",
+                                   (job_id, self._clock())).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def update(self, job_id: str, ttl: float, **fields) -> dict | None:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None:
+                    return None
+                now = self._clock()
+                job = {**json.loads(row[0]), **fields, "updated_at": now}
+                self._db.execute("UPDATE jobs SET record = ?, expires_at = ? WHERE id = ?",
+                                 (json.dumps(job), now + ttl, job_id))
+                return job
+            finally:
+                self._db.execute("COMMIT")
+
+
+def make_job_store(spec: str):
+    """JOB_STORE: "memory" (default) or "sqlite:<path>"."""
+    if spec == "memory":
+        return MemoryJobStore()
+    if spec.startswith("sqlite:"):
+        return SqliteJobStore(spec[len("sqlite:"):])
+    raise RuntimeError(f"Unknown JOB_STORE '{spec}' (expected 'memory' or 'sqlite:<path>')")
+
+# ---------------- run poller ----------------
+
+class RunPoller:
+    """One background poller for every job's run, instead of a blocked request per run.
+
+    - `watch` schedules a run; each run keeps its own backoff (`delays`) and deadline.
+    - The poller thread wakes for the earliest due check and takes every run due
+      within `batch_window` of it as one batch, checked `concurrency` at a time
+      over the shared keep-alive client.
+    - Status changes go to the store; a run that leaves the wait statuses, or
+      passes its deadline (status "timeout"), is handed to `on_done(job, run)`
+      on a separate pool, so slow answers or webhooks never hold up the sweep.
+    - With `on_action`, a run in `requires_action` is handed to it on that pool
+      (it submits the tool outputs and returns the updated run); if it raises,
+      the job finishes with status "action_failed".
+    - An error while advancing one job is logged and that job is polled again
+      later; it never stops the sweep, and `watch` restarts a poller thread
+      that died anyway.
+    """
+
+    def __init__(self,
+                 store,
+                 fetch_run: Callable[[str, str], dict],
+                 on_done: Callable[[dict, dict], None],
+                 on_action: Callable[[dict, dict], dict] | None = None,
+                 ttl: float = 86400.0,
+                 concurrency: int = 8,
+                 batch_window: float = 0.05,
+                 metrics: WaitMetrics | None = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.store = store
+        self._fetch_run = fetch_run
+        self._on_done = on_done
+        self._on_action = on_action
+        self.ttl = ttl
+        self.concurrency = max(1, concurrency)
+        self.batch_window = max(0.0, batch_window)
+        self.metrics = metrics
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._due: list[tuple[float, int, dict]] = []  # (due, seq, entry), earliest first
+        self._seq = 0
+        self._thread: threading.Thread | None = None
+        self._workers: ThreadPoolExecutor | None = None    # status checks
+        self._finishers: ThreadPoolExecutor | None = None  # on_done: answers, webhooks
+        self._stopped = False
+
+        self.sweeps = 0
+        self.checks = 0
+        self.largest_batch = 0
+        self.finished = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def watch(self, job: dict, delays: Iterator[float], deadline: float) -> None:
+        """Poll the job's run until it finishes or `deadline` seconds pass."""
+        now = self._clock()
+        entry = {"job": job, "delays": delays, "started": now, "deadline": now + deadline,
+                 "polls": 0, "status": job["status"]}
+        with self._cond:
+            self._start()
+            self._schedule(entry, now + next(delays))
+            self._cond.notify_all()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._due.clear()
+            self._cond.notify_all()
+        for pool in (self._workers, self._finishers):
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "watching": len(self._due),
+                "sweeps": self.sweeps,
+                "checks": self.checks,
+                "checks_per_sweep": round(self.checks / self.sweeps, 2) if self.sweeps else 0.0,
+                "largest_batch": self.largest_batch,
+                "finished": self.finished,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+            }
+
+    # ---------------- internals ----------------
+
+    def _start(self) -> None:
+        if self._workers is None:
+            self._workers = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job-poll")
+            self._finishers = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job-done")
+        if self._thread is None or not self._thread.is_alive():
+            if self._thread is not None:
+                logging.error("Job poller thread died; restarting it")
+            self._thread = threading.Thread(target=self._loop, name="job-poller", daemon=True)
+            self._thread.start()
+
+    def _schedule(self, entry: dict, due: float) -> None:
+        self._seq += 1
+        heapq.heappush(self._due, (min(due, entry["deadline"]), self._seq, entry))
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._due or self._due[0][0] > self._clock()):
+                    self._cond.wait(self._due[0][0] - self._clock() if self._due else None)
+                if self._stopped:
+                    return
+                now = self._clock()
+                batch = []
+                while self._due and self._due[0][0] <= now + self.batch_window:
+                    batch.append(heapq.heappop(self._due)[2])
+                self.sweeps += 1
+                self.checks += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+            try:
+                runs = list(self._workers.map(self._check, batch))
+            except Exception:
+                logging.exception("Job poller: could not check %d run(s)", len(batch))
+                runs = [None] * len(batch)
+            for entry, run in zip(batch, runs):
+                try:
+                    self._advance(entry, run)
+                except Exception:
+                    self._failed(entry, "advance")
+
+    def _failed(self, entry: dict, stage: str) -> None:
+        """Log an unexpected error for one job and poll it again after its next delay
+        (or time it out, so a job that keeps failing still ends at its deadline)."""
+        logging.exception("Job %s: could not %s", entry["job"]["id"], stage)
+        with self._cond:
+            self.errors += 1
+        if self._clock() >= entry["deadline"]:
+            return self._finish(entry, {"status": "timeout"}, "timeout")
+        with self._cond:
+            if not self._stopped:
+                self._schedule(entry, self._clock() + next(entry["delays"]))
+                self._cond.notify_all()
+
+    def _check(self, entry: dict) -> dict | None:
+        job = entry["job"]
+        try:
+            return self._fetch_run(job["thread_id"], job["run_id"])
+        except Exception as e:
+            with self._cond:
+                self.errors += 1
+            logging.warning("Job %s: could not check run %s: %s", job["id"], job["run_id"], e)
+            return None
+
+    def _advance(self, entry: dict, run: dict | None) -> None:
+        job = entry["job"]
+        now = self._clock()
+        if run is not None:
+            entry["polls"] += 1
+            status = run.get("status", "")
+            if status not in WAIT_STATUSES:
+                return self._finish(entry, run, status)
+            if status == "requires_action" and self._on_action is not None:
+                self._finishers.submit(self._act, entry, run)
+                return
+            if status != entry["status"]:
+                entry["status"] = status
+                self.store.update(job["id"], self.ttl, status=status)
+        if now >= entry["deadline"]:
+            return self._finish(entry, {**(run or {}), "status": "timeout"}, "timeout")
+        with self._cond:
+            if not self._stopped:
+                self._schedule(entry, now + next(entry["delays"]))
+
+    def _act(self, entry: dict, run: dict) -> None:
+        try:
+            self._answer(entry, run)
+        except Exception:
+            self._failed(entry, "answer the required action")
+
+    def _answer(self, entry: dict, run: dict) -> None:
+        job = entry["job"]
+        try:
+            run = self._on_action(job, run)
+        except Exception as e:
+            logging.warning("Job %s: could not answer required action: %s", job["id"], e)
+            return self._finish(entry, {**run, "status": "action_failed",
+                                        "last_error": {"code": "action_failed", "message": str(e)}}, "action_failed")
+        status = run.get("status", "")
+        if status != entry["status"]:
+            entry["status"] = status
+            self.store.update(job["id"], self.ttl, status=status)
+        with self._cond:
+            if not self._stopped:
+                self._schedule(entry, self._clock() + next(entry["delays"]))
+                self._cond.notify_all()
+
+    def _finish(self, entry: dict, run: dict, status: str) -> None:
+        with self._cond:
+            self.finished += 1
+            if status == "timeout":
+                self.timeouts += 1
+        if self.metrics is not None:
+            self.metrics.record(entry["polls"], self._clock() - entry["started"], status)
+        self._finishers.submit(self._done, entry["job"], run)
+
+    def _done(self, job: dict, run: dict) -> None:
+        try:
+            self._on_done(job, run)
+        except Exception:
+            logging.exception("Job %s: could not finish", job["id"])
+            self.store.update(job["id"], self.ttl, status="failed", error="Could not build the job result")
+
+# ---------------- webhook ----------------
+
+def callback_url_error(url: str, hosts: list[str], allow_http: bool = False) -> str | None:
+    """Why `url` may not be a job webhook, or None.
+
+    The host must be a name in `hosts` ("*.example.com" also matches its subdomains);
+    IP literals are refused, so a caller cannot aim the worker at internal addresses.
+    """
+    schemes = ("https", "http") if allow_http else ("https",)
+    try:
+        parts = urlsplit(url)
+        scheme, host = parts.scheme, (parts.hostname or "").rstrip(".")
+        parts.port  # raises on a malformed port
+    except ValueError:
+        scheme, host = "", ""
+    if scheme not in schemes or not host:
+        return f"'callback_url' must be an absolute {' or '.join(schemes)} URL"
+    if _is_ip(host):
+        return "'callback_url' must name a host, not an IP address"
+    if not any(_host_allowed(host, pattern) for pattern in hosts):
+        return f"'callback_url' host '{host}' is not allowed"
+    return None
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def _host_allowed(host: str, pattern: str) -> bool:
+    pattern = pattern.strip().lower().rstrip(".")
+    if pattern.startswith("*."):
+        return host.endswith(pattern[1:])
+    return bool(pattern) and host == pattern
+
+
+def _private_address(host: str) -> str | None:
+    """The first non-public address `host` resolves to, or None (checked again at delivery:
+    an allowed name can still point inside the network)."""
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except OSError:
+        return None  # the POST fails on its own
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if not address.is_global:
+            return str(address)
+    return None
+
+
+def post_callback(url: str, payload: dict, secret: str = "", attempts: int = 3, timeout: float = 10.0,
+                  sleep: Callable[[float], None] = time.sleep, allow_private: bool = False) -> dict:
+    """POST the finished job to the caller's webhook; returns the delivery record.
+
+    With `secret`, the body is signed: X-Job-Signature: sha256=<hex HMAC of the body>.
+    Network errors and 5xx/429 answers are retried with a short backoff. Redirects are
+    not followed, and unless `allow_private` a host resolving to a private, loopback or
+    link-local address is not called at all.
+    """
+    if not allow_private:
+        address = _private_address(urlsplit(url).hostname or "")
+        if address is not None:
+            logging.warning("Job %s: webhook host resolves to non-public address %s; not called",
+                            payload.get("id"), address)
+            return {"delivered": False, "attempts": 0, "status_code": None}
+
+    import requests  # only workers that deliver webhooks pay for the import
+
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Job-Signature"] = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    status_code, error = None, None
+    for attempt in range(1, attempts + 1):
+        try:
+            resp = requests.post(url, data=body, headers=headers, timeout=timeout, allow_redirects=False)
+            status_code, error = resp.status_code, None
+            if resp.status_code < 500 and resp.status_code != 429:
+                break
+        except requests.RequestException as e:
+            status_code, error = None, str(e)
+        if attempt < attempts:
+            sleep(0.5 * 2 ** (attempt - 1))
+    delivered = status_code is not None and 200 <= status_code < 300
+    if not delivered:
+        logging.warning("Job %s: webhook failed after %d attempt(s): %s", payload.get("id"), attempt,
+                        error or f"HTTP {status_code}")
+    return {"delivered": delivered, "attempts": attempt, "status_code": status_code}
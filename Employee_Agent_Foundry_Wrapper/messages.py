@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+# ---------------- incremental message fetch ----------------
+
+PAGE_LIMIT = 20
+MAX_PAGES = 5  # a single run never produces more than a handful of messages
+
+
+def run_messages_params(run_id: str, after: str | None) -> dict:
+    """Query for only the messages a run produced, oldest first.
+
+    `run_id` is the server-side filter; `after` (the user message just posted,
+    or the thread cursor) also bounds the page if the filter is not honoured.
+    """
+    params = {"run_id": run_id, "order": "asc", "limit": str(PAGE_LIMIT)}
+    if after:
+        params["after"] = after
+    return params
+
+
+def fetch_run_messages(get: Callable[..., dict], thread_id: str, run_id: str, after: str | None) -> list[dict]:
+    """Page through the run's messages with `get` (BackendClient.get)."""
+    data: list[dict] = []
+    for _ in range(MAX_PAGES):
+        page = get(f"/threads/{thread_id}/messages", endpoint="list_messages",
+                   params=run_messages_params(run_id, after))
+        data.extend(page.get("data") or [])
+        if not page.get("has_more") or not data:
+            break
+        after = data[-1].get("id")
+    return data
+
+
+async def fetch_run_messages_async(get: Callable[..., Awaitable[dict]], thread_id: str, run_id: str,
+                                   after: str | None) -> list[dict]:
+    """`fetch_run_messages` for the async path (AsyncBackendClient.get)."""
+    data: list[dict] = []
+    for _ in range(MAX_PAGES):
+        page = await get(f"/threads/{thread_id}/messages", endpoint="list_messages",
+                         params=run_messages_params(run_id, after))
+        data.extend(page.get("data") or [])
+        if not page.get("has_more") or not data:
+            break
+        after = data[-1].get("id")
+    return data
+
+
+def fetch_run_steps(get: Callable[..., dict], thread_id: str, run_id: str) -> list[dict]:
+    """The run's steps (tool calls carry their own created/completed times)."""
+    return get(f"/threads/{thread_id}/runs/{run_id}/steps", endpoint="list_run_steps").get("data") or []
+
+
+async def fetch_run_steps_async(get: Callable[..., Awaitable[dict]], thread_id: str, run_id: str) -> list[dict]:
+    """`fetch_run_steps` for the async path."""
+    return (await get(f"/threads/{thread_id}/runs/{run_id}/steps", endpoint="list_run_steps")).get("data") or []
+
+
+def run_assistant_text(messages: list[dict], run_id: str) -> str:
+    """Every text part of every assistant message from `run_id`, in order."""
+    parts = []
+    for m in messages:
+        if m.get("role") != "assistant" or m.get("run_id") not in (None, run_id):
+            continue
+        for part in m.get("content") or []:
+            # text may appear as {"text":{"value":"..."}} or "text":"..."
+            t = part.get("text")
+            if isinstance(t, dict):
+                t = t.get("value")
+            if isinstance(t, str) and t:
+                parts.append(t)
+    return "\n\n".join(parts)
+
+
+class ThreadCursors:
+    """Small LRU of thread_id -> id of the newest message seen on that thread."""
+
+    def __init__(self, max_threads: int = 2048):
+        self._max = max_threads
+        self._lock = threading.Lock()
+        self._cursors: OrderedDict[str, str] = OrderedDict()
+
+    def get(self, thread_id: str) -> str | None:
+        with self._lock:
+            cursor = self._cursors.get(thread_id)
+            if cursor is not None:
+                self._cursors.move_to_end(thread_id)
+            return cursor
+
+    def set(self, thread_id: str, message_id: str | None) -> None:
+        if not message_id:
+            return
+        with self._lock:
+            self._cursors[thread_id] = message_id
+            self._cursors.move_to_end(thread_id)
+            while len(self._cursors) > self._max:
+                self._cursors.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._cursors)
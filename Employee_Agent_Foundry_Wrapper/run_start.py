@@ -0,0 +1,159 @@
+import threading
+
+from async_backend_client import BackendHTTPError
+
+# ---------------- run start ----------------
+
+# Answers meaning "this API version has no such request shape" (probe only)
+UNSUPPORTED_STATUSES = (400, 404, 405)
+
+
+def _user_message(prompt: str) -> dict:
+    return {"role": "user", "content": prompt}
+
+
+def combined_request(agent_id: str, prompt: str, thread_id: str | None, stream: bool = False) -> tuple[str, dict, str]:
+    """(path, body, endpoint) that posts the prompt and starts the run in one call.
+
+    - New conversation: POST /threads/runs with the thread's first message.
+    - Existing thread:  POST /threads/{id}/runs with `additional_messages`.
+    """
+    if thread_id:
+        path, endpoint = f"/threads/{thread_id}/runs", "create_run_with_message"
+        body = {"assistant_id": agent_id, "additional_messages": [_user_message(prompt)]}
+    else:
+        path, endpoint = "/threads/runs", "create_thread_and_run"
+        body = {"assistant_id": agent_id, "thread": {"messages": [_user_message(prompt)]}}
+    if stream:
+        body["stream"] = True
+        endpoint += "_stream"
+    return path, body, endpoint
+
+
+def error_status(error: Exception) -> int | None:
+    """HTTP status of a backend error from either client, else None."""
+    if isinstance(error, BackendHTTPError):
+        return error.status
+    # requests.HTTPError, matched by shape so the async path never imports requests
+    response = getattr(error, "response", None)
+    if response is not None:
+        return getattr(response, "status_code", None)
+    return None
+
+
+class RunStarter:
+    """Starts a turn's run in as few backend calls as the API allows.
+
+    Returns (thread_id, run, user_message_id); the message id is None when the
+    prompt travelled inside the run request.
+
+    Modes (RUN_START_MODE):
+    - "auto":     try the single-request shape once; if the backend rejects it
+                  and the separate calls then succeed, use those from then on.
+    - "combined": always one request (create thread+run, or run with message).
+    - "separate": the original sequence: [create thread,] add message, create run.
+    """
+
+    MODES = ("auto", "combined", "separate")
+
+    def __init__(self, mode: str = "auto"):
+        if mode not in self.MODES:
+            raise RuntimeError(f"Unknown RUN_START_MODE '{mode}' (expected one of: {', '.join(self.MODES)})")
+        self.mode = mode
+        # None = not probed yet (auto mode only)
+        self._combined: bool | None = {"auto": None, "combined": True, "separate": False}[mode]
+        self._lock = threading.Lock()
+        self.combined_starts = 0
+        self.separate_starts = 0
+        self.fallbacks = 0
+
+    @property
+    def combined(self) -> bool | None:
+        """True / False once known, None while the auto probe is pending."""
+        return self._combined
+
+    def start(self, backend, agent_id: str, prompt: str, thread_id: str | None) -> tuple[str, dict, str | None]:
+        """Sync path (BackendClient)."""
+        import requests  # loaded with the BackendClient; only binds the name
+
+        if self._combined is not False:
+            path, body, endpoint = combined_request(agent_id, prompt, thread_id)
+            try:
+                run = backend.post(path, body, endpoint=endpoint)
+            except requests.HTTPError as e:
+                if not self.should_fall_back(e):
+                    raise
+            else:
+                return self._started_combined(run, thread_id)
+
+        if not thread_id:
+            thread_id = backend.post("/threads", {}, endpoint="create_thread").get("id")
+            if not thread_id:
+                raise RuntimeError("No thread_id returned from create thread")
+        user_message = backend.post(f"/threads/{thread_id}/messages", _user_message(prompt), endpoint="create_message")
+        run = backend.post(f"/threads/{thread_id}/runs", {"assistant_id": agent_id}, endpoint="create_run")
+        self.record_separate()
+        return thread_id, run, user_message.get("id")
+
+    async def start_async(self, backend, agent_id: str, prompt: str,
+                          thread_id: str | None) -> tuple[str, dict, str | None]:
+        """Async path (AsyncBackendClient)."""
+        if self._combined is not False:
+            path, body, endpoint = combined_request(agent_id, prompt, thread_id)
+            try:
+                run = await backend.post(path, body, endpoint=endpoint)
+            except BackendHTTPError as e:
+                if not self.should_fall_back(e):
+                    raise
+            else:
+                return self._started_combined(run, thread_id)
+
+        if not thread_id:
+            thread_id = (await backend.post("/threads", {}, endpoint="create_thread")).get("id")
+            if not thread_id:
+                raise RuntimeError("No thread_id returned from create thread")
+        user_message = await backend.post(f"/threads/{thread_id}/messages", _user_message(prompt),
+                                          endpoint="create_message")
+        run = await backend.post(f"/threads/{thread_id}/runs", {"assistant_id": agent_id}, endpoint="create_run")
+        self.record_separate()
+        return thread_id, run, user_message.get("id")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "combined_supported": self._combined,
+                "combined_starts": self.combined_starts,
+                "separate_starts": self.separate_starts,
+                "fallbacks": self.fallbacks,
+            }
+
+    # ---------------- probe bookkeeping (also used by the streaming route) ----------------
+
+    def should_fall_back(self, error: Exception) -> bool:
+        """Whether a failed single-request start should be retried as separate calls."""
+        if self._combined is not None or error_status(error) not in UNSUPPORTED_STATUSES:
+            return False
+        with self._lock:
+            self.fallbacks += 1
+        return True
+
+    def record_combined(self) -> None:
+        with self._lock:
+            self._combined = True
+            self.combined_starts += 1
+
+    def record_separate(self) -> None:
+        with self._lock:
+            # Only a probe whose fallback worked proves the single request is unsupported;
+            # if both shapes failed the error was about the request, not its shape.
+            if self._combined is None and self.fallbacks:
+                self._combined = False
+            self.separate_starts += 1
+
+    def _started_combined(self, run: dict, thread_id: str | None) -> tuple[str, dict, None]:
+        thread_id = thread_id or run.get("thread_id")
+        if not thread_id:
+            raise RuntimeError("No thread_id returned from create thread and run")
+        self.record_combined()
+        return thread_id, run, None
@@ -0,0 +1,246 @@
+import os
+import math
+import time
+import asyncio
+import random
+import threading
+from typing import Awaitable, Callable, Iterator
+
+import tracing
+
+# ---------------- run status ----------------
+
+# Statuses in which the run is still owned by the backend
+WAIT_STATUSES = ("queued", "in_progress", "requires_action", "cancelling")
+# Statuses after which polling can stop immediately
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "expired", "incomplete")
+
+# ---------------- wait policy ----------------
+
+class WaitPolicy:
+    """How long to wait for a run and how often to poll it.
+
+    The first poll happens after `initial_delay`; every following delay is
+    multiplied by `multiplier` (with +/-`jitter` spread) up to `max_delay`.
+    Poll intervals a request sets through `with_options` never go below
+    `client_min_delay`, so one caller cannot make a worker poll in a tight loop.
+    """
+
+    # Request-level option name -> attribute (see `with_options`)
+    OPTIONS = {
+        "deadline_seconds": "deadline",
+        "initial_poll_seconds": "initial_delay",
+        "max_poll_seconds": "max_delay",
+        "backoff_multiplier": "multiplier",
+    }
+
+    def __init__(self,
+                 deadline: float = 120.0,
+                 initial_delay: float = 0.25,
+                 max_delay: float = 2.0,
+                 multiplier: float = 1.5,
+                 jitter: float = 0.1,
+                 client_min_delay: float = 0.25):
+        for name, value in (("deadline", deadline), ("initial_delay", initial_delay), ("max_delay", max_delay),
+                            ("multiplier", multiplier), ("client_min_delay", client_min_delay)):
+            if not math.isfinite(value):
+                raise ValueError(f"{name} must be a finite number")  # NaN slips through min/max clamps
+        self.deadline = min(max(deadline, 1.0), 600.0)  # host.json functionTimeout is 10 min
+        self.initial_delay = max(initial_delay, 0.05)
+        self.max_delay = max(max_delay, self.initial_delay)
+        self.multiplier = max(multiplier, 1.0)
+        self.jitter = jitter
+        self.client_min_delay = max(client_min_delay, 0.05)
+
+    @classmethod
+    def from_env(cls) -> "WaitPolicy":
+        return cls(
+            deadline=float(os.getenv("RUN_DEADLINE_SECONDS", "120")),
+            initial_delay=float(os.getenv("RUN_POLL_INITIAL_SECONDS", "0.25")),
+            max_delay=float(os.getenv("RUN_POLL_MAX_SECONDS", "2.0")),
+            multiplier=float(os.getenv("RUN_POLL_MULTIPLIER", "1.5")),
+            client_min_delay=float(os.getenv("RUN_POLL_CLIENT_MIN_SECONDS", "0.25")),
+        )
+
+    def with_options(self, options: dict | None) -> "WaitPolicy":
+        """Return a copy overridden by per-request `options` (unknown keys ignored)."""
+        values = {attr: getattr(self, attr) for attr in self.OPTIONS.values()}
+        for key, attr in self.OPTIONS.items():
+            if options and options.get(key) is not None:
+                try:
+                    value = float(options[key])
+                except (TypeError, ValueError):
+                    raise ValueError(f"Option '{key}' must be a number") from None
+                if not math.isfinite(value):
+                    raise ValueError(f"Option '{key}' must be a finite number")
+                if attr in ("initial_delay", "max_delay"):
+                    value = max(value, self.client_min_delay)
+                values[attr] = value
+        return WaitPolicy(jitter=self.jitter, client_min_delay=self.client_min_delay, **values)
+
+    def delays(self) -> Iterator[float]:
+        delay = self.initial_delay
+        while True:
+            spread = delay * self.jitter
+            yield max(0.0, delay + random.uniform(-spread, spread))
+            delay = min(delay * self.multiplier, self.max_delay)
+
+# ---------------- metrics ----------------
+
+class WaitMetrics:
+    """Poll counts and time-to-terminal per run, aggregated per process."""
+
+    MAX_SAMPLES = 512
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.polls = 0
+        self.timeouts = 0
+        self.by_status: dict[str, int] = {}
+        self._seconds: list[float] = []
+
+    def record(self, polls: int, seconds: float, status: str) -> None:
+        with self._lock:
+            self.runs += 1
+            self.polls += polls
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+            if status == "timeout":
+                self.timeouts += 1
+            if len(self._seconds) >= self.MAX_SAMPLES:
+                self._seconds[random.randrange(self.MAX_SAMPLES)] = seconds
+            else:
+                self._seconds.append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._seconds)
+
+            def pct(p: float) -> float:
+                if not samples:
+                    return 0.0
+                return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+
+            return {
+                "runs": self.runs,
+                "polls": self.polls,
+                "polls_per_run": round(self.polls / self.runs, 2) if self.runs else 0.0,
+                "timeouts": self.timeouts,
+                "by_status": dict(self.by_status),
+                "time_to_terminal_p50_s": pct(0.50),
+                "time_to_terminal_p95_s": pct(0.95),
+            }
+
+# ---------------- waiters ----------------
+
+class RunWaiter:
+    """Polls a run until it leaves the wait statuses or the deadline passes.
+
+    `fetch_run` returns the current run object (GET /threads/{id}/runs/{run_id}).
+    With `on_action`, a run in `requires_action` is handed to it right away
+    (it submits the tool outputs and returns the updated run) instead of being
+    polled until the deadline. Subclasses only decide the delay sequence.
+    """
+
+    def __init__(self,
+                 policy: WaitPolicy,
+                 metrics: WaitMetrics | None = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.policy = policy
+        self.metrics = metrics
+        self._sleep = sleep
+        self._clock = clock
+
+    def delays(self) -> Iterator[float]:
+        return self.policy.delays()
+
+    def wait(self, run: dict, fetch_run: Callable[[], dict],
+             on_action: Callable[[dict], dict] | None = None) -> dict:
+        """Return the run in its final state; raise TimeoutError past the deadline."""
+        started = self._clock()
+        deadline = started + self.policy.deadline
+        polls = 0
+        status = run.get("status", "queued")
+        try:
+            delays = self.delays()
+            while status in WAIT_STATUSES:
+                now = self._clock()
+                if now >= deadline:
+                    status = "timeout"
+                    raise TimeoutError("Run polling timed out")
+                if status == "requires_action" and on_action is not None:
+                    run = on_action(run)
+                    status = run.get("status", "")
+                    delays = self.delays()  # the run resumes now: start polling fast again
+                    continue
+                # Never sleep past the deadline; do one last poll at the deadline instead
+                with tracing.span("poll", {"agents.poll": polls + 1}):
+                    self._sleep(min(next(delays), deadline - now))
+                    run = fetch_run()
+                polls += 1
+                status = run.get("status", "")
+            return run
+        finally:
+            tracing.annotate({"agents.polls": polls, "agents.run.status": status})
+            if self.metrics is not None:
+                self.metrics.record(polls, self._clock() - started, status)
+
+    async def wait_async(self, run: dict, fetch_run: Callable[[], Awaitable[dict]],
+                         on_action: Callable[[dict], Awaitable[dict]] | None = None) -> dict:
+        """`wait` for the async path: yields to the event loop between polls."""
+        started = self._clock()
+        deadline = started + self.policy.deadline
+        polls = 0
+        status = run.get("status", "queued")
+        try:
+            delays = self.delays()
+            while status in WAIT_STATUSES:
+                now = self._clock()
+                if now >= deadline:
+                    status = "timeout"
+                    raise TimeoutError("Run polling timed out")
+                if status == "requires_action" and on_action is not None:
+                    run = await on_action(run)
+                    status = run.get("status", "")
+                    delays = self.delays()  # the run resumes now: start polling fast again
+                    continue
+                with tracing.span("poll", {"agents.poll": polls + 1}):
+                    await asyncio.sleep(min(next(delays), deadline - now))
+                    run = await fetch_run()
+                polls += 1
+                status = run.get("status", "")
+            return run
+        finally:
+            tracing.annotate({"agents.polls": polls, "agents.run.status": status})
+            if self.metrics is not None:
+                self.metrics.record(polls, self._clock() - started, status)
+
+
+class BackoffRunWaiter(RunWaiter):
+    """Fast first poll, then exponential backoff capped at `max_delay`."""
+
+
+class FixedIntervalRunWaiter(RunWaiter):
+    """Legacy behaviour: a constant delay between polls."""
+
+    def __init__(self, policy: WaitPolicy, interval: float = 0.9, **kwargs):
+        super().__init__(policy, **kwargs)
+        self.interval = interval
+
+    def delays(self) -> Iterator[float]:
+        while True:
+            yield self.interval
+
+
+WAITERS: dict[str, type[RunWaiter]] = {
+    "backoff": BackoffRunWaiter,
+    "fixed": FixedIntervalRunWaiter,
+}
+
+
+def make_waiter(name: str, policy: WaitPolicy, metrics: WaitMetrics | None = None) -> RunWaiter:
+    try:
+        return WAITERS[name](policy, metrics=metrics)
+    except KeyError:
+        raise RuntimeError(f"Unknown RUN_WAITER '{name}' (expected one of: {', '.join(WAITERS)})") from None
@@ -0,0 +1,199 @@
+import json
+import time
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from async_backend_client import AsyncBackendClient, BackendHTTPError
+from run_start import RunStarter, combined_request
+
+# ---------------- streamed turns ----------------
+
+# Tool name fragment (case-insensitive) -> progress stage shown to the caller
+TOOL_STAGES = (
+    ("validat", "validating"),
+    ("update", "updating"),
+)
+
+
+def tool_stage(tool_name: str) -> str:
+    lowered = (tool_name or "").lower()
+    for fragment, stage in TOOL_STAGES:
+        if fragment in lowered:
+            return stage
+    return "calling_tool"
+
+
+def format_sse(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def _tool_calls(step: dict) -> list[dict]:
+    details = step.get("step_details") or (step.get("delta") or {}).get("step_details") or {}
+    return details.get("tool_calls") or []
+
+
+def _tool_name(call: dict) -> str:
+    # {"type":"openapi","function":{"name":...}} / {"type":"function","function":{...}}
+    body = call.get(call.get("type") or "") or call.get("function") or {}
+    return body.get("name") or call.get("type") or ""
+
+
+def _delta_text(message_delta: dict) -> str:
+    parts = []
+    for part in (message_delta.get("delta") or {}).get("content") or []:
+        t = part.get("text")
+        if isinstance(t, dict):
+            parts.append(t.get("value") or "")
+        elif isinstance(t, str):
+            parts.append(t)
+    return "".join(parts)
+
+
+async def _start_stream(backend: AsyncBackendClient,
+                        agent_id: str,
+                        prompt: str,
+                        thread_id: str | None,
+                        starter: RunStarter | None) -> tuple[str | None, AsyncIterator[tuple[str, Any]]]:
+    """Open the run's event stream: one request when `starter` allows, else the separate calls.
+
+    Returns (thread_id, events); thread_id is None until the stream reports it
+    (a thread created by the run request itself).
+    """
+    if starter is not None and starter.combined is not False:
+        path, body, endpoint = combined_request(agent_id, prompt, thread_id, stream=True)
+        events = backend.stream_events("POST", path, endpoint=endpoint, json_body=body)
+        try:
+            # An unsupported shape is rejected before the first event
+            first = await anext(events)
+        except BackendHTTPError as e:
+            if not starter.should_fall_back(e):
+                raise
+        else:
+            starter.record_combined()
+            return thread_id, _chain(first, events)
+
+    if not thread_id:
+        thread_id = (await backend.post("/threads", {}, endpoint="create_thread")).get("id")
+        if not thread_id:
+            raise RuntimeError("No thread_id returned from create thread")
+    await backend.post(
+        f"/threads/{thread_id}/messages",
+        {"role": "user", "content": prompt},
+        endpoint="create_message"
+    )
+    if starter is not None:
+        starter.record_separate()
+    return thread_id, backend.stream_events(
+        "POST",
+        f"/threads/{thread_id}/runs",
+        endpoint="create_run_stream",
+        json_body={"assistant_id": agent_id, "stream": True},
+    )
+
+
+async def _chain(first: tuple[str, Any], rest: AsyncIterator[tuple[str, Any]]) -> AsyncIterator[tuple[str, Any]]:
+    yield first
+    async for item in rest:
+        yield item
+
+
+async def stream_turn(backend: AsyncBackendClient,
+                      agent_id: str,
+                      prompt: str,
+                      thread_id: str | None,
+                      deadline: float,
+                      starter: RunStarter | None = None,
+                      on_action: Callable[[str, dict], Awaitable[AsyncIterator[tuple[str, Any]]]] | None = None,
+                      ) -> AsyncIterator[tuple[str, dict]]:
+    """Run one turn with `stream: true` and yield caller-facing events.
+
+    Events: thread, run (status changes), progress (tool calls), delta (text),
+    and finally done with the same summary object as /api/chat.
+    A `thread.run.requires_action` event ends the backend's stream; `on_action(thread_id, run)`
+    submits the tool outputs and returns the events of the continued run (without it the
+    turn fails, and the caller cancels the run).
+    """
+    thread_id, events = await _start_stream(backend, agent_id, prompt, thread_id, starter)
+    if thread_id:
+        yield "thread", {"thread_id": thread_id}
+
+    run_id, status = None, ""
+    answer: list[str] = []
+    announced: set[str] = set()
+    stop_at = time.monotonic() + deadline
+
+    while events is not None:
+        async with aclosing(events) as current:
+            events = None
+            while True:
+                try:
+                    # Bounds the wait itself: a backend that goes quiet mid-run sends no event to check on
+                    event, data = await asyncio.wait_for(anext(current), stop_at - time.monotonic())
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise TimeoutError("Run streaming timed out") from None
+                if event == "done":
+                    break
+                if event == "error":
+                    raise RuntimeError((data or {}).get("message") or "Backend stream error")
+
+                if event.startswith("thread.run.step."):
+                    for call in _tool_calls(data or {}):
+                        name = _tool_name(call)
+                        call_id = call.get("id") or name
+                        if name and call_id not in announced:
+                            announced.add(call_id)
+                            yield "progress", {"stage": tool_stage(name), "tool": name}
+                elif event.startswith("thread.run."):
+                    run_id = data.get("id") or run_id
+                    if not thread_id and data.get("thread_id"):
+                        thread_id = data["thread_id"]
+                        yield "thread", {"thread_id": thread_id}
+                    if data.get("status") and data["status"] != status:
+                        status = data["status"]
+                        yield "run", {"run_id": run_id, "status": status}
+                    if event == "thread.run.requires_action":
+                        if on_action is None:
+                            raise RuntimeError(f"Run {run_id} requires tool outputs and no handler is configured")
+                        events = await on_action(thread_id, data)
+                        break
+                elif event == "thread.message.delta":
+                    text = _delta_text(data or {})
+                    if text:
+                        answer.append(text)
+                        yield "delta", {"text": text}
+
+    yield "done", {
+        "thread_id": thread_id,
+        "run_id": run_id,
+        "status": status,
+        "answer": "".join(answer) if status == "completed" else "",
+    }
+
+# ---------------- route ----------------
+
+def register_route(app, handle: Callable[[Any], Awaitable[tuple]]) -> None:
+    """Add POST /api/chat/stream to `app`; `handle(req)` returns (error, None) or (None, SSE chunks).
+
+    The host reads the route's Request/StreamingResponse types when it indexes
+    functions, so the FastAPI HTTP extension is imported here, by apps that enable
+    the route, rather than by every worker at startup.
+    """
+    from azurefunctions.extensions.http.fastapi import Request, Response, StreamingResponse
+
+    @app.route(route="chat/stream", methods=["POST"])
+    async def chat_stream(req: Request) -> StreamingResponse:
+        """POST /api/chat/stream: server-sent events for one turn (see function_app._chat_stream)."""
+        error, chunks = await handle(req)
+        if error is not None:
+            status_code, payload = error
+            if isinstance(payload, str):
+                return Response(payload, status_code=status_code)
+            return Response(json.dumps(payload), status_code=status_code, media_type="application/json")
+        return StreamingResponse(
+            chunks,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
@@ -0,0 +1,155 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable
+
+# ---------------- warm thread pool ----------------
+
+class WarmThreadPool:
+    """Pre-created, still-empty backend threads for new conversations.
+
+    - `take()` never calls the backend: it hands out a pooled thread id, or
+      None (a miss) so the caller creates one the usual way.
+    - A daemon filler keeps `size` threads available, starting on first use
+      and refilling as soon as one is taken.
+    - A pooled thread not handed out within `ttl` seconds is deleted on the
+      backend and replaced, so idle threads never pile up.
+    """
+
+    def __init__(self,
+                 create_thread: Callable[[], str],
+                 delete_thread: Callable[[str], None],
+                 size: int = 4,
+                 ttl: float = 600.0,
+                 retry_delay: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._create_thread = create_thread
+        self._delete_thread = delete_thread
+        self.size = max(0, size)
+        self.ttl = max(ttl, 1.0)
+        self._retry_delay = retry_delay
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._available: deque[tuple[str, float]] = deque()  # (thread_id, created_at), oldest first
+        self._expired: list[str] = []
+        self._filler: threading.Thread | None = None
+        self._stopped = False
+
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.expired = 0
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    def take(self) -> str | None:
+        """Return a fresh pooled thread id, or None when the pool is empty or disabled."""
+        if not self.enabled:
+            return None
+        with self._cond:
+            self._start_filler()
+            now = self._clock()
+            while self._available:
+                thread_id, created_at = self._available.popleft()
+                if now - created_at < self.ttl:
+                    self.hits += 1
+                    self._cond.notify_all()
+                    return thread_id
+                self._expired.append(thread_id)
+            self.misses += 1
+            self._cond.notify_all()
+            return None
+
+    def stop(self, drain: bool = False) -> None:
+        """Stop the filler; with `drain`, also delete the threads still pooled."""
+        with self._cond:
+            self._stopped = True
+            leftovers = [thread_id for thread_id, _ in self._available] + self._expired
+            self._available.clear()
+            self._expired = []
+            self._cond.notify_all()
+        if drain:
+            for thread_id in leftovers:
+                self._delete(thread_id)
+
+    def stats(self) -> dict:
+        with self._cond:
+            served = self.hits + self.misses
+            return {
+                "size": self.size,
+                "available": len(self._available),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / served, 3) if served else 0.0,
+                "created": self.created,
+                "expired": self.expired,
+                "failures": self.failures,
+                "stopped": self._stopped,
+            }
+
+    # ---------------- internals ----------------
+
+    def _start_filler(self) -> None:
+        # Caller holds the lock
+        if self._filler is None and not self._stopped:
+            self._filler = threading.Thread(target=self._fill_forever, name="warm-thread-pool", daemon=True)
+            self._filler.start()
+
+    def _fill_forever(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = self._clock()
+                while self._available and now - self._available[0][1] >= self.ttl:
+                    self._expired.append(self._available.popleft()[0])
+                expired, self._expired = self._expired, []
+                short = len(self._available) < self.size
+                if not expired and not short:
+                    # Sleep until the oldest pooled thread expires or one is taken
+                    self._cond.wait(self._available[0][1] + self.ttl - now if self._available else None)
+                    continue
+
+            # Backend calls happen outside the lock so `take` never waits on them
+            for thread_id in expired:
+                self._delete(thread_id)
+                with self._cond:
+                    self.expired += 1
+            if short and not self._add_one():
+                with self._cond:
+                    self._cond.wait(self._retry_delay)
+
+    def _add_one(self) -> bool:
+        try:
+            thread_id = self._create_thread()
+            if not thread_id:
+                raise RuntimeError("No thread_id returned from create thread")
+        except Exception:
+            logging.warning("Warm thread pool: create thread failed", exc_info=True)
+            with self._cond:
+                self.failures += 1
+            return False
+        with self._cond:
+            stopped = self._stopped
+            if not stopped:
+                self._available.append((thread_id, self._clock()))
+                self.created += 1
+        if stopped:
+            self._delete(thread_id)
+        return True
+
+    def _delete(self, thread_id: str) -> None:
+        try:
+            self._delete_thread(thread_id)
+        except Exception:
+            # Best effort: an orphaned empty thread costs nothing but storage
+            logging.warning("Warm thread pool: delete thread %s failed", thread_id, exc_info=True)
@@ -0,0 +1,212 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable
+
+# ---------------- token cache ----------------
+
+class TokenCache:
+    """Process-wide bearer token cache around a single credential.
+
+    - The credential is built once (lazily) and reused for every request.
+    - A cached token is served until `expiry_skew` seconds before `expires_on`.
+    - Inside the last `refresh_margin` seconds a background refresh is started,
+      so callers keep getting the current token while a new one is fetched.
+    - Concurrent callers that find no usable token wait on a single in-flight
+      refresh instead of each calling `get_token`.
+    """
+
+    def __init__(self,
+                 credential_factory: Callable[[], Any],
+                 scope: str,
+                 refresh_margin: float = 300.0,
+                 expiry_skew: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self._credential_factory = credential_factory
+        self._scope = scope
+        self._refresh_margin = max(refresh_margin, expiry_skew)
+        self._expiry_skew = expiry_skew
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._credential = None
+        self._token: str | None = None
+        self._expires_on = 0.0
+        self._refreshing = False
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def get(self) -> str:
+        """Return a usable bearer token, fetching one only when required."""
+        with self._cond:
+            now = self._clock()
+            if self._usable(now):
+                self.hits += 1
+                if now >= self._expires_on - self._refresh_margin and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._background_refresh, daemon=True).start()
+                return self._token
+
+            self.misses += 1
+            # Wait for an in-flight refresh; take over if it failed.
+            while self._refreshing:
+                self._cond.wait()
+                if self._usable(self._clock()):
+                    return self._token
+            self._refreshing = True
+
+        try:
+            self._refresh()
+        finally:
+            with self._cond:
+                self._refreshing = False
+                self._cond.notify_all()
+        with self._cond:
+            return self._token
+
+    def invalidate(self) -> None:
+        """Drop the cached token (e.g. after the backend answered 401)."""
+        with self._cond:
+            self._token = None
+            self._expires_on = 0.0
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "expires_in": max(0, int(self._expires_on - self._clock())) if self._token else 0,
+            }
+
+    # ---------------- internals ----------------
+
+    def _usable(self, now: float) -> bool:
+        return self._token is not None and now < self._expires_on - self._expiry_skew
+
+    def _refresh(self) -> None:
+        # Runs outside the lock; `_refreshing` guarantees a single caller.
+        try:
+            if self._credential is None:
+                self._credential = self._credential_factory()
+            tok = self._credential.get_token(self._scope)
+        except Exception:
+            with self._cond:
+                self.failures += 1
+            raise
+        with self._cond:
+            self.refreshes += 1
+            self._token = tok.token
+            self._expires_on = float(tok.expires_on)
+
+    def _background_refresh(self) -> None:
+        try:
+            self._refresh()
+        except Exception:
+            # The current token is still usable; the next caller retries.
+            logging.warning("Background token refresh failed", exc_info=True)
+        finally:
+            with self._cond:
+                self._refreshing = False
+                self._cond.notify_all()
+
+
+class AsyncTokenCache:
+    """`TokenCache` for the async path, around an `azure.identity.aio` credential.
+
+    Same policy (skew, proactive refresh, single in-flight fetch) but waits on
+    an asyncio.Lock instead of blocking a thread.
+    """
+
+    def __init__(self,
+                 credential_factory: Callable[[], Any],
+                 scope: str,
+                 refresh_margin: float = 300.0,
+                 expiry_skew: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self._credential_factory = credential_factory
+        self._scope = scope
+        self._refresh_margin = max(refresh_margin, expiry_skew)
+        self._expiry_skew = expiry_skew
+        self._clock = clock
+
+        self._lock: asyncio.Lock | None = None
+        self._credential = None
+        self._token: str | None = None
+        self._expires_on = 0.0
+        self._background: asyncio.Task | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    async def get(self) -> str:
+        now = self._clock()
+        if self._usable(now):
+            self.hits += 1
+            in_margin = now >= self._expires_on - self._refresh_margin
+            if in_margin and (self._background is None or self._background.done()):
+                self._background = asyncio.create_task(self._background_refresh())
+            return self._token
+
+        self.misses += 1
+        async with self._get_lock():
+            # Another caller may have refreshed while we waited
+            if not self._usable(self._clock()):
+                await self._refresh()
+            return self._token
+
+    def invalidate(self) -> None:
+        self._token = None
+        self._expires_on = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "expires_in": max(0, int(self._expires_on - self._clock())) if self._token else 0,
+        }
+
+    async def close(self) -> None:
+        if self._credential is not None and hasattr(self._credential, "close"):
+            await self._credential.close()
+
+    # ---------------- internals ----------------
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so the lock binds to the worker's running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _usable(self, now: float) -> bool:
+        return self._token is not None and now < self._expires_on - self._expiry_skew
+
+    async def _refresh(self) -> None:
+        try:
+            if self._credential is None:
+                self._credential = self._credential_factory()
+            tok = await self._credential.get_token(self._scope)
+        except Exception:
+            self.failures += 1
+            raise
+        self.refreshes += 1
+        self._token = tok.token
+        self._expires_on = float(tok.expires_on)
+
+    async def _background_refresh(self) -> None:
+        async with self._get_lock():
+            if self._clock() < self._expires_on - self._refresh_margin:
+                return  # someone else already refreshed
+            try:
+                await self._refresh()
+            except Exception:
+                logging.warning("Background token refresh failed", exc_info=True)
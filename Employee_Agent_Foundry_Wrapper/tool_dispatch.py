@@ -0,0 +1,215 @@
+import json
+import asyncio
+import inspect
+import logging
+import importlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Any, AsyncIterator, Callable
+
+import tracing
+
+# ---------------- errors ----------------
+
+class UnknownToolError(Exception):
+    """The run asked for function tools that have no local handler."""
+
+    def __init__(self, names: list[str], thread_id: str | None = None, run_id: str | None = None):
+        super().__init__(f"No local handler for tool(s): {', '.join(names)}")
+        self.names = names
+        self.thread_id = thread_id
+        self.run_id = run_id
+
+    def payload(self) -> dict:
+        return {"error": str(self), "tools": self.names, "thread_id": self.thread_id, "run_id": self.run_id}
+
+# ---------------- helpers ----------------
+
+def required_tool_calls(run: dict) -> list[dict]:
+    """Tool calls a `requires_action` run waits on (required_action.submit_tool_outputs)."""
+    action = run.get("required_action") or {}
+    return (action.get("submit_tool_outputs") or {}).get("tool_calls") or []
+
+
+def _submit_path(thread_id: str, run_id: str) -> str:
+    return f"/threads/{thread_id}/runs/{run_id}/submit_tool_outputs"
+
+
+def _arguments(call: dict) -> dict:
+    raw = (call.get("function") or {}).get("arguments") or "{}"
+    try:
+        args = json.loads(raw) if isinstance(raw, str) else raw
+    except json.JSONDecodeError:
+        raise ValueError(f"Tool arguments are not valid JSON: {raw[:200]}") from None
+    if not isinstance(args, dict):
+        raise ValueError("Tool arguments must be a JSON object")
+    return args
+
+
+def _output(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+# ---------------- dispatcher ----------------
+
+class ToolDispatcher:
+    """Local handlers for the agent's function tools.
+
+    - A run in `requires_action` lists the tool calls it waits on; `submit`
+      runs all of them concurrently (sync handlers on a thread pool, async
+      handlers on the loop) and posts every output in one submit_tool_outputs call.
+    - Handlers take the call's JSON arguments as keyword arguments and return a
+      string or anything JSON-serializable. An exception or a call still running
+      `timeout` after the batch started becomes an {"error": ...} output the
+      model can react to.
+    - A call to a tool with no handler raises UnknownToolError before any
+      handler runs, so the caller can cancel the run instead of letting it wait.
+    """
+
+    def __init__(self, max_workers: int = 8, timeout: float = 30.0):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._handlers: dict[str, Callable[..., Any]] = {}
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+        self.actions = 0
+        self.calls: dict[str, int] = {}
+        self.errors = 0
+        self.unknown = 0
+
+    def register(self, name: str, handler: Callable[..., Any] | None = None):
+        """Register `handler` for tool `name`; without `handler`, use as a decorator."""
+        if handler is None:
+            return lambda fn: self.register(name, fn)
+        self._handlers[name] = handler
+        return handler
+
+    def names(self) -> list[str]:
+        return sorted(self._handlers)
+
+    # ---------------- sync path ----------------
+
+    def submit(self, backend, thread_id: str, run: dict) -> dict:
+        """Answer a `requires_action` run; returns the run as the submit call returns it."""
+        calls = self._begin(required_tool_calls(run), thread_id, run.get("id"))
+        with tracing.span("tool_dispatch", {"agents.tool_calls": len(calls)}):
+            pool = self._executor()
+            futures = [pool.submit(contextvars.copy_context().run, self._call, call) for call in calls]
+            wait(futures, timeout=self.timeout)  # one budget for the batch, not one per call
+            outputs = [self._result(call, future) for call, future in zip(calls, futures)]
+            return backend.post(_submit_path(thread_id, run.get("id")), {"tool_outputs": outputs},
+                                endpoint="submit_tool_outputs")
+
+    # ---------------- async path ----------------
+
+    async def submit_async(self, backend, thread_id: str, run: dict) -> dict:
+        """`submit` for the async routes (AsyncBackendClient)."""
+        calls = self._begin(required_tool_calls(run), thread_id, run.get("id"))
+        with tracing.span("tool_dispatch", {"agents.tool_calls": len(calls)}):
+            outputs = await asyncio.gather(*(self._call_async(call) for call in calls))
+            return await backend.post(_submit_path(thread_id, run.get("id")), {"tool_outputs": list(outputs)},
+                                      endpoint="submit_tool_outputs")
+
+    async def submit_stream(self, backend, thread_id: str, run: dict) -> AsyncIterator[tuple[str, Any]]:
+        """`submit_async` for a streamed run: the outputs go with `stream: true`, and the
+        returned events continue the run where its `requires_action` event left off."""
+        calls = self._begin(required_tool_calls(run), thread_id, run.get("id"))
+        with tracing.span("tool_dispatch", {"agents.tool_calls": len(calls)}):
+            outputs = await asyncio.gather(*(self._call_async(call) for call in calls))
+        return backend.stream_events("POST", _submit_path(thread_id, run.get("id")),
+                                     endpoint="submit_tool_outputs_stream",
+                                     json_body={"tool_outputs": list(outputs), "stream": True})
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tools": self.names(),
+                "actions": self.actions,
+                "calls": dict(self.calls),
+                "errors": self.errors,
+                "unknown": self.unknown,
+            }
+
+    # ---------------- internals ----------------
+
+    def _begin(self, calls: list[dict], thread_id: str, run_id: str | None) -> list[dict]:
+        missing = sorted({(c.get("function") or {}).get("name") or c.get("type") or "?"
+                          for c in calls if (c.get("function") or {}).get("name") not in self._handlers})
+        with self._lock:
+            if missing:
+                self.unknown += 1
+            else:
+                self.actions += 1
+        if missing:
+            raise UnknownToolError(missing, thread_id, run_id)
+        return calls
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        return self._pool
+
+    def _count(self, name: str, failed: bool) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if failed:
+                self.errors += 1
+
+    def _call(self, call: dict) -> str:
+        name = call["function"]["name"]
+        with tracing.span(f"tool.{name}", {"agents.tool_call_id": call.get("id")}):
+            handler = self._handlers[name]
+            result = handler(**_arguments(call))
+            if inspect.isawaitable(result):
+                result = asyncio.run(asyncio.wait_for(result, self.timeout))
+            return _output(result)
+
+    def _result(self, call: dict, future) -> dict:
+        name = call["function"]["name"]
+        if not future.done():
+            future.cancel()  # a call still queued behind busy workers never starts
+            output = self._failed(name, FutureTimeoutError())
+        else:
+            try:
+                output = future.result()
+                self._count(name, False)
+            except Exception as e:
+                output = self._failed(name, e)
+        return {"tool_call_id": call.get("id"), "output": output}
+
+    async def _call_async(self, call: dict) -> dict:
+        name = call["function"]["name"]
+        handler = self._handlers[name]
+        try:
+            with tracing.span(f"tool.{name}", {"agents.tool_call_id": call.get("id")}):
+                if inspect.iscoroutinefunction(handler):
+                    result = await asyncio.wait_for(handler(**_arguments(call)), self.timeout)
+                else:
+                    loop = asyncio.get_running_loop()
+                    ctx = contextvars.copy_context()
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(self._executor(), ctx.run, lambda: handler(**_arguments(call))),
+                        self.timeout)
+            output = _output(result)
+            self._count(name, False)
+        except Exception as e:
+            output = self._failed(name, e)
+        return {"tool_call_id": call.get("id"), "output": output}
+
+    def _failed(self, name: str, error: Exception) -> str:
+        self._count(name, True)
+        if isinstance(error, (TimeoutError, FutureTimeoutError, asyncio.TimeoutError)):
+            message = f"Tool '{name}' timed out after {self.timeout:.0f}s"
+        else:
+            message = f"Tool '{name}' failed: {error}"
+        logging.warning(message)
+        return json.dumps({"error": message})
+
+
+def load_handlers(dispatcher: ToolDispatcher, spec: str) -> None:
+    """TOOL_HANDLERS: comma-separated modules, each exposing `register(dispatcher)`."""
+    for module in filter(None, (m.strip() for m in spec.split(","))):
+        importlib.import_module(module).register(dispatcher)
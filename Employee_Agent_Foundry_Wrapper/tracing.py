@@ -0,0 +1,158 @@
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# ---------------- stage timings ----------------
+
+class StageTimings:
+    """Wall time per stage for one request (auth, each backend call, polls, answer extraction).
+
+    Stages with the same name accumulate; `server_timing` renders them as a
+    Server-Timing header value.
+    """
+
+    def __init__(self):
+        self._stages: dict[str, list] = {}  # name -> [count, total_ms]
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        entry = self._stages.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed_ms
+
+    def as_dict(self) -> dict:
+        return {name: {"count": n, "ms": round(ms, 1)} for name, (n, ms) in self._stages.items()}
+
+    def server_timing(self) -> str:
+        parts = []
+        for name, (n, ms) in self._stages.items():
+            part = f"{name};dur={ms:.1f}"
+            if n > 1:
+                part += f';desc="x{n}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+_TIMINGS: ContextVar[StageTimings | None] = ContextVar("stage_timings", default=None)
+
+# ---------------- OpenTelemetry ----------------
+
+_tracer = None
+_exporting = False
+
+
+class _NoopSpan:
+    """Stands in for an OpenTelemetry span when the API package is not installed."""
+
+    def set_attribute(self, key, value) -> None:
+        pass
+
+
+def configure(exporter: str = "") -> None:
+    """Set up span export for TRACING_EXPORTER.
+
+    - ""             : no provider installed here; spans go to whatever the host
+                       configured (no-op by default). Stage timings still work.
+    - "console"      : print finished spans to stdout (local runs).
+    - "azure_monitor": Application Insights via azure-monitor-opentelemetry
+                       (APPLICATIONINSIGHTS_CONNECTION_STRING).
+    Without the opentelemetry packages every span is a no-op.
+    """
+    global _tracer, _exporting
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        if exporter:
+            logging.warning("TRACING_EXPORTER=%s ignored: opentelemetry is not installed", exporter)
+        return
+
+    if exporter == "console":
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        provider = TracerProvider()
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+        trace.set_tracer_provider(provider)
+    elif exporter == "azure_monitor":
+        try:
+            from azure.monitor.opentelemetry import configure_azure_monitor
+        except ImportError:
+            # Optional (see requirements.txt): without it the app still serves, untraced
+            logging.warning("TRACING_EXPORTER=azure_monitor ignored: azure-monitor-opentelemetry is not installed")
+            exporter = ""
+        else:
+            configure_azure_monitor()
+    elif exporter:
+        # A typo in an app setting must not take the whole Function app down
+        logging.warning("Unknown TRACING_EXPORTER '%s' ignored (expected '', 'console' or 'azure_monitor')",
+                        exporter)
+        exporter = ""
+    _exporting = bool(exporter)
+    _tracer = trace.get_tracer("employee_agent_wrapper")
+
+
+def active() -> bool:
+    """Whether spans are exported (worth an extra run-steps call for the tool spans)."""
+    return _exporting
+
+
+def annotate(attributes: dict) -> None:
+    """Add attributes to the current span (no-op without a tracer)."""
+    if _tracer is not None:
+        from opentelemetry import trace
+        trace.get_current_span().set_attributes(_clean(attributes))
+
+
+@contextmanager
+def collect() -> Iterator[StageTimings]:
+    """Collect stage timings for the code run inside (this request)."""
+    timings = StageTimings()
+    token = _TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _TIMINGS.reset(token)
+
+
+@contextmanager
+def span(name: str, attributes: dict | None = None):
+    """Time one stage: an OpenTelemetry span plus an entry in the request's stage timings."""
+    started = time.perf_counter()
+    try:
+        if _tracer is None:
+            yield _NoopSpan()
+        else:
+            with _tracer.start_as_current_span(name, attributes=_clean(attributes or {})) as current:
+                yield current
+    finally:
+        timings = _TIMINGS.get()
+        if timings is not None:
+            timings.add(name, (time.perf_counter() - started) * 1000.0)
+
+
+def record_tool_steps(steps: list[dict]) -> None:
+    """Attach tool-call durations reported by the run steps API (second resolution).
+
+    Each tool call becomes a `tool.<name>` span with the backend's own start/end
+    times. They stay out of the stage timings: whole seconds next to millisecond
+    stages would make Server-Timing misleading.
+    """
+    if _tracer is None:
+        return
+    for step in steps:
+        if step.get("type") != "tool_calls" or not step.get("created_at"):
+            continue
+        ended = step.get("completed_at") or step.get("failed_at") or step.get("cancelled_at")
+        if not ended:
+            continue
+        for call in (step.get("step_details") or {}).get("tool_calls") or []:
+            body = call.get(call.get("type") or "") or call.get("function") or {}
+            name = f"tool.{body.get('name') or call.get('type') or 'call'}"
+            tool_span = _tracer.start_span(name, start_time=int(step["created_at"] * 1e9), attributes=_clean({
+                "agents.step.id": step.get("id"), "agents.step.status": step.get("status"),
+            }))
+            tool_span.end(end_time=int(ended * 1e9))
+
+
+def _clean(attributes: dict) -> dict:
+    return {k: v for k, v in attributes.items() if v is not None}
@@ -0,0 +1,332 @@
+import os
+import re
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+
+# Shared by the Function wrapper and the Foundry client (which adds this directory to sys.path; see its main.py).
+
+# ---------------- redaction ----------------
+
+# Regex-based: catches structured identifiers and labelled names, not free-standing names.
+_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "<EMAIL>"),
+    (re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "<SSN>"),
+    (re.compile(r"(?<!\w)\+?\d[\d ().-]{6,}\d\b"), "<PHONE>"),
+    (re.compile(r"\b\d+\s+(?:[A-Z][a-z]+\s+){1,3}(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Ln|Lane|Dr|Drive|Ct|Court|Way)\b\.?"),
+     "<ADDRESS>"),
+    (re.compile(r"\b\d{3,}\b"), "<NUMBER>"),
+    (re.compile(r"\b((?i:(?:first|last|full|sur)\s*name\s*(?:is|:|=)?|my name is|i am|i'm)\s+)"
+                r"([A-Z][\w'-]+(?:\s+[A-Z][\w'-]+)?)"), r"\1<NAME>"),
+]
+_PLACEHOLDER = re.compile(r"<(?:EMAIL|SSN|PHONE|ADDRESS|NUMBER|NAME)>")
+
+
+def redact(text: str | None) -> str | None:
+    """`text` with emails, phone numbers, SSNs, street addresses, numbers and labelled names replaced."""
+    if not text:
+        return text
+    for pattern, replacement in _PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def redact_arguments(arguments: Any) -> Any:
+    """Tool-call arguments with every value replaced; the keys stay for analysis."""
+    if isinstance(arguments, dict):
+        return {key: redact_arguments(value) for key, value in arguments.items()}
+    if isinstance(arguments, list):
+        return [redact_arguments(value) for value in arguments]
+    if arguments is None or isinstance(arguments, bool):
+        return arguments
+    return "<REDACTED>"
+
+
+def _scrub(entry: dict) -> dict:
+    entry = dict(entry)
+    for field in ("prompt", "answer", "error"):
+        if isinstance(entry.get(field), str):
+            entry[field] = redact(entry[field])
+    entry["tool_calls"] = [{**call, "arguments": redact_arguments(_arguments(call.get("arguments")))}
+                           for call in entry.get("tool_calls") or []]
+    return entry
+
+# ---------------- tool calls ----------------
+
+def _arguments(raw: Any) -> Any:
+    if isinstance(raw, str):
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return raw
+    return raw
+
+
+def tool_calls(steps: list[dict]) -> list[dict]:
+    """Tool calls of a run, oldest first, from the run steps API: name, type, arguments, status, ms."""
+    calls = []
+    for step in sorted(steps, key=lambda s: s.get("created_at") or 0):
+        if step.get("type") != "tool_calls":
+            continue
+        ended = step.get("completed_at") or step.get("failed_at") or step.get("cancelled_at")
+        for call in (step.get("step_details") or {}).get("tool_calls") or []:
+            kind = call.get("type") or "function"
+            body = call.get(kind) or call.get("function") or {}
+            calls.append({
+                "name": body.get("name") or kind,
+                "type": kind,
+                "arguments": _arguments(body.get("arguments")),
+                "status": step.get("status"),
+                "ms": round((ended - step["created_at"]) * 1000.0, 1) if ended and step.get("created_at") else None,
+            })
+    return calls
+
+# ---------------- per-turn notes ----------------
+
+_TURN: ContextVar[dict | None] = ContextVar("transcript_turn", default=None)
+
+
+def note(**fields) -> None:
+    """Add fields to the turn being recorded (no-op when nothing records this turn)."""
+    turn = _TURN.get()
+    if turn is not None:
+        turn.update(fields)
+
+# ---------------- recorder ----------------
+
+_STOP = object()
+
+
+class TranscriptRecorder:
+    """Opt-in per-turn transcripts, written off the request path.
+
+    - `record` only enqueues; a daemon writer builds, redacts and serializes
+      entries in batches, so a turn pays for a queue put and nothing else.
+      An entry may be a callable, to defer building it (parsing bodies) to the writer.
+    - Files are gzip-compressed JSONL, one per process at a time
+      (transcripts-<time>-<pid>-<n>.jsonl.gz). A file is closed at `max_bytes`
+      on disk; opening the next one deletes this process's oldest, so at most
+      `keep_files` per process remain. Other workers' files are never touched.
+    - When the queue is full the entry is dropped and counted, never waited for.
+    """
+
+    PREFIX = "transcripts-"
+    SUFFIX = ".jsonl.gz"
+
+    def __init__(self,
+                 directory: str,
+                 enabled: bool = True,
+                 source: str = "wrapper",
+                 max_bytes: int = 10 * 1024 * 1024,
+                 keep_files: int = 20,
+                 queue_size: int = 10000,
+                 batch_size: int = 256,
+                 clock: Callable[[], float] = time.time):
+        self.directory = directory
+        self.enabled = enabled and bool(directory)
+        self.source = source
+        self.max_bytes = max(1, max_bytes)
+        self.keep_files = max(1, keep_files)
+        self._batch_size = max(1, batch_size)
+        self._clock = clock
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._writer: threading.Thread | None = None
+        self._file = None  # (path, raw file, gzip stream)
+        self._seq = 0
+
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self.files = 0
+
+    @contextmanager
+    def turn(self) -> Iterator[dict | None]:
+        """Collect `note`s for the turn run inside; yields None when recording is off."""
+        if not self.enabled:
+            yield None
+            return
+        fields: dict = {}
+        token = _TURN.set(fields)
+        try:
+            yield fields
+        finally:
+            _TURN.reset(token)
+
+    def record(self, entry: dict | Callable[[], dict]) -> None:
+        """Queue one turn for the writer (dict, or a callable returning it)."""
+        if not self.enabled:
+            return
+        self._start()
+        try:
+            self._queue.put_nowait((self._clock(), entry))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.recorded += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and close the current file."""
+        writer = self._writer
+        if writer is None or not writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        writer.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "queued": self._queue.qsize(),
+                "files": self.files,
+            }
+
+    # ---------------- internals ----------------
+
+    def _start(self) -> None:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._writer = threading.Thread(target=self._loop, name="transcripts", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.close)
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [line for line in map(self._line, (item for item in batch if item is not _STOP)) if line]
+            try:
+                if lines:
+                    self._write(lines)
+            except Exception:
+                with self._lock:
+                    self.errors += len(lines)
+                logging.warning("Could not write %d transcript(s)", len(lines), exc_info=True)
+            if any(item is _STOP for item in batch):
+                self._close_file()
+                return
+
+    def _line(self, item: tuple[float, Any]) -> str | None:
+        ts, entry = item
+        try:
+            entry = entry() if callable(entry) else entry
+            return json.dumps({"ts": round(ts, 3), "source": self.source, **_scrub(entry)},
+                              ensure_ascii=False, default=str)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            logging.warning("Could not build a transcript entry", exc_info=True)
+            return None
+
+    def _write(self, lines: list[str]) -> None:
+        if self._file is None:
+            self._open_file()
+        _, raw, stream = self._file
+        stream.write(("\n".join(lines) + "\n").encode("utf-8"))
+        stream.flush()  # a sync flush: readers see every finished batch
+        with self._lock:
+            self.written += len(lines)
+        if raw.tell() >= self.max_bytes:
+            self._close_file()
+
+    def _open_file(self) -> None:
+        self._prune()
+        self._seq += 1
+        name = f"{self.PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq}{self.SUFFIX}"
+        path = os.path.join(self.directory, name)
+        raw = open(path, "ab")
+        self._file = (path, raw, gzip.GzipFile(fileobj=raw, mode="ab"))
+        with self._lock:
+            self.files += 1
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            _, raw, stream = self._file
+            self._file = None
+            stream.close()
+            raw.close()
+
+    def _prune(self) -> None:
+        # Only this process's files: workers sharing the directory each prune their own
+        pid = str(os.getpid())
+        own = []
+        for path in glob.glob(os.path.join(self.directory, f"{self.PREFIX}*-{pid}-*{self.SUFFIX}")):
+            stamp, file_pid, seq = os.path.basename(path)[len(self.PREFIX):-len(self.SUFFIX)].rsplit("-", 2)
+            if file_pid == pid and seq.isdigit():
+                own.append((stamp, int(seq), path))
+        paths = [path for _, _, path in sorted(own)]
+        for path in paths[:max(0, len(paths) - (self.keep_files - 1))]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# ---------------- reading ----------------
+
+def read(path: str) -> Iterator[dict]:
+    """Transcript entries from a directory of transcript files, or one .jsonl(.gz) file.
+
+    A file still being written (no gzip trailer yet) is read up to its last flushed batch.
+    """
+    if os.path.isdir(path):
+        paths = sorted(glob.glob(os.path.join(path, f"{TranscriptRecorder.PREFIX}*{TranscriptRecorder.SUFFIX}")))
+    else:
+        paths = [path]
+    for file_path in paths:
+        opener = gzip.open if file_path.endswith(".gz") else open
+        with opener(file_path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            except (EOFError, OSError, json.JSONDecodeError):
+                continue  # truncated tail of an open file
+
+
+def conversations(entries: Iterator[dict]) -> list[dict]:
+    """Recorded turns grouped into conversations (one per thread, in time order).
+
+    Same shape as the scripted conversations the batch driver runs:
+    {"id": <thread_id>, "turns": [{"prompt": ..., "expect_tools": [...]}, ...]}.
+    Completed turns carry the tool calls they made as "expect_tools", so a
+    replay checks the tool-call sequence; turns without a thread or prompt are skipped.
+    Prompts are replayed as recorded, i.e. redacted: a turn whose prompt lost an
+    identifier ("employee id <NUMBER>") may rightly call other tools, so it is
+    replayed without a tool check, and a replay is only as faithful as its prompts.
+    """
+    threads: dict[str, list[dict]] = {}
+    for entry in entries:
+        if entry.get("thread_id") and entry.get("prompt"):
+            threads.setdefault(entry["thread_id"], []).append(entry)
+    result = []
+    for thread_id, turns in threads.items():
+        script = []
+        for entry in sorted(turns, key=lambda e: e.get("ts") or 0):
+            turn = {"prompt": entry["prompt"]}
+            if entry.get("status") == "completed" and not _PLACEHOLDER.search(entry["prompt"]):
+                turn["expect_tools"] = [call.get("name") for call in entry.get("tool_calls") or []]
+            script.append(turn)
+        result.append({"id": thread_id, "turns": script})
+    return result
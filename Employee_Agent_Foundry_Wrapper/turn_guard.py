@@ -0,0 +1,441 @@
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, Iterator
+
+# ---------------- errors ----------------
+
+class ThreadBusyError(Exception):
+    """Another turn on the thread did not finish within the wait budget."""
+
+    def __init__(self, thread_id: str, run_id: str | None = None):
+        super().__init__(f"Thread {thread_id} is busy with another run")
+        self.thread_id = thread_id
+        self.run_id = run_id
+
+
+class IdempotencyConflictError(Exception):
+    """An idempotency key was reused for a different prompt or thread."""
+
+# ---------------- stores ----------------
+
+class MemoryTurnStore:
+    """Idempotency records and active runs for this worker process only.
+
+    Records: key -> {"fingerprint","thread_id","run_id","result"}; run_id and
+    result stay None until the turn gets that far.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._keys: dict[str, tuple[float, dict]] = {}
+        self._active: dict[str, tuple[float, str]] = {}
+
+    def claim(self, key: str, record: dict, ttl: float) -> dict | None:
+        """Store `record` under `key` unless a live one exists; return the existing record."""
+        with self._lock:
+            now = self._clock()
+            self._purge(now)
+            existing = self._keys.get(key)
+            if existing is not None:
+                return dict(existing[1])
+            self._keys[key] = (now + ttl, dict(record))
+            return None
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry is None or entry[0] <= self._clock():
+                return None
+            return dict(entry[1])
+
+    def update(self, key: str, ttl: float, **fields) -> None:
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry is not None:
+                self._keys[key] = (self._clock() + ttl, {**entry[1], **fields})
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def active_run(self, thread_id: str) -> str | None:
+        with self._lock:
+            entry = self._active.get(thread_id)
+            if entry is None or entry[0] <= self._clock():
+                return None
+            return entry[1]
+
+    def claim_active(self, thread_id: str, run_id: str, lease: float, replace: str | None = None) -> str | None:
+        """Make `run_id` the thread's active run unless another live one is (or it is `replace`).
+
+        Check and write are one step, so two workers can never both claim a thread.
+        Returns None on success, else the run id holding the thread.
+        """
+        with self._lock:
+            now = self._clock()
+            entry = self._active.get(thread_id)
+            if entry is not None and entry[0] > now and entry[1] != replace:
+                return entry[1]
+            self._active[thread_id] = (now + lease, run_id)
+            return None
+
+    def set_active(self, thread_id: str, run_id: str, lease: float) -> None:
+        with self._lock:
+            self._active[thread_id] = (self._clock() + lease, run_id)
+
+    def clear_active(self, thread_id: str, run_id: str) -> None:
+        with self._lock:
+            if self._active.get(thread_id, (0.0, None))[1] == run_id:
+                del self._active[thread_id]
+
+    def _purge(self, now: float) -> None:
+        for key in [k for k, (expires, _) in self._keys.items() if expires <= now]:
+            del self._keys[key]
+        for thread_id in [t for t, (expires, _) in self._active.items() if expires <= now]:
+            del self._active[thread_id]
+
+
+class SqliteTurnStore:
+    """`MemoryTurnStore` in a SQLite file, shared by every worker on the host.
+
+    Local stand-in for a shared store (Redis, Table storage, ...): anything
+    offering the same eight methods can be plugged into `TurnGuard`.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS turn_keys (key TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS active_runs (thread_id TEXT PRIMARY KEY, run_id TEXT NOT NULL, expires_at REAL NOT NULL)",
+    )
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            self._db.execute(statement)
+
+    def claim(self, key: str, record: dict, ttl: float) -> dict | None:
+        with self._lock:
+            now = self._clock()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("DELETE FROM turn_keys WHERE expires_at <= ?", (now,))
+                self._db.execute("DELETE FROM active_runs WHERE expires_at <= ?", (now,))
+                row = self._db.execute("SELECT record FROM turn_keys WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._db.execute("INSERT INTO turn_keys VALUES (?, ?, ?)", (key, json.dumps(record), now + ttl))
+            finally:
+                self._db.execute("COMMIT")
+            return json.loads(row[0]) if row else None
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT record FROM turn_keys WHERE key = ? AND expires_at > ?",
+                                   (key, self._clock())).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def update(self, key: str, ttl: float, **fields) -> None:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT record FROM turn_keys WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    record = {**json.loads(row[0]), **fields}
+                    self._db.execute("UPDATE turn_keys SET record = ?, expires_at = ? WHERE key = ?",
+                                     (json.dumps(record), self._clock() + ttl, key))
+            finally:
+                self._db.execute("COMMIT")
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM turn_keys WHERE key = ?", (key,))
+
+    def active_run(self, thread_id: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT run_id FROM active_runs WHERE thread_id = ? AND expires_at > ?",
+                                   (thread_id, self._clock())).fetchone()
+            return row[0] if row else None
+
+    def claim_active(self, thread_id: str, run_id: str, lease: float, replace: str | None = None) -> str | None:
+        with self._lock:
+            now = self._clock()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = self._db.execute(
+                    "INSERT INTO active_runs VALUES (?, ?, ?) ON CONFLICT(thread_id) DO UPDATE"
+                    " SET run_id = excluded.run_id, expires_at = excluded.expires_at"
+                    " WHERE active_runs.expires_at <= ? OR active_runs.run_id = ?",
+                    (thread_id, run_id, now + lease, now, replace)).rowcount
+                row = None if claimed else self._db.execute(
+                    "SELECT run_id FROM active_runs WHERE thread_id = ?", (thread_id,)).fetchone()
+            finally:
+                self._db.execute("COMMIT")
+            return row[0] if row else None
+
+    def set_active(self, thread_id: str, run_id: str, lease: float) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO active_runs VALUES (?, ?, ?)",
+                             (thread_id, run_id, self._clock() + lease))
+
+    def clear_active(self, thread_id: str, run_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM active_runs WHERE thread_id = ? AND run_id = ?", (thread_id, run_id))
+
+
+def make_turn_store(spec: str):
+    """TURN_STORE: "memory" (default) or "sqlite:<path>"."""
+    if spec == "memory":
+        return MemoryTurnStore()
+    if spec.startswith("sqlite:"):
+        return SqliteTurnStore(spec[len("sqlite:"):])
+    raise RuntimeError(f"Unknown TURN_STORE '{spec}' (expected 'memory' or 'sqlite:<path>')")
+
+# ---------------- turn guard ----------------
+
+def request_fingerprint(thread_id: str | None, prompt: str) -> str:
+    return hashlib.sha256(f"{thread_id or ''}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class TurnGuard:
+    """Per-thread serialization and idempotent retries for chat turns.
+
+    - Turns on the same thread queue on one in-process lock, shared by the sync
+      and async routes, then claim the thread in the store (`claim_thread`): a
+      single atomic write, so two workers cannot both start a run on it. A run
+      another worker holds the thread with is waited out first.
+    - Until the run exists the claim holds a placeholder id (CLAIM_PREFIX);
+      `started` swaps in the run id, `finished`/`cancelled`/`release` free it.
+    - A request carrying an idempotency key claims it first. A retry with the
+      same key gets the stored result, or attaches to the run the original
+      request started instead of starting a competing one.
+    """
+
+    def __init__(self, store, result_ttl: float = 3600.0, attach_timeout: float = 10.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.store = store
+        self.result_ttl = result_ttl
+        self.attach_timeout = attach_timeout
+        self._sleep = sleep
+
+        self._lock = threading.Lock()
+        self._thread_locks: dict[str, list] = {}  # thread_id -> [threading.Lock, holders]
+
+        self.queued = 0
+        self.busy = 0
+        self.replays = 0
+        self.attaches = 0
+
+    # ---------------- per-thread serialization ----------------
+
+    CLAIM_PREFIX = "claim_"
+    # Async waiters poll the shared lock (an await must not block the worker's loop)
+    ASYNC_POLL = (0.005, 0.05)
+
+    @contextmanager
+    def hold(self, thread_id: str | None, timeout: float) -> Iterator[None]:
+        """Hold the thread's in-process lock (no-op for a conversation not created yet)."""
+        if not thread_id:
+            yield
+            return
+        entry = self._enter(thread_id)
+        try:
+            if not entry[0].acquire(blocking=False):
+                self._count("queued")
+                if not entry[0].acquire(timeout=timeout):
+                    self._count("busy")
+                    raise ThreadBusyError(thread_id, self.store.active_run(thread_id))
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            self._leave(thread_id)
+
+    @asynccontextmanager
+    async def hold_async(self, thread_id: str | None, timeout: float):
+        """`hold` for the async routes: the same lock, so sync and async turns queue together."""
+        if not thread_id:
+            yield
+            return
+        entry = self._enter(thread_id)
+        try:
+            if not entry[0].acquire(blocking=False):
+                self._count("queued")
+                stop_at = time.monotonic() + timeout
+                delay, cap = self.ASYNC_POLL
+                while not entry[0].acquire(blocking=False):
+                    if time.monotonic() >= stop_at:
+                        self._count("busy")
+                        raise ThreadBusyError(thread_id, self.store.active_run(thread_id))
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, cap)
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            self._leave(thread_id)
+
+    def active_run(self, thread_id: str | None) -> str | None:
+        """Run another worker started on the thread and has not finished yet."""
+        return self.store.active_run(thread_id) if thread_id else None
+
+    def claim_thread(self, thread_id: str | None, lease: float, timeout: float,
+                     wait_for: Callable[[str], None]) -> str | None:
+        """Claim the thread for this turn across workers; returns the claim id to pass to `started`.
+
+        A run holding the thread is passed to `wait_for(run_id)`, which returns once it
+        is done (the claim then takes it over) or raises; a claim from a worker still
+        starting its run is retried until `timeout` (ThreadBusyError).
+        """
+        if not thread_id:
+            return None
+        claim, replace = f"{self.CLAIM_PREFIX}{uuid.uuid4().hex}", None
+        stop_at = time.monotonic() + timeout
+        while True:
+            holder = self.store.claim_active(thread_id, claim, lease, replace)
+            if holder is None:
+                return claim
+            if holder.startswith(self.CLAIM_PREFIX):
+                self._check_claim_wait(thread_id, stop_at)
+                self._sleep(0.1)
+                replace = None
+            else:
+                wait_for(holder)
+                replace = holder
+
+    async def claim_thread_async(self, thread_id: str | None, lease: float, timeout: float,
+                                 wait_for: Callable[[str], Awaitable[None]]) -> str | None:
+        """`claim_thread` for the async routes."""
+        if not thread_id:
+            return None
+        claim, replace = f"{self.CLAIM_PREFIX}{uuid.uuid4().hex}", None
+        stop_at = time.monotonic() + timeout
+        while True:
+            holder = self.store.claim_active(thread_id, claim, lease, replace)
+            if holder is None:
+                return claim
+            if holder.startswith(self.CLAIM_PREFIX):
+                self._check_claim_wait(thread_id, stop_at)
+                await asyncio.sleep(0.1)
+                replace = None
+            else:
+                await wait_for(holder)
+                replace = holder
+
+    def release(self, thread_id: str | None, claim: str | None) -> None:
+        """Free a claim whose turn ended before (or without) starting a run."""
+        if thread_id and claim:
+            self.store.clear_active(thread_id, claim)
+
+    # ---------------- idempotency ----------------
+
+    def claim(self, key: str | None, thread_id: str | None, prompt: str) -> dict | None:
+        """Claim `key` for this request; return the original request's record if it exists."""
+        if not key:
+            return None
+        fingerprint = request_fingerprint(thread_id, prompt)
+        record = self.store.claim(key, {"fingerprint": fingerprint, "thread_id": thread_id,
+                                        "run_id": None, "result": None}, self.result_ttl)
+        if record is None:
+            return None
+        if record.get("fingerprint") != fingerprint:
+            raise IdempotencyConflictError("Idempotency key was already used for a different request")
+        self._count("replays" if record.get("result") else "attaches")
+        return record
+
+    def wait_for_run(self, key: str, record: dict) -> dict:
+        """Block until the original request has started its run (or raise ThreadBusyError)."""
+        stop_at = time.monotonic() + self.attach_timeout
+        while not record.get("run_id") and not record.get("result"):
+            if time.monotonic() >= stop_at:
+                raise ThreadBusyError(record.get("thread_id") or "(new)")
+            self._sleep(0.1)
+            record = self.store.get(key) or record
+        return record
+
+    async def wait_for_run_async(self, key: str, record: dict) -> dict:
+        stop_at = time.monotonic() + self.attach_timeout
+        while not record.get("run_id") and not record.get("result"):
+            if time.monotonic() >= stop_at:
+                raise ThreadBusyError(record.get("thread_id") or "(new)")
+            await asyncio.sleep(0.1)
+            record = self.store.get(key) or record
+        return record
+
+    # ---------------- turn lifecycle ----------------
+
+    def started(self, key: str | None, thread_id: str, run_id: str, lease: float) -> None:
+        # The run exists on the backend now: it holds the thread in place of the claim
+        self.store.set_active(thread_id, run_id, lease)
+        if key:
+            self.store.update(key, self.result_ttl, thread_id=thread_id, run_id=run_id)
+
+    def finished(self, key: str | None, thread_id: str, run_id: str, result: dict) -> None:
+        self.store.clear_active(thread_id, run_id)
+        if key:
+            self.store.update(key, self.result_ttl, result=result)
+
+    def cancelled(self, key: str | None, thread_id: str | None, run_id: str | None, lease: float) -> None:
+        """The turn's run is being cancelled: a retry may start a new run, once this one stops.
+
+        The backend answers a cancel with "cancelling" and the run keeps the thread
+        until it ends, so it stays the active run (for `lease` at most): the next
+        claim waits it out instead of posting into a busy thread.
+        """
+        if thread_id and run_id:
+            self.store.set_active(thread_id, run_id, lease)
+        if key:
+            self.store.release(key)
+
+    def abandon(self, key: str | None) -> None:
+        """Drop a claim whose request failed before starting a run, so a retry can start one.
+
+        Once a run exists the claim is kept: a retry attaches to that run.
+        """
+        if key and not (self.store.get(key) or {}).get("run_id"):
+            self.store.release(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "busy": self.busy,
+                "replays": self.replays,
+                "attaches": self.attaches,
+                "locked_threads": len(self._thread_locks),
+            }
+
+    # ---------------- internals ----------------
+
+    def _enter(self, thread_id: str) -> list:
+        with self._lock:
+            entry = self._thread_locks.get(thread_id)
+            if entry is None:
+                entry = self._thread_locks[thread_id] = [threading.Lock(), 0]
+            entry[1] += 1
+            return entry
+
+    def _leave(self, thread_id: str) -> None:
+        with self._lock:
+            entry = self._thread_locks[thread_id]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._thread_locks[thread_id]
+
+    def _check_claim_wait(self, thread_id: str, stop_at: float) -> None:
+        if time.monotonic() >= stop_at:
+            self._count("busy")
+            raise ThreadBusyError(thread_id)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
@@ -16,15 +16,17 @@ namespace Pfizer.EmpInfoUpdate
     public class EmployeeProfileFunction
     {
         private readonly ILogger<EmployeeProfileFunction> _logger;
+        private readonly ValidationCache _validationCache;
         private readonly JsonSerializerOptions _json = new()
         {
             PropertyNamingPolicy = JsonNamingPolicy.CamelCase,
             DefaultIgnoreCondition = System.Text.Json.Serialization.JsonIgnoreCondition.WhenWritingNull
         };
 
-        public EmployeeProfileFunction(ILogger<EmployeeProfileFunction> logger)
+        public EmployeeProfileFunction(ILogger<EmployeeProfileFunction> logger, ValidationCache validationCache)
         {
             _logger = logger;
+            _validationCache = validationCache;
         }
 
         [Function("ValidateEmployeeProfile")]
@@ -55,6 +57,14 @@ namespace Pfizer.EmpInfoUpdate
                     return await CreateErrorResponse(req, combined, 2001, HttpStatusCode.BadRequest);
                 }
 
+                // Returning employees within the TTL skip the stored-procedure round trip
+                if (_validationCache.TryGet(body.employee_id, body.first_name, body.last_name, out var cachedIsValid, out var cachedMessage))
+                {
+                    _logger.LogInformation("Employee profile validation served from cache. Employee ID: {EmployeeId}, Valid: {IsValid}",
+                        body.employee_id, cachedIsValid);
+                    return await CreateValidationResponse(req, cachedIsValid, cachedMessage, cacheStatus: "hit");
+                }
+
                 bool isValid;
                 string validationMessage;
 
@@ -111,16 +121,7 @@ namespace Pfizer.EmpInfoUpdate
                     return await CreateErrorResponse(req, "Database operation timeout", 3005, HttpStatusCode.RequestTimeout);
                 }
 
-                // Create response
-                var validationResponse = new ValidateEmployeeResponse
-                {
-                    IsValid = isValid,
-                    ValidationMessage = validationMessage
-                };
-
-                // Determine status code based on validation result
-                //var statusCode = isValid ? HttpStatusCode.OK : HttpStatusCode.BadRequest;
-                var statusCode = HttpStatusCode.OK;
+                _validationCache.Set(body.employee_id, body.first_name, body.last_name, isValid, validationMessage);
 
                 // Log the result
                 if (isValid)
@@ -134,12 +135,7 @@ namespace Pfizer.EmpInfoUpdate
                         body.employee_id, validationMessage);
                 }
 
-                var response = req.CreateResponse(statusCode);
-                response.Headers.Add("Content-Type", "application/json; charset=utf-8");
-                var responsePayload = JsonSerializer.Serialize(validationResponse, _json);
-                await response.WriteStringAsync(responsePayload);
-
-                return response;
+                return await CreateValidationResponse(req, isValid, validationMessage, cacheStatus: "miss");
             }
             catch (OperationCanceledException ex)
             {
@@ -220,6 +216,9 @@ namespace Pfizer.EmpInfoUpdate
 
                     updateMessage = (outUpdateMessage.Value as string) ?? string.Empty;
                     rowsUpdated = outRowsUpdated.Value is int i ? i : 0;
+
+                    // The profile changed: the next validation for this employee goes to the database
+                    _validationCache.InvalidateEmployee(body.employee_id);
                 }
                 catch (SqlException ex)
                 {
@@ -321,7 +320,8 @@ namespace Pfizer.EmpInfoUpdate
                         body.CheckDatabase,
                         body.IncludeMetrics,
                         body.ClientIdentifier
-                    } : null
+                    } : null,
+                    ValidationCache = body?.IncludeMetrics == true ? _validationCache.GetStats() : null
                 };
 
                 var response = req.CreateResponse(HttpStatusCode.OK);
@@ -388,6 +388,27 @@ namespace Pfizer.EmpInfoUpdate
             }
         }
 
+        private async Task<HttpResponseData> CreateValidationResponse(HttpRequestData req, bool isValid, string validationMessage, string cacheStatus)
+        {
+            var validationResponse = new ValidateEmployeeResponse
+            {
+                IsValid = isValid,
+                ValidationMessage = validationMessage
+            };
+
+            // Determine status code based on validation result
+            //var statusCode = isValid ? HttpStatusCode.OK : HttpStatusCode.BadRequest;
+            var statusCode = HttpStatusCode.OK;
+
+            var response = req.CreateResponse(statusCode);
+            response.Headers.Add("Content-Type", "application/json; charset=utf-8");
+            response.Headers.Add("X-Validation-Cache", cacheStatus);
+            var responsePayload = JsonSerializer.Serialize(validationResponse, _json);
+            await response.WriteStringAsync(responsePayload);
+
+            return response;
+        }
+
         private async Task<HttpResponseData> CreateErrorResponse(HttpRequestData req, string errorMessage, int errorCode, HttpStatusCode statusCode)
         {
             var errorResponse = new ErrorResponse
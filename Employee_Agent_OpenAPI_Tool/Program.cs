@@ -11,4 +11,7 @@ builder.Services
     .AddApplicationInsightsTelemetryWorkerService()
     .ConfigureFunctionsApplicationInsights();
 
+// One validation cache per instance, shared by every invocation
+builder.Services.AddSingleton(_ => Pfizer.EmpInfoUpdate.ValidationCache.FromEnvironment());
+
 builder.Build().Run();
@@ -0,0 +1,224 @@
+using System;
+using System.Collections.Generic;
+using System.Globalization;
+using System.Security.Cryptography;
+using System.Text;
+
+namespace Pfizer.EmpInfoUpdate
+{
+    /// <summary>
+    /// Short-lived, in-memory cache of ValidateEmployeeProfile outcomes, so an employee who comes
+    /// back within minutes is not validated against the database again.
+    /// Entries are keyed by a salted hash (HMAC-SHA256) of (employee_id, first_name, last_name) and hold only
+    /// the boolean result and message; no identity values are kept. Eviction is LRU plus TTL, and
+    /// <see cref="InvalidateEmployee"/> drops every entry for an employee after an update.
+    /// Has no database dependency: the clock is a <see cref="TimeProvider"/>.
+    /// </summary>
+    public sealed class ValidationCache
+    {
+        private sealed class Entry
+        {
+            public required string Key { get; init; }
+            public required string EmployeeKey { get; init; }
+            public required bool IsValid { get; init; }
+            public required string Message { get; init; }
+            public required DateTimeOffset ExpiresAt { get; init; }
+        }
+
+        private readonly object _gate = new();
+        private readonly Dictionary<string, LinkedListNode<Entry>> _entries = new(StringComparer.Ordinal);
+        private readonly Dictionary<string, HashSet<string>> _byEmployee = new(StringComparer.Ordinal);
+        private readonly LinkedList<Entry> _lru = new(); // most recently used first
+        private readonly byte[] _salt;
+        private readonly TimeProvider _clock;
+
+        private long _hits;
+        private long _misses;
+        private long _evictions;
+        private long _expirations;
+        private long _invalidations;
+
+        public ValidationCache(TimeSpan ttl, TimeSpan negativeTtl, int maxEntries, byte[]? salt = null, TimeProvider? clock = null)
+        {
+            Ttl = ttl;
+            NegativeTtl = negativeTtl;
+            MaxEntries = Math.Max(0, maxEntries);
+            // Without a configured salt, a random per-process salt keeps hashes unlinkable across restarts
+            _salt = salt is { Length: > 0 } ? salt : RandomNumberGenerator.GetBytes(32);
+            _clock = clock ?? TimeProvider.System;
+        }
+
+        /// <summary>How long a successful validation is reused.</summary>
+        public TimeSpan Ttl { get; }
+
+        /// <summary>How long a failed validation is reused (zero: never cached).</summary>
+        public TimeSpan NegativeTtl { get; }
+
+        /// <summary>Upper bound on cached outcomes; zero disables the cache.</summary>
+        public int MaxEntries { get; }
+
+        public bool Enabled => MaxEntries > 0 && (Ttl > TimeSpan.Zero || NegativeTtl > TimeSpan.Zero);
+
+        /// <summary>
+        /// Builds the cache from app settings: ValidationCacheTtlSeconds (default 300),
+        /// ValidationCacheNegativeTtlSeconds (default 30), ValidationCacheMaxEntries (default 10000)
+        /// and ValidationCacheSalt (optional; share it across instances only with a shared cache).
+        /// </summary>
+        public static ValidationCache FromEnvironment()
+        {
+            var salt = Environment.GetEnvironmentVariable("ValidationCacheSalt");
+            return new ValidationCache(
+                TimeSpan.FromSeconds(ReadDouble("ValidationCacheTtlSeconds", 300)),
+                TimeSpan.FromSeconds(ReadDouble("ValidationCacheNegativeTtlSeconds", 30)),
+                (int)ReadDouble("ValidationCacheMaxEntries", 10000),
+                string.IsNullOrEmpty(salt) ? null : Encoding.UTF8.GetBytes(salt));
+        }
+
+        public bool TryGet(string employeeId, string firstName, string lastName, out bool isValid, out string message)
+        {
+            isValid = false;
+            message = string.Empty;
+            if (!Enabled)
+            {
+                return false;
+            }
+
+            var key = IdentityKey(employeeId, firstName, lastName);
+            lock (_gate)
+            {
+                if (_entries.TryGetValue(key, out var node))
+                {
+                    if (node.Value.ExpiresAt > _clock.GetUtcNow())
+                    {
+                        _lru.Remove(node);
+                        _lru.AddFirst(node);
+                        _hits++;
+                        isValid = node.Value.IsValid;
+                        message = node.Value.Message;
+                        return true;
+                    }
+                    RemoveLocked(node);
+                    _expirations++;
+                }
+                _misses++;
+                return false;
+            }
+        }
+
+        public void Set(string employeeId, string firstName, string lastName, bool isValid, string message)
+        {
+            var ttl = isValid ? Ttl : NegativeTtl;
+            if (!Enabled || ttl <= TimeSpan.Zero)
+            {
+                return;
+            }
+
+            var entry = new Entry
+            {
+                Key = IdentityKey(employeeId, firstName, lastName),
+                EmployeeKey = EmployeeKey(employeeId),
+                IsValid = isValid,
+                Message = message,
+                ExpiresAt = _clock.GetUtcNow() + ttl
+            };
+            lock (_gate)
+            {
+                if (_entries.TryGetValue(entry.Key, out var existing))
+                {
+                    RemoveLocked(existing);
+                }
+                var node = _lru.AddFirst(entry);
+                _entries[entry.Key] = node;
+                if (!_byEmployee.TryGetValue(entry.EmployeeKey, out var keys))
+                {
+                    _byEmployee[entry.EmployeeKey] = keys = new HashSet<string>(StringComparer.Ordinal);
+                }
+                keys.Add(entry.Key);
+
+                while (_entries.Count > MaxEntries && _lru.Last is { } oldest)
+                {
+                    RemoveLocked(oldest);
+                    _evictions++;
+                }
+            }
+        }
+
+        /// <summary>Drops every cached outcome for the employee (any name spelling); returns how many.</summary>
+        public int InvalidateEmployee(string employeeId)
+        {
+            lock (_gate)
+            {
+                if (!_byEmployee.TryGetValue(EmployeeKey(employeeId), out var keys))
+                {
+                    return 0;
+                }
+                var removed = 0;
+                foreach (var key in keys.ToArray())
+                {
+                    if (_entries.TryGetValue(key, out var node))
+                    {
+                        RemoveLocked(node);
+                        removed++;
+                    }
+                }
+                _invalidations += removed;
+                return removed;
+            }
+        }
+
+        public object GetStats()
+        {
+            lock (_gate)
+            {
+                var lookups = _hits + _misses;
+                return new
+                {
+                    Enabled,
+                    Entries = _entries.Count,
+                    MaxEntries,
+                    TtlSeconds = Ttl.TotalSeconds,
+                    NegativeTtlSeconds = NegativeTtl.TotalSeconds,
+                    Hits = _hits,
+                    Misses = _misses,
+                    HitRate = lookups > 0 ? Math.Round((double)_hits / lookups, 3) : 0.0,
+                    Evictions = _evictions,
+                    Expirations = _expirations,
+                    Invalidations = _invalidations
+                };
+            }
+        }
+
+        private void RemoveLocked(LinkedListNode<Entry> node)
+        {
+            _lru.Remove(node);
+            _entries.Remove(node.Value.Key);
+            if (_byEmployee.TryGetValue(node.Value.EmployeeKey, out var keys))
+            {
+                keys.Remove(node.Value.Key);
+                if (keys.Count == 0)
+                {
+                    _byEmployee.Remove(node.Value.EmployeeKey);
+                }
+            }
+        }
+
+        // Matching in SQL Server is case-insensitive under the default collation, so normalize the same way
+        private static string Normalize(string value) => (value ?? string.Empty).Trim().ToUpperInvariant();
+
+        private string IdentityKey(string employeeId, string firstName, string lastName) =>
+            Hash($"id\u001f{Normalize(employeeId)}\u001f{Normalize(firstName)}\u001f{Normalize(lastName)}");
+
+        private string EmployeeKey(string employeeId) => Hash($"emp\u001f{Normalize(employeeId)}");
+
+        private string Hash(string value)
+        {
+            using var hmac = new HMACSHA256(_salt);
+            return Convert.ToHexString(hmac.ComputeHash(Encoding.UTF8.GetBytes(value)));
+        }
+
+        private static double ReadDouble(string name, double fallback) =>
+            double.TryParse(Environment.GetEnvironmentVariable(name), NumberStyles.Float, CultureInfo.InvariantCulture, out var value)
+                ? value
+                : fallback;
+    }
+}
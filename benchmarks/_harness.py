@@ -0,0 +1,80 @@
+"""Shared plumbing for the benchmarks: load the Function wrapper against a
+fake backend with a fake credential, and invoke its HTTP handlers directly."""
+
+import json
+import os
+import sys
+import time
+import importlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+WRAPPER_DIR = ROOT / "Employee_Agent_Foundry_Wrapper"
+
+
+class FakeAccessToken:
+    def __init__(self, token: str, expires_on: float):
+        self.token = token
+        self.expires_on = expires_on
+
+
+class FakeCredential:
+    """Stands in for DefaultAzureCredential; tokens never need refreshing."""
+
+    def get_token(self, *scopes, **kwargs):
+        return FakeAccessToken("fake-token", time.time() + 3600)
+
+
+class FakeAsyncCredential:
+    """Stands in for azure.identity.aio.DefaultAzureCredential."""
+
+    async def get_token(self, *scopes, **kwargs):
+        return FakeAccessToken("fake-token", time.time() + 3600)
+
+    async def close(self):
+        pass
+
+
+def load_wrapper(base_url: str, **env: str):
+    """Import (or re-import) function_app configured for `base_url`."""
+    # No warm-up thread: it would fetch a real token before the fake credentials are swapped in
+    os.environ.update({"PROJECT_BASE": base_url, "AGENT_ID": "asst_fake", "API_VERSION": "v1",
+                       "WARMUP_ON_LOAD": "false"})
+    os.environ.update(env)
+    if str(WRAPPER_DIR) not in sys.path:
+        sys.path.insert(0, str(WRAPPER_DIR))
+    if "function_app" in sys.modules:
+        sys.modules["function_app"].__dict__.pop("_bench_handlers", None)  # reload keeps the module dict
+        module = importlib.reload(sys.modules["function_app"])
+    else:
+        module = importlib.import_module("function_app")
+    module._TOKEN_CACHE = module.TokenCache(FakeCredential, "https://ai.azure.com/.default")
+    module._ASYNC_TOKEN_CACHE = module.AsyncTokenCache(FakeAsyncCredential, "https://ai.azure.com/.default")
+    return module
+
+
+def handler(module, name: str):
+    """Return the undecorated user function registered under `name`."""
+    # get_functions() re-validates the registry and may only be called once per app
+    handlers = module.__dict__.get("_bench_handlers")
+    if handlers is None:
+        handlers = {fn.get_function_name(): fn.get_user_function() for fn in module.app.get_functions()}
+        module._bench_handlers = handlers
+    return handlers[name]
+
+
+def chat_request(prompt: str, thread_id: str | None = None, headers: dict | None = None,
+                 options: dict | None = None):
+    import azure.functions as func
+
+    body = {"prompt": prompt}
+    if thread_id:
+        body["thread_id"] = thread_id
+    if options:
+        body["options"] = options
+    return func.HttpRequest(
+        method="POST",
+        url="http://localhost/api/chat",
+        headers=headers or {},
+        body=json.dumps(body).encode("utf-8"),
+    )
@@ -0,0 +1,70 @@
+"""Concurrent-turn throughput: sync /api/chat on a bounded thread pool vs /api/chat/async.
+
+The sync handler occupies one worker thread per turn for the whole run, so
+throughput is capped by PYTHON_THREADPOOL_THREAD_COUNT. The async handler only
+holds an event-loop task.
+
+    python benchmarks/bench_async_throughput.py --turns 200 --threads 16 --run-duration 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def run_sync(app, turns: int, threads: int) -> float:
+    chat = handler(app, "chat")
+
+    def one(i: int):
+        resp = chat(chat_request(f"turn {i}"))
+        assert resp.status_code == 200, resp.get_body()
+        assert json.loads(resp.get_body())["status"] == "completed"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(turns)))
+    return time.perf_counter() - started
+
+
+async def run_async(app, turns: int) -> float:
+    chat_async = handler(app, "chat_async")
+
+    async def one(i: int):
+        resp = await chat_async(chat_request(f"turn {i}"))
+        assert resp.status_code == 200, resp.get_body()
+        assert json.loads(resp.get_body())["status"] == "completed"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(turns)))
+    elapsed = time.perf_counter() - started
+    await app._async_backend().close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16, help="sync worker threads (PYTHON_THREADPOOL_THREAD_COUNT)")
+    parser.add_argument("--run-duration", type=float, default=1.0)
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=args.run_duration).start()
+    try:
+        app = load_wrapper(backend.url, PYTHON_THREADPOOL_THREAD_COUNT=str(args.threads))
+        sync_s = run_sync(app, args.turns, args.threads)
+        async_s = asyncio.run(run_async(app, args.turns))
+    finally:
+        backend.stop()
+
+    print(f"{'path':<6} {'turns':>6} {'seconds':>8} {'turns/s':>8}")
+    print(f"{'sync':<6} {args.turns:>6} {sync_s:>8.2f} {args.turns / sync_s:>8.1f}")
+    print(f"{'async':<6} {args.turns:>6} {async_s:>8.2f} {args.turns / async_s:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
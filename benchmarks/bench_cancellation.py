@@ -0,0 +1,90 @@
+"""What a missed deadline or a dropped client leaves behind, with and without run cancellation.
+
+For each CANCEL_RUNS setting: a /api/chat turn whose run outlasts its deadline
+(504 body, runs still active on the backend, time until the same thread takes
+its next turn), then /api/chat/async and /api/chat/stream requests abandoned by
+the client mid-run.
+
+    python benchmarks/bench_cancellation.py --run-duration 3 --deadline 1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+from bench_stream_ttfb import StreamRequest
+
+
+def timed_out_turn(backend: FakeAgentsBackend, app, deadline: float, run_duration: float) -> dict:
+    chat = handler(app, "chat")
+    backend.state.run_duration = run_duration
+    resp = chat(chat_request("slow question", options={"deadline_seconds": deadline}))
+    body = json.loads(resp.get_body())
+    assert resp.status_code == 504 and body["run_id"], (resp.status_code, body)
+    active = backend.stats()["active_runs"]
+
+    # Same thread, a quick run this time: how long until it gets through?
+    backend.state.run_duration = 0.1
+    started = time.perf_counter()
+    follow_up = chat(chat_request("quick question", body["thread_id"], options={"deadline_seconds": run_duration * 2}))
+    return {
+        "status": body["status"],
+        "active_after_504": active,
+        "next_turn_status": json.loads(follow_up.get_body()).get("status") or follow_up.status_code,
+        "next_turn_s": round(time.perf_counter() - started, 2),
+    }
+
+
+async def abandoned_turns(backend: FakeAgentsBackend, app, run_duration: float, give_up_after: float) -> dict:
+    backend.state.run_duration = run_duration
+    chat_async, chat_stream = handler(app, "chat_async"), handler(app, "chat_stream")
+
+    # Async route: the host cancels the invocation when the client goes away
+    task = asyncio.create_task(chat_async(chat_request("abandoned async question")))
+    await asyncio.sleep(give_up_after)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # Streaming route: the client stops reading and the response body is closed
+    resp = await chat_stream(StreamRequest({"prompt": "abandoned streamed question"}))
+    body = resp.body_iterator
+    stop_at = time.monotonic() + give_up_after
+    async for _ in body:
+        if time.monotonic() >= stop_at:
+            break
+    await body.aclose()
+
+    await asyncio.sleep(0.3)  # let the background cancels land
+    await app._async_backend().close()
+    return {"active_after_disconnects": backend.stats()["active_runs"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--run-duration", type=float, default=3.0)
+    parser.add_argument("--deadline", type=float, default=1.0)
+    parser.add_argument("--give-up-after", type=float, default=0.5, help="client disconnects after (s)")
+    args = parser.parse_args()
+
+    print(f"{'CANCEL_RUNS':<12} {'504 status':<12} {'active':>6} {'next turn':>10} {'next_s':>7} "
+          f"{'active after disconnects':>25}  cancellations")
+    for enabled in (False, True):
+        backend = FakeAgentsBackend(run_duration=args.run_duration).start()
+        try:
+            app = load_wrapper(backend.url, CANCEL_RUNS=str(enabled).lower(), THREAD_POOL_SIZE="0",
+                               RUN_POLL_INITIAL_SECONDS="0.05", HTTP_STREAMING="true")
+            sync = timed_out_turn(backend, app, args.deadline, args.run_duration)
+            disconnects = asyncio.run(abandoned_turns(backend, app, args.run_duration, args.give_up_after))
+            stats = app._CANCELLER.stats()
+            print(f"{str(enabled).lower():<12} {sync['status']:<12} {sync['active_after_504']:>6} "
+                  f"{sync['next_turn_status']:>10} {sync['next_turn_s']:>7} "
+                  f"{disconnects['active_after_disconnects']:>25}  {stats['requested']} ok={stats['cancelled']}")
+        finally:
+            backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Cold start: import time of the wrapper and the Foundry client, and time to the first answer.
+
+Each measurement runs in a fresh interpreter. Import times come from
+`python -X importtime` (the report lists the slowest modules by their own
+time), and the SDKs that should load on first use only are checked to be
+absent right after import:
+  wrapper   import function_app (WARMUP_ON_LOAD=false, HTTP_STREAMING off)
+  foundry   import main
+  first     import + first and second /api/chat turn against the fake backend
+
+    python benchmarks/bench_cold_start.py --top 15
+    python benchmarks/bench_cold_start.py --out cold.json
+    python benchmarks/bench_cold_start.py --compare cold.json   # exit 1 on regression
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from _harness import ROOT, WRAPPER_DIR
+from bench_suite import compare
+from fake_agents_backend import FakeAgentsBackend
+
+FOUNDRY_DIR = ROOT / "Employee_Agent_Foundry"
+BENCH_DIR = Path(__file__).resolve().parent
+
+# Modules each target must not import until they are needed
+DEFERRED = {
+    "wrapper": ("requests", "aiohttp", "azure.identity", "azurefunctions.extensions.http.fastapi"),
+    "foundry": ("agent_framework", "azure.ai.agents", "azure.ai.projects", "azure.identity", "dotenv", "requests"),
+}
+
+TARGETS = {
+    "wrapper": (WRAPPER_DIR, "function_app"),
+    "foundry": (FOUNDRY_DIR, "main"),
+}
+
+FIRST_TURN = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {bench!r})
+from _harness import load_wrapper, handler, chat_request
+app = load_wrapper({url!r}, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS="0.02")
+chat = handler(app, "chat")
+imported = time.perf_counter()
+body = json.loads(chat(chat_request("first turn")).get_body())
+first = time.perf_counter()
+chat(chat_request("second turn", body["thread_id"]))
+second = time.perf_counter()
+print(json.dumps({{"status": body["status"], "import_s": imported - started,
+                  "first_s": first - imported, "second_s": second - first}}))
+"""
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 1)
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for each line of an -X importtime report."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile_import(directory: Path, module: str, deferred: tuple[str, ...]) -> dict:
+    """Import `module` once in a fresh interpreter under -X importtime."""
+    probe = (f"import sys, {module}; "
+             f"print(','.join(m for m in {deferred!r} if m in sys.modules))")
+    env = {**os.environ, "WARMUP_ON_LOAD": "false", "HTTP_STREAMING": "false", "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=directory, env=env,
+                          capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    total = next(cumulative for name, _, cumulative in rows if name == module)
+    loaded = proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ""
+    return {"total_us": total, "modules": len(rows), "rows": rows, "loaded": [m for m in loaded.split(",") if m]}
+
+
+def scenario_import(name: str, args) -> dict:
+    directory, module = TARGETS[name]
+    runs = [profile_import(directory, module, DEFERRED[name]) for _ in range(args.runs)]
+    fastest = min(runs, key=lambda r: r["total_us"])
+
+    print(f"\n{name}: import {module}  (fastest of {args.runs}: {fastest['total_us'] / 1000:.0f}ms, "
+          f"{fastest['modules']} modules)")
+    print(f"  {'self_ms':>8} {'cumul_ms':>9}  module")
+    for mod, self_us, cumulative_us in sorted(fastest["rows"], key=lambda r: -r[1])[:args.top]:
+        print(f"  {self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}  {mod}")
+    if fastest["loaded"]:
+        print(f"  loaded at import (should be deferred): {', '.join(fastest['loaded'])}")
+
+    return {
+        "import_ms": ms(statistics.median(r["total_us"] for r in runs) / 1e6),
+        "modules": fastest["modules"],
+        "deferred_loaded": len(fastest["loaded"]),
+    }
+
+
+def scenario_first(args) -> dict:
+    backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency).start()
+    try:
+        samples = []
+        for _ in range(args.runs):
+            proc = subprocess.run([sys.executable, "-c", FIRST_TURN.format(bench=str(BENCH_DIR), url=backend.url)],
+                                  cwd=WRAPPER_DIR, capture_output=True, text=True, timeout=120)
+            if proc.returncode != 0:
+                raise RuntimeError(f"first turn failed:\n{proc.stderr[-2000:]}")
+            sample = json.loads(proc.stdout.strip().splitlines()[-1])
+            assert sample["status"] == "completed", sample
+            samples.append(sample)
+    finally:
+        backend.stop()
+
+    first = statistics.median(s["first_s"] for s in samples)
+    second = statistics.median(s["second_s"] for s in samples)
+    print(f"\nfirst: /api/chat in a fresh worker (median of {args.runs}, run {args.run_duration}s)")
+    print(f"  import {ms(statistics.median(s['import_s'] for s in samples))}ms  "
+          f"first turn {ms(first)}ms  second turn {ms(second)}ms  first-use cost {ms(first - second)}ms")
+    return {
+        "first_turn_ms": ms(first),
+        "second_turn_ms": ms(second),
+        "first_use_ms": ms(first - second),
+    }
+
+
+SCENARIOS = {
+    "wrapper": lambda args: scenario_import("wrapper", args),
+    "foundry": lambda args: scenario_import("foundry", args),
+    "first": scenario_first,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per scenario")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--run-duration", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.005, help="per-request backend round trip (s)")
+    parser.add_argument("--out", help="write the report here (JSON)")
+    parser.add_argument("--compare", metavar="BASELINE", help="report to compare against; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (fraction)")
+    args = parser.parse_args()
+
+    metrics = {}
+    for name in args.scenarios:
+        for key, value in SCENARIOS[name](args).items():
+            metrics[f"{name}.{key}"] = value
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "top")},
+        "metrics": metrics,
+    }
+    print("\n" + json.dumps(metrics, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(metrics, baseline["metrics"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
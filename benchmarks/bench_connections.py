@@ -0,0 +1,85 @@
+"""Connections and requests per chat turn: bare `requests.*` vs the pooled BackendClient.
+
+    python benchmarks/bench_connections.py --turns 20
+"""
+
+import argparse
+import json
+import time
+
+import requests
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def legacy_turn(base: str, thread_id: str | None, prompt: str) -> str:
+    """The pre-pooling call sequence of `chat` (one connection per call)."""
+    params = {"api-version": "v1"}
+    headers = {"Authorization": "Bearer fake-token", "Content-Type": "application/json"}
+    if not thread_id:
+        r = requests.post(f"{base}/threads", params=params, headers=headers, json={})
+        r.raise_for_status()
+        thread_id = r.json()["id"]
+    requests.post(f"{base}/threads/{thread_id}/messages", params=params, headers=headers,
+                  json={"role": "user", "content": prompt}).raise_for_status()
+    r = requests.post(f"{base}/threads/{thread_id}/runs", params=params, headers=headers,
+                      json={"assistant_id": "asst_fake"})
+    r.raise_for_status()
+    run = r.json()
+    status = run["status"]
+    while status in ("queued", "in_progress", "requires_action"):
+        time.sleep(0.9)
+        rr = requests.get(f"{base}/threads/{thread_id}/runs/{run['id']}", params=params, headers=headers)
+        rr.raise_for_status()
+        status = rr.json()["status"]
+    requests.get(f"{base}/threads/{thread_id}/messages", params=params, headers=headers).raise_for_status()
+    return thread_id
+
+
+def run(turns: int, run_duration: float) -> dict:
+    backend = FakeAgentsBackend(run_duration=run_duration).start()
+    try:
+        results = {}
+
+        thread_id = None
+        started = time.perf_counter()
+        for i in range(turns):
+            thread_id = legacy_turn(backend.url, thread_id, f"turn {i}")
+        results["legacy"] = dict(backend.stats(), seconds=round(time.perf_counter() - started, 2))
+
+        backend.reset_counters()
+        app = load_wrapper(backend.url)
+        chat = handler(app, "chat")
+        thread_id = None
+        started = time.perf_counter()
+        for i in range(turns):
+            resp = chat(chat_request(f"turn {i}", thread_id))
+            assert resp.status_code == 200, resp.get_body()
+            thread_id = json.loads(resp.get_body())["thread_id"]
+        results["pooled"] = dict(backend.stats(), seconds=round(time.perf_counter() - started, 2))
+        results["pooled"]["latency"] = app._BACKEND.stats()
+        return results
+    finally:
+        backend.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--run-duration", type=float, default=0.3)
+    args = parser.parse_args()
+
+    results = run(args.turns, args.run_duration)
+    print(f"{'mode':<8} {'turns':>5} {'requests':>9} {'connections':>12} {'conn/turn':>10} {'saved/turn':>11}")
+    legacy_conns = results["legacy"]["connections"]
+    for mode, r in results.items():
+        saved = (legacy_conns - r["connections"]) / args.turns
+        print(f"{mode:<8} {args.turns:>5} {r['total_requests']:>9} {r['connections']:>12} "
+              f"{r['connections'] / args.turns:>10.2f} {saved:>11.2f}")
+    print("\nPer-endpoint latency (pooled):")
+    print(json.dumps(results["pooled"]["latency"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
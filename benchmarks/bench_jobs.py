@@ -0,0 +1,129 @@
+"""Blocking /api/chat vs submit-and-poll /api/chat/jobs for many long runs at once.
+
+/api/chat holds a connection (and a worker thread) per turn for the whole run;
+/api/chat/jobs answers 202 right after the run is created and one background
+poller follows every run, reporting through GET /api/chat/jobs/{id} and a webhook.
+
+    python benchmarks/bench_jobs.py --turns 32 --run-duration 2
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import azure.functions as func
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+class WebhookReceiver:
+    """Collects job callbacks: job id -> (arrival time, body)."""
+
+    def __init__(self):
+        self.received: dict[str, tuple[float, dict]] = {}
+        self.done = threading.Condition()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with receiver.done:
+                    receiver.received[body["id"]] = (time.perf_counter(), body)
+                    receiver.done.notify_all()
+                self.send_response(204)
+                self.end_headers()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        port = self._server.server_address[1]
+        return f"http://localhost:{port}/hook"  # callback hosts must be names, not IPs
+
+    def wait_for(self, count: int, timeout: float) -> None:
+        with self.done:
+            self.done.wait_for(lambda: len(self.received) >= count, timeout)
+
+    def stop(self) -> None:
+        self._server.shutdown()
+
+
+def job_request(prompt: str, callback_url: str):
+    return func.HttpRequest(method="POST", url="http://localhost/api/chat/jobs", headers={},
+                            body=json.dumps({"prompt": prompt, "callback_url": callback_url}).encode("utf-8"))
+
+
+def blocking(app, turns: int) -> dict:
+    chat = handler(app, "chat")
+
+    def one(i: int) -> float:
+        started = time.perf_counter()
+        resp = chat(chat_request(f"please validate employee {i}"))
+        assert json.loads(resp.get_body())["status"] == "completed", resp.get_body()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=turns) as pool:
+        held = list(pool.map(one, range(turns)))
+    return {"request_s": statistics.mean(held), "all_done_s": time.perf_counter() - started}
+
+
+def jobs(app, turns: int, receiver: WebhookReceiver) -> dict:
+    submit, status = handler(app, "chat_jobs"), handler(app, "chat_job")
+    started = time.perf_counter()
+    held, ids = [], []
+    for i in range(turns):
+        began = time.perf_counter()
+        resp = submit(job_request(f"please validate employee {i}", receiver.url))
+        held.append(time.perf_counter() - began)
+        assert resp.status_code == 202, resp.get_body()
+        ids.append(json.loads(resp.get_body())["id"])
+    receiver.wait_for(turns, timeout=60)
+    assert all(receiver.received[j][1]["status"] == "completed" for j in ids), "missing or failed callbacks"
+
+    last = status(func.HttpRequest(method="GET", url=f"http://localhost/api/chat/jobs/{ids[-1]}", headers={},
+                                   body=b"", route_params={"job_id": ids[-1]}))
+    assert json.loads(last.get_body())["result"]["answer"], last.get_body()
+    return {"request_s": statistics.mean(held),
+            "all_done_s": max(receiver.received[j][0] for j in ids) - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=32)
+    parser.add_argument("--run-duration", type=float, default=2.0)
+    parser.add_argument("--latency", type=float, default=0.01, help="per-request backend round trip (s)")
+    args = parser.parse_args()
+
+    receiver = WebhookReceiver()
+    print(f"{'route':<12} {'held/request':>13} {'all done':>9} {'get_run calls':>14}  poller")
+    try:
+        for name in ("chat", "chat/jobs"):
+            backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency).start()
+            try:
+                app = load_wrapper(backend.url, THREAD_POOL_SIZE="0", JOB_CALLBACK_ALLOW_HTTP="true",
+                                   JOB_CALLBACK_HOSTS="localhost", JOB_CALLBACK_ALLOW_PRIVATE="true",
+                                   PYTHON_THREADPOOL_THREAD_COUNT=str(args.turns))
+                result = blocking(app, args.turns) if name == "chat" else jobs(app, args.turns, receiver)
+                poller = app._JOB_POLLER.stats()
+                app._JOB_POLLER.stop()
+                print(f"{name:<12} {result['request_s'] * 1000:>11.0f}ms {result['all_done_s']:>8.2f}s "
+                      f"{backend.stats()['requests'].get('get_run', 0):>14}  "
+                      f"sweeps={poller['sweeps']} largest_batch={poller['largest_batch']}")
+            finally:
+                backend.stop()
+    finally:
+        receiver.stop()
+
+
+if __name__ == "__main__":
+    main()
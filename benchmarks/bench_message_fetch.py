@@ -0,0 +1,47 @@
+"""Per-turn message payload vs thread length: full thread listing vs run-scoped incremental fetch.
+
+    python benchmarks/bench_message_fetch.py --lengths 0 10 50 200 1000
+"""
+
+import argparse
+import json
+
+import requests
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def legacy_fetch_bytes(base: str, thread_id: str) -> int:
+    """What `chat` used to download after every run: the unfiltered message list."""
+    r = requests.get(f"{base}/threads/{thread_id}/messages", params={"api-version": "v1"},
+                     headers={"Authorization": "Bearer fake-token"})
+    r.raise_for_status()
+    return len(r.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[0, 10, 50, 200, 1000],
+                        help="prior exchanges already on the thread")
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=0.05).start()
+    try:
+        app = load_wrapper(backend.url, RUN_POLL_INITIAL_SECONDS="0.05")
+        chat = handler(app, "chat")
+        print(f"{'history':>8} {'legacy_bytes':>13} {'incremental_bytes':>18} {'answer_ok':>10}")
+        for length in args.lengths:
+            thread_id = backend.seed_thread(length)
+            backend.reset_counters()
+            resp = chat(chat_request(f"turn after {length}", thread_id))
+            assert resp.status_code == 200, resp.get_body()
+            incremental = backend.stats()["bytes_out"].get("list_messages", 0)
+            answer_ok = json.loads(resp.get_body())["answer"] == f"echo: turn after {length}"
+            print(f"{length:>8} {legacy_fetch_bytes(backend.url, thread_id):>13} {incremental:>18} {str(answer_ok):>10}")
+    finally:
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
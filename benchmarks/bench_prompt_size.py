@@ -0,0 +1,69 @@
+"""Fixed input tokens per run for the full vs compact instructions, plus an offline tool-call regression replay.
+
+    python benchmarks/bench_prompt_size.py --turns-per-day 20000
+    python benchmarks/bench_prompt_size.py --conversations Employee_Agent_Foundry/conversations.sample.jsonl
+
+The replay drives the scripted conversations through batch_driver against the fake
+backend once per instruction variant. The fake agent calls a tool when the prompt asks
+for it and the variant still directs the call ("Call EmployeeUpdate"), so the replay
+catches a variant that drops or renames a tool. It cannot tell whether the model would
+still follow the variant's rules (phase order, what to ask again): only the same file
+replayed against a real agent (`main.py --batch ...`) validates compact mode.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+
+FOUNDRY_DIR = os.path.join(os.path.dirname(__file__), "..", "Employee_Agent_Foundry")
+sys.path.insert(0, FOUNDRY_DIR)
+
+from instructions import INSTRUCTION_VARIANTS  # noqa: E402
+from prompt_budget import measure_prompt  # noqa: E402
+from fake_agents_backend import FakeAgentsBackend  # noqa: E402
+
+
+def token_table(turns_per_day: int) -> None:
+    full = measure_prompt(INSTRUCTION_VARIANTS["full"])["total_tokens"]
+    print(f"{'mode':<9} {'tokens':>7} {'saved/run':>10} {'saved/day':>11}  tokenizer")
+    for mode, text in INSTRUCTION_VARIANTS.items():
+        m = measure_prompt(text)
+        saved = full - m["total_tokens"]
+        print(f"{mode:<9} {m['total_tokens']:>7} {saved:>10} {saved * turns_per_day:>11}  {m['tokenizer']}")
+
+
+async def replay(path: str, mode: str, run_duration: float) -> dict:
+    from batch_driver import load_conversations, run_batch, JsonlSink, offline_agents_client
+
+    backend = FakeAgentsBackend(run_duration=run_duration, agents={f"asst_{mode}": INSTRUCTION_VARIANTS[mode]}).start()
+    try:
+        out = io.StringIO()
+        async with offline_agents_client(backend.url) as client:
+            summary = await run_batch(client, f"asst_{mode}", load_conversations(path), JsonlSink(out),
+                                      concurrency=4, initial_poll=0.05)
+        mismatches = [r for r in map(json.loads, out.getvalue().splitlines()) if r.get("tools_match") is False]
+        for r in mismatches:
+            print(f"  mismatch {r['conversation']}#{r['turn']}: expected {r['expect_tools']}, got {r.get('tools')}")
+        return {k: summary[k] for k in ("turns", "completed", "tool_calls", "tool_checks", "tool_mismatches")}
+    finally:
+        backend.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns-per-day", type=int, default=10000)
+    parser.add_argument("--conversations", default=os.path.join(FOUNDRY_DIR, "conversations.sample.jsonl"))
+    parser.add_argument("--run-duration", type=float, default=0.1)
+    args = parser.parse_args()
+
+    token_table(args.turns_per_day)
+    print()
+    for mode in INSTRUCTION_VARIANTS:
+        print(f"regression replay ({mode}):", asyncio.run(replay(args.conversations, mode, args.run_duration)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Backend calls per turn: separate thread/message/run requests vs the single-request run start.
+
+    python benchmarks/bench_run_start.py --turns 10
+"""
+
+import argparse
+import json
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+START_ENDPOINTS = ("create_thread", "create_message", "create_run", "create_thread_and_run")
+
+
+def measure(backend: FakeAgentsBackend, mode: str, turns: int) -> dict:
+    """Average calls for a new conversation's first turn and for a follow-up turn."""
+    app = load_wrapper(backend.url, RUN_START_MODE=mode, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS="0.05")
+    chat = handler(app, "chat")
+    counts = {"first": [], "follow_up": []}
+    for i in range(turns):
+        thread_id = None
+        for kind in ("first", "follow_up"):
+            backend.reset_counters()
+            resp = chat(chat_request(f"turn {i} {kind}", thread_id))
+            assert resp.status_code == 200, resp.get_body()
+            body = json.loads(resp.get_body())
+            assert body["answer"] == f"echo: turn {i} {kind}", body
+            thread_id = body["thread_id"]
+            requests = backend.stats()["requests"]
+            counts[kind].append((sum(requests.get(e, 0) for e in START_ENDPOINTS), sum(requests.values())))
+    result = {"probe": app._RUN_STARTER.stats()["combined_supported"]}
+    for kind, samples in counts.items():
+        result[f"{kind}_start"] = sum(s[0] for s in samples) / len(samples)
+        result[f"{kind}_total"] = sum(s[1] for s in samples) / len(samples)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--run-duration", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'mode':<9} {'new:start':>9} {'new:all':>8} {'next:start':>10} {'next:all':>9} {'combined':>9}")
+    for label, combined_runs in (("current", True), ("legacy", False)):
+        backend = FakeAgentsBackend(run_duration=args.run_duration, combined_runs=combined_runs).start()
+        try:
+            for mode in ("separate", "auto"):
+                r = measure(backend, mode, args.turns)
+                print(f"{label:<10} {mode:<9} {r['first_start']:>9.1f} {r['first_total']:>8.1f} "
+                      f"{r['follow_up_start']:>10.1f} {r['follow_up_total']:>9.1f} {str(r['probe']):>9}")
+        finally:
+            backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Turn latency and polls per run: fixed 0.9s poll loop vs the backoff run waiter.
+
+    python benchmarks/bench_run_waiter.py --turns 40 --min-run 0.1 --max-run 3.0
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def measure(waiter: str, url: str, turns: int) -> dict:
+    app = load_wrapper(url, RUN_WAITER=waiter)
+    chat = handler(app, "chat")
+    latencies = []
+    for i in range(turns):
+        started = time.perf_counter()
+        resp = chat(chat_request(f"turn {i}"))
+        latencies.append(time.perf_counter() - started)
+        assert resp.status_code == 200, resp.get_body()
+        assert json.loads(resp.get_body())["status"] == "completed"
+    runs = app._WAIT_METRICS.stats()
+    return {
+        "p50_s": round(percentile(latencies, 0.50), 3),
+        "p95_s": round(percentile(latencies, 0.95), 3),
+        "mean_s": round(statistics.mean(latencies), 3),
+        "polls_per_run": runs["polls_per_run"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--min-run", type=float, default=0.1, help="shortest simulated run (s)")
+    parser.add_argument("--max-run", type=float, default=3.0, help="longest simulated run (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'waiter':<8} {'p50_s':>7} {'p95_s':>7} {'mean_s':>7} {'polls/run':>10}")
+    for waiter in ("fixed", "backoff"):
+        # Same seed -> both waiters see the same sequence of run durations
+        backend = FakeAgentsBackend(run_duration=(args.min_run, args.max_run), seed=args.seed).start()
+        try:
+            r = measure(waiter, backend.url, args.turns)
+        finally:
+            backend.stop()
+        print(f"{waiter:<8} {r['p50_s']:>7} {r['p95_s']:>7} {r['mean_s']:>7} {r['polls_per_run']:>10}")
+
+
+if __name__ == "__main__":
+    main()
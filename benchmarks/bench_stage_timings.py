@@ -0,0 +1,63 @@
+"""Where a turn spends its time: the Server-Timing stage breakdown, and what collecting it costs.
+
+    python benchmarks/bench_stage_timings.py --turns 20 --latency 0.02
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def parse_server_timing(value: str) -> dict[str, tuple[float, int]]:
+    """'name;dur=12.3;desc="x4", ...' -> {name: (ms, count)}"""
+    stages = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        name, *params = part.split(";")
+        fields = dict(p.split("=", 1) for p in params)
+        stages[name] = (float(fields.get("dur", 0)), int(fields.get("desc", '"x1"').strip('"x') or 1))
+    return stages
+
+
+def measure(backend: FakeAgentsBackend, header: bool, turns: int) -> dict:
+    app = load_wrapper(backend.url, TRACE_RESPONSE_HEADER=str(header).lower(), THREAD_POOL_SIZE="0",
+                       RUN_POLL_INITIAL_SECONDS="0.05")
+    chat = handler(app, "chat")
+    latencies, calls, last = [], [], None
+    for i in range(turns):
+        backend.reset_counters()
+        started = time.perf_counter()
+        resp = chat(chat_request(f"please validate me, turn {i}"))
+        latencies.append(time.perf_counter() - started)
+        assert resp.status_code == 200 and json.loads(resp.get_body())["status"] == "completed", resp.get_body()
+        calls.append(backend.stats()["total_requests"])
+        last = resp.headers.get("Server-Timing")
+    return {"mean_ms": round(statistics.mean(latencies) * 1000, 1), "calls": statistics.mean(calls), "last": last}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="per-request backend round trip (s)")
+    parser.add_argument("--run-duration", type=float, default=0.2)
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency).start()
+    try:
+        off = measure(backend, False, args.turns)
+        on = measure(backend, True, args.turns)
+        print(f"{'header':<8} {'mean_ms':>8} {'calls/turn':>11}")
+        print(f"{'off':<8} {off['mean_ms']:>8} {off['calls']:>11.1f}")
+        print(f"{'on':<8} {on['mean_ms']:>8} {on['calls']:>11.1f}")
+        print("\nlast turn, Server-Timing:")
+        for name, (ms, count) in parse_server_timing(on["last"]).items():
+            print(f"  {name:<42} {ms:>8.1f} ms" + (f"  x{count}" if count > 1 else ""))
+    finally:
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Time to first byte / first text: /api/chat (buffered) vs /api/chat/stream (SSE).
+
+    python benchmarks/bench_stream_ttfb.py --turns 10 --run-duration 2.0
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+class StreamRequest:
+    """Just enough of the FastAPI Request the streaming route reads."""
+
+    def __init__(self, body: dict, headers: dict | None = None):
+        self._body = json.dumps(body).encode("utf-8")
+        self.headers = headers or {}
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+async def buffered_turn(chat_async, prompt: str) -> tuple[float, float]:
+    started = time.perf_counter()
+    resp = await chat_async(chat_request(prompt))
+    elapsed = time.perf_counter() - started
+    assert resp.status_code == 200, resp.get_body()
+    return elapsed, elapsed  # first byte == last byte
+
+
+async def streamed_turn(chat_stream, prompt: str) -> tuple[float, float, list[str]]:
+    started = time.perf_counter()
+    resp = await chat_stream(StreamRequest({"prompt": prompt}))
+    first_text, events = None, []
+    async for chunk in resp.body_iterator:
+        event = chunk.decode("utf-8").split("\n", 1)[0].removeprefix("event: ")
+        events.append(event)
+        if event == "delta" and first_text is None:
+            first_text = time.perf_counter() - started
+    total = time.perf_counter() - started
+    assert events[-1] == "done", events
+    return first_text, total, events
+
+
+async def run(url: str, turns: int) -> dict:
+    app = load_wrapper(url, HTTP_STREAMING="true")
+    chat_async, chat_stream = handler(app, "chat_async"), handler(app, "chat_stream")
+    buffered, streamed, events = [], [], []
+    for i in range(turns):
+        prompt = f"please validate and update turn {i}"
+        buffered.append(await buffered_turn(chat_async, prompt))
+        first, total, events = await streamed_turn(chat_stream, prompt)
+        streamed.append((first, total))
+    await app._async_backend().close()
+    return {"buffered": buffered, "streamed": streamed, "events": events}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--run-duration", type=float, default=2.0)
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=args.run_duration).start()
+    try:
+        results = asyncio.run(run(backend.url, args.turns))
+    finally:
+        backend.stop()
+
+    print(f"{'route':<14} {'first_text_s':>13} {'complete_s':>11}")
+    for name in ("buffered", "streamed"):
+        first = statistics.median(r[0] for r in results[name])
+        total = statistics.median(r[1] for r in results[name])
+        print(f"{name:<14} {first:>13.3f} {total:>11.3f}")
+    print("\nstream events (last turn):", " ".join(results["events"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""End-to-end hot-path suite against the fake backend, with a JSON report to compare runs.
+
+Scenarios (all through the wrapper's /api/chat and /api/chat/async handlers):
+  turns       new conversation + follow-up: latency, backend calls and polls per turn
+  history     follow-up on a thread that already holds N exchanges: calls and bytes per turn
+  throughput  turns/s at each concurrency level, sync route and async route
+  faults      failed runs and 429s injected: success rate, p95, client retries
+
+    python benchmarks/bench_suite.py --out baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json          # exit 1 on regression
+    python benchmarks/bench_suite.py --quick --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 1)
+
+
+def calls(stats: dict) -> tuple[int, int]:
+    """(calls other than polls, polls): poll counts move with timing, the rest must not."""
+    polls = stats["requests"].get("get_run", 0)
+    return stats["total_requests"] - polls, polls
+
+
+def post(chat, prompt: str, thread_id: str | None = None) -> tuple[dict, float]:
+    started = time.perf_counter()
+    resp = chat(chat_request(prompt, thread_id))
+    return {"status_code": resp.status_code, **json.loads(resp.get_body())}, time.perf_counter() - started
+
+# ---------------- scenarios ----------------
+
+def scenario_turns(args) -> dict:
+    backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency, seed=args.seed,
+                                tool_duration=args.tool_duration).start()
+    try:
+        app = load_wrapper(backend.url, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS=str(args.poll))
+        chat = handler(app, "chat")
+        samples = {"new": [], "follow_up": []}
+        counts = {"new": [], "follow_up": []}
+        for i in range(args.conversations):
+            thread_id = None
+            for kind, prompt in (("new", f"please validate employee {i}"), ("follow_up", f"update address {i}")):
+                backend.reset_counters()
+                body, elapsed = post(chat, prompt, thread_id)
+                assert body["status"] == "completed", body
+                thread_id = body["thread_id"]
+                samples[kind].append(elapsed)
+                counts[kind].append(calls(backend.stats()))
+        return {
+            f"{kind}.{name}": value
+            for kind in samples
+            for name, value in (("p50_ms", ms(percentile(samples[kind], 0.5))),
+                                ("p95_ms", ms(percentile(samples[kind], 0.95))),
+                                ("calls_per_turn", round(statistics.mean(c for c, _ in counts[kind]), 2)),
+                                ("polls_per_turn", round(statistics.mean(p for _, p in counts[kind]), 2)))
+        }
+    finally:
+        backend.stop()
+
+
+def scenario_history(args) -> dict:
+    backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency, seed=args.seed).start()
+    try:
+        app = load_wrapper(backend.url, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS=str(args.poll))
+        chat = handler(app, "chat")
+        result = {}
+        for size in args.thread_sizes:
+            thread_id = backend.seed_thread(size)
+            backend.reset_counters()
+            body, elapsed = post(chat, "what changed?", thread_id)
+            assert body["status"] == "completed", body
+            stats = backend.stats()
+            result[f"{size}.calls_per_turn"] = calls(stats)[0]
+            result[f"{size}.bytes_per_turn"] = sum(stats["bytes_out"].values())
+            result[f"{size}.latency_ms"] = ms(elapsed)
+        return result
+    finally:
+        backend.stop()
+
+
+def scenario_throughput(args) -> dict:
+    result = {}
+    for level in args.concurrency:
+        turns = max(level * args.turns_per_worker, level)
+        backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency, seed=args.seed).start()
+        try:
+            app = load_wrapper(backend.url, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS=str(args.poll),
+                               PYTHON_THREADPOOL_THREAD_COUNT=str(level))
+            chat = handler(app, "chat")
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=level) as pool:
+                bodies = list(pool.map(lambda i: post(chat, f"turn {i}")[0], range(turns)))
+            sync_s = time.perf_counter() - started
+            assert all(b["status"] == "completed" for b in bodies)
+
+            async def run_async():
+                chat_async = handler(app, "chat_async")
+                semaphore = asyncio.Semaphore(level)
+
+                async def one(i: int):
+                    async with semaphore:
+                        resp = await chat_async(chat_request(f"turn {i}"))
+                        assert json.loads(resp.get_body())["status"] == "completed", resp.get_body()
+
+                began = time.perf_counter()
+                await asyncio.gather(*(one(i) for i in range(turns)))
+                elapsed = time.perf_counter() - began
+                await app._async_backend().close()
+                return elapsed
+
+            async_s = asyncio.run(run_async())
+        finally:
+            backend.stop()
+        result[f"sync.c{level}.turns_per_s"] = round(turns / sync_s, 2)
+        result[f"async.c{level}.turns_per_s"] = round(turns / async_s, 2)
+    return result
+
+
+def scenario_faults(args) -> dict:
+    backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency, seed=args.seed,
+                                failure_rate=args.failure_rate, throttle_rate=args.throttle_rate).start()
+    try:
+        app = load_wrapper(backend.url, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS=str(args.poll))
+        chat = handler(app, "chat")
+        turns = args.conversations * 2
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: post(chat, f"turn {i}"), range(turns)))
+        completed = [elapsed for body, elapsed in results if body.get("status") == "completed"]
+        retries = sum(s["retries"] for s in app._BACKEND.stats().values())
+        return {
+            "completed_rate": round(len(completed) / turns, 3),
+            "p95_ms": ms(percentile(completed, 0.95)),
+            "retries_per_turn": round(retries / turns, 2),
+            "http_errors": sum(1 for body, _ in results if body["status_code"] >= 500),
+        }
+    finally:
+        backend.stop()
+
+
+SCENARIOS = {
+    "turns": scenario_turns,
+    "history": scenario_history,
+    "throughput": scenario_throughput,
+    "faults": scenario_faults,
+}
+
+# ---------------- report ----------------
+
+# Metric name suffix -> True when higher is better
+HIGHER_IS_BETTER = {"turns_per_s": True, "completed_rate": True}
+# Calls per turn must not grow at all; timings, polls and sizes get --tolerance
+EXACT_SUFFIXES = ("calls_per_turn",)
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions of `current` against `baseline` (same metric names only)."""
+    regressions = []
+    print(f"\n{'metric':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, value in current.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        suffix = name.rsplit(".", 1)[-1]
+        change = (value - base) / base if base else 0.0
+        higher_better = HIGHER_IS_BETTER.get(suffix, False)
+        worse = -change if higher_better else change
+        limit = 0.001 if suffix in EXACT_SUFFIXES else tolerance
+        flag = "  REGRESSION" if worse > limit and value != base else ""
+        print(f"{name:<36} {base:>10} {value:>10} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--thread-sizes", type=int, nargs="+", default=[0, 50, 500])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--turns-per-worker", type=int, default=3)
+    parser.add_argument("--run-duration", type=float, default=0.3)
+    parser.add_argument("--tool-duration", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.01, help="per-request backend round trip (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--throttle-rate", type=float, default=0.05)
+    parser.add_argument("--poll", type=float, default=0.05, help="RUN_POLL_INITIAL_SECONDS")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--quick", action="store_true", help="fewer turns, for a smoke run")
+    parser.add_argument("--out", help="write the report here (JSON)")
+    parser.add_argument("--compare", metavar="BASELINE", help="report to compare against; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown for timings (fraction)")
+    args = parser.parse_args()
+    if args.quick:
+        args.conversations, args.turns_per_worker, args.thread_sizes = 4, 1, [0, 200]
+
+    metrics = {}
+    for name in args.scenarios:
+        started = time.perf_counter()
+        for key, value in SCENARIOS[name](args).items():
+            metrics[f"{name}.{key}"] = value
+        print(f"{name:<11} done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "metrics": metrics,
+    }
+    print(json.dumps(metrics, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        same = {k: v for k, v in report["params"].items() if k != "scenarios"}
+        if {k: v for k, v in baseline.get("params", {}).items() if k != "scenarios"} != same:
+            print("note: baseline was taken with different parameters", file=sys.stderr)
+        regressions = compare(metrics, baseline["metrics"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""First-turn latency for new conversations: POST /threads per turn vs the warm thread pool.
+
+    python benchmarks/bench_thread_pool.py --conversations 30 --latency 0.05 --pool-size 4
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def measure(backend: FakeAgentsBackend, pool_size: int, conversations: int, gap: float) -> dict:
+    # Separate start calls: with the single-request start a new conversation costs one call either way
+    app = load_wrapper(backend.url, THREAD_POOL_SIZE=str(pool_size), RUN_START_MODE="separate",
+                       RUN_POLL_INITIAL_SECONDS="0.05")
+    chat = handler(app, "chat")
+    app._THREAD_POOL.take()  # starts the filler; a real worker warms up on its first request
+    time.sleep(gap)
+    backend.reset_counters()
+    latencies = []
+    for i in range(conversations):
+        started = time.perf_counter()
+        resp = chat(chat_request(f"new conversation {i}"))
+        latencies.append(time.perf_counter() - started)
+        assert resp.status_code == 200, resp.get_body()
+        assert json.loads(resp.get_body())["status"] == "completed"
+        time.sleep(gap)  # callers arrive spaced out, giving the filler time to top up
+    pool = app._THREAD_POOL.stats()
+    app._THREAD_POOL.stop(drain=True)
+    return {
+        "p50_s": round(percentile(latencies, 0.50), 3),
+        "p95_s": round(percentile(latencies, 0.95), 3),
+        "mean_s": round(statistics.mean(latencies), 3),
+        "hits": pool["hits"],
+        "misses": pool["misses"],
+    }
+
+
+def check_ttl(backend: FakeAgentsBackend, pool_size: int) -> dict:
+    """Idle pooled threads are deleted on the backend once they outlive the TTL."""
+    app = load_wrapper(backend.url, THREAD_POOL_SIZE=str(pool_size), THREAD_POOL_TTL_SECONDS="1")
+    before = backend.stats()["threads"]
+    app._THREAD_POOL.take()
+    time.sleep(2.5)
+    pool = app._THREAD_POOL.stats()
+    app._THREAD_POOL.stop(drain=True)
+    time.sleep(0.2)
+    return {"expired": pool["expired"], "leaked_threads": backend.stats()["threads"] - before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.05, help="per-request backend round trip (s)")
+    parser.add_argument("--run-duration", type=float, default=0.2)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--gap", type=float, default=0.2, help="pause between new conversations (s)")
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency).start()
+    try:
+        print(f"{'mode':<10} {'p50_s':>7} {'p95_s':>7} {'mean_s':>7} {'hits':>5} {'misses':>7}")
+        for name, size in (("no pool", 0), ("pool", args.pool_size)):
+            r = measure(backend, size, args.conversations, args.gap)
+            print(f"{name:<10} {r['p50_s']:>7} {r['p95_s']:>7} {r['mean_s']:>7} {r['hits']:>5} {r['misses']:>7}")
+        print("\nTTL cleanup:", check_ttl(backend, args.pool_size))
+    finally:
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
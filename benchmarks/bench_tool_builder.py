@@ -0,0 +1,119 @@
+"""Tool build time and spec size for large OpenAPI documents: per-path deepcopy vs single-pass discovery.
+
+    python benchmarks/bench_tool_builder.py --operations 10 100 250 500
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Employee_Agent_Foundry"))
+
+from azure.ai.agents.models import OpenApiTool, OpenApiAuthDetails  # noqa: E402
+from tool_builder import load_tool_specs, build_tool_definitions  # noqa: E402
+
+
+def synthetic_spec(operations: int, shared_schemas: int = 40) -> dict:
+    """`operations` POST endpoints; each references its own request/response plus a few shared schemas."""
+    schemas = {f"Shared{i}": {"type": "object", "properties": {f"f{j}": {"type": "string"} for j in range(8)}}
+               for i in range(shared_schemas)}
+    paths = {}
+    for i in range(operations):
+        schemas[f"Op{i}Request"] = {
+            "type": "object",
+            "properties": {
+                "id": {"type": "string"},
+                "shared": {"$ref": f"#/components/schemas/Shared{i % shared_schemas}"},
+            },
+        }
+        schemas[f"Op{i}Response"] = {
+            "type": "object",
+            "properties": {"ok": {"type": "boolean"},
+                           "detail": {"$ref": f"#/components/schemas/Shared{(i + 1) % shared_schemas}"}},
+        }
+        paths[f"/api/Operation{i}"] = {"post": {
+            "operationId": f"Operation{i}",
+            "tags": ["Bench"],
+            "summary": f"Operation {i}",
+            "description": f"Synthetic operation number {i}",
+            "requestBody": {"content": {"application/json": {"schema": {"$ref": f"#/components/schemas/Op{i}Request"}}}},
+            "responses": {"200": {"description": "OK", "content": {"application/json": {
+                "schema": {"$ref": f"#/components/schemas/Op{i}Response"}}}}},
+        }}
+    return {"openapi": "3.0.1", "info": {"title": "bench", "version": "1"},
+            "servers": [{"url": "https://example.invalid"}], "paths": paths,
+            "components": {"schemas": schemas}}
+
+
+def legacy_build(full_spec: dict, auth) -> tuple[int, list]:
+    """What main.py used to do per tool: deepcopy the whole spec, keep one path."""
+    specs = []
+    tool = None
+    for path in full_spec["paths"]:
+        spec = copy.deepcopy(full_spec)
+        spec["paths"] = {path: full_spec["paths"][path]}
+        specs.append(spec)
+        name = full_spec["paths"][path]["post"]["operationId"]
+        if tool is None:
+            tool = OpenApiTool(name=name, description=name, spec=spec, auth=auth)
+        else:
+            tool.add_definition(name=name, description=name, spec=spec, auth=auth)
+    return len(tool.definitions), specs
+
+
+def timed(fn, repeat: int = 3):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def spec_bytes(specs) -> int:
+    return sum(len(json.dumps(s, separators=(",", ":"))) for s in specs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, nargs="+", default=[10, 100, 250, 500])
+    args = parser.parse_args()
+
+    auth = OpenApiAuthDetails(type="anonymous")
+    print(f"{'ops':>5} {'legacy_ms':>10} {'built_ms':>9} {'memo_ms':>8} "
+          f"{'legacy_KB/tool':>15} {'pruned_KB/tool':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.operations:
+            spec = synthetic_spec(n)
+            memo = os.path.join(tmp, f"tools_{n}.json")
+
+            legacy_ms, (count, legacy_specs) = timed(lambda: legacy_build(spec, auth))
+
+            def cold():
+                if os.path.exists(memo):
+                    os.remove(memo)
+                specs, source = load_tool_specs(spec, memo_path=memo)
+                assert source == "built"
+                return build_tool_definitions(specs, auth), specs
+
+            built_ms, (definitions, specs) = timed(cold)
+            assert len(definitions) == count == n
+
+            def warm():
+                specs, source = load_tool_specs(spec, memo_path=memo)
+                assert source == "memo"
+                return build_tool_definitions(specs, auth)
+
+            memo_ms, _ = timed(warm)
+            print(f"{n:>5} {legacy_ms:>10.1f} {built_ms:>9.1f} {memo_ms:>8.1f} "
+                  f"{spec_bytes(legacy_specs) / n / 1024:>15.1f} "
+                  f"{spec_bytes(s['spec'] for s in specs) / n / 1024:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Runs that stop in requires_action: local tool handlers vs a tool nobody can answer.
+
+The fake backend asks for `lookup_employee` / `get_department` (prompt keywords
+"lookup", "department") halfway through the run. Handlers sleep `--handler-delay`
+to stand in for a cheap lookup; both calls of a turn run concurrently and go back
+in one submit_tool_outputs. "bonus" asks for a tool with no handler: the turn
+fails fast and the run is cancelled instead of waiting out the deadline.
+
+    python benchmarks/bench_tool_dispatch.py --turns 5 --handler-delay 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def register(app, delay: float) -> None:
+    @app._TOOLS.register("lookup_employee")
+    def lookup_employee(employee_id: str) -> dict:
+        time.sleep(delay)
+        return {"employee_id": employee_id, "name": "Jane Doe"}
+
+    @app._TOOLS.register("get_department")
+    async def get_department(employee_id: str) -> str:
+        await asyncio.sleep(delay)
+        return "Finance"
+
+
+def timed(call, *args) -> tuple[int, dict, float]:
+    started = time.perf_counter()
+    resp = call(*args)
+    return resp.status_code, json.loads(resp.get_body()), time.perf_counter() - started
+
+
+async def timed_async(call, *args) -> tuple[int, dict, float]:
+    started = time.perf_counter()
+    resp = await call(*args)
+    return resp.status_code, json.loads(resp.get_body()), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--run-duration", type=float, default=1.0)
+    parser.add_argument("--handler-delay", type=float, default=0.2)
+    parser.add_argument("--deadline", type=float, default=10.0)
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=args.run_duration).start()
+    try:
+        app = load_wrapper(backend.url, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS="0.05")
+        register(app, args.handler_delay)
+        chat, chat_async = handler(app, "chat"), handler(app, "chat_async")
+        options = {"deadline_seconds": args.deadline}
+
+        prompts = [f"lookup employee {1000 + i} and their department" for i in range(args.turns)]
+        rows = {"sync": [], "async": []}
+        for prompt in prompts:
+            status, body, elapsed = timed(chat, chat_request(prompt, options=options))
+            assert status == 200 and "Finance" in body["answer"], body
+            rows["sync"].append(elapsed)
+
+        async def run_async():
+            for prompt in prompts:
+                status, body, elapsed = await timed_async(chat_async, chat_request(prompt, options=options))
+                assert status == 200 and "Jane Doe" in body["answer"], body
+                rows["async"].append(elapsed)
+            await app._async_backend().close()
+
+        asyncio.run(run_async())
+
+        submits = backend.stats()["requests"].get("submit_tool_outputs", 0)
+        print(f"two tools per turn, {args.handler_delay}s each, run {args.run_duration}s (clock stops while waiting)")
+        for name, samples in rows.items():
+            print(f"  {name:<6} mean {statistics.mean(samples):.2f}s")
+        print(f"  submit_tool_outputs calls: {submits} for {2 * args.turns} turns")
+
+        status, body, elapsed = timed(chat, chat_request("what bonus does employee 7 get?", options=options))
+        print(f"\nunknown tool: HTTP {status} after {elapsed:.2f}s (deadline {args.deadline}s): {body['error']}")
+        time.sleep(backend.state.cancel_duration)  # the cancelled run holds its thread while "cancelling"
+        print(f"  backend runs still active: {backend.stats()['active_runs']}")
+        print(f"  tools: {app._TOOLS.stats()}")
+        print(f"  cancellations: {app._CANCELLER.stats()['requested']}")
+    finally:
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
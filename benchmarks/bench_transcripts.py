@@ -0,0 +1,96 @@
+"""What recording transcripts costs a turn, what the store looks like, and a replay of it.
+
+Turns with TRANSCRIPT_DIR off and on (same fake backend), then the store the
+recorded turns produced: files, bytes per turn, compression, and a check that
+no seeded PII survived redaction. Finally the store is replayed in-process
+(replay_transcripts.py) and each turn's tool calls compared with the recording
+(turns whose prompt was redacted replay unchecked).
+
+    python benchmarks/bench_transcripts.py --conversations 20 --max-kb 8
+"""
+
+import argparse
+import glob
+import gzip
+import os
+import re
+import statistics
+import tempfile
+import time
+import json
+from types import SimpleNamespace
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+import replay_transcripts
+
+SCRIPT = (
+    "Hi, I need to check my profile",
+    "Please validate me: employee id {n}, first name Jane, last name Doe",
+    "Update my address to {n} Main St and mail me at jane.doe{n}@contoso.com",
+)
+SEEDED_PII = re.compile(r"Jane|Doe|contoso|Main St|\d{5}")
+
+
+def converse(chat, conversations: int) -> list[float]:
+    latencies = []
+    for i in range(conversations):
+        thread_id = None
+        for prompt in SCRIPT:
+            started = time.perf_counter()
+            resp = chat(chat_request(prompt.format(n=10000 + i), thread_id))
+            latencies.append(time.perf_counter() - started)
+            body = json.loads(resp.get_body())
+            assert body["status"] == "completed", body
+            thread_id = body["thread_id"]
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--run-duration", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.005, help="per-request backend round trip (s)")
+    parser.add_argument("--max-kb", type=float, default=8, help="TRANSCRIPT_MAX_MB, in KB, to force rotation")
+    parser.add_argument("--keep-files", type=int, default=20)
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency).start()
+    try:
+        with tempfile.TemporaryDirectory() as store:
+            print(f"{'recording':<10} {'p50_ms':>7} {'mean_ms':>8} {'calls/turn':>11}")
+            for directory in ("", store):
+                app = load_wrapper(backend.url, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS="0.02",
+                                   TRANSCRIPT_DIR=directory, TRANSCRIPT_MAX_MB=str(args.max_kb / 1024),
+                                   TRANSCRIPT_KEEP_FILES=str(args.keep_files))
+                backend.reset_counters()
+                latencies = converse(handler(app, "chat"), args.conversations)
+                calls = backend.stats()["total_requests"] / len(latencies)
+                print(f"{'on' if directory else 'off':<10} {statistics.median(latencies) * 1000:>7.1f} "
+                      f"{statistics.mean(latencies) * 1000:>8.1f} {calls:>11.1f}")
+            app._TRANSCRIPTS.close()
+            stats = app._TRANSCRIPTS.stats()
+
+            paths = sorted(glob.glob(os.path.join(store, "transcripts-*.jsonl.gz")))
+            compressed = sum(os.path.getsize(p) for p in paths)
+            raw = b"".join(gzip.open(p).read() for p in paths)
+            entries = list(replay_transcripts.transcripts.read(store))
+            leaks = [m.group(0) for e in entries for field in ("prompt", "answer")
+                     for m in SEEDED_PII.finditer(e.get(field) or "")]
+            print(f"\nstore: {len(paths)} file(s) kept, {stats['written']} written, {stats['dropped']} dropped, "
+                  f"{len(entries)} readable")
+            print(f"  {compressed / max(1, len(entries)):.0f} B/turn on disk, {len(raw) / max(1, len(entries)):.0f} B/turn "
+                  f"as JSONL ({len(raw) / max(1, compressed):.1f}x)")
+            print(f"  PII left after redaction: {sorted(set(leaks)) or 'none'}")
+            print(f"  sample: {json.dumps(entries[-1])[:300]}...")
+
+            replay_args = SimpleNamespace(run_duration=args.run_duration, latency=args.latency, poll=0.02,
+                                          concurrency=4, repeat=1)
+            records, wall_s, recorded = replay_transcripts.replay_in_process(store, replay_args)
+            print("\nreplay:", json.dumps(replay_transcripts.summarize(records, wall_s, recorded)))
+    finally:
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Concurrent turns on one thread and retried requests: per-thread queueing and Idempotency-Key replay.
+
+    python benchmarks/bench_turn_guard.py --concurrent 6 --retries 4 --store memory
+    python benchmarks/bench_turn_guard.py --store sqlite:/tmp/turns.sqlite
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _harness import load_wrapper, handler, chat_request
+from fake_agents_backend import FakeAgentsBackend
+
+
+def fire(chat, requests: list[tuple[str, str | None, dict]]) -> list[tuple[int, dict, float]]:
+    """Send all requests at once; return (status, body, seconds) per request."""
+    def one(args):
+        prompt, thread_id, headers = args
+        started = time.perf_counter()
+        resp = chat(chat_request(prompt, thread_id, headers))
+        return resp.status_code, json.loads(resp.get_body()), time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        return list(pool.map(one, requests))
+
+
+def same_thread(backend: FakeAgentsBackend, chat, thread_id: str, concurrent: int) -> dict:
+    """Different prompts racing on one thread: each should be queued, none rejected."""
+    backend.reset_counters()
+    results = fire(chat, [(f"question {i}", thread_id, {}) for i in range(concurrent)])
+    answers_ok = all(body.get("answer") == f"echo: question {i}" for i, (_, body, _) in enumerate(results))
+    return {
+        "ok": sum(1 for status, _, _ in results if status == 200),
+        "failed": sum(1 for status, _, _ in results if status != 200),
+        "answers_ok": answers_ok,
+        "runs": backend.stats()["requests"].get("create_run", 0),
+        "slowest_s": round(max(s for _, _, s in results), 2),
+    }
+
+
+def retries(backend: FakeAgentsBackend, chat, thread_id: str, count: int) -> dict:
+    """One logical request retried `count` times while in flight, then once more after it finished."""
+    backend.reset_counters()
+    headers = {"Idempotency-Key": f"retry-{time.time_ns()}"}
+    results = fire(chat, [("update my phone", thread_id, headers)] * count)
+    late = chat(chat_request("update my phone", thread_id, headers))
+    bodies = [body for _, body, _ in results] + [json.loads(late.get_body())]
+    requests = backend.stats()["requests"]
+    return {
+        "ok": sum(1 for status, _, _ in results if status == 200) + (late.status_code == 200),
+        "runs": sum(n for name, n in requests.items() if name.startswith("create_run")),
+        "same_run": len({b.get("run_id") for b in bodies}) == 1,
+        "conflict_status": chat(chat_request("something else", thread_id, headers)).status_code,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrent", type=int, default=6)
+    parser.add_argument("--retries", type=int, default=4)
+    parser.add_argument("--run-duration", type=float, default=0.3)
+    parser.add_argument("--store", default="memory", help="TURN_STORE for the wrapper")
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=args.run_duration).start()
+    try:
+        app = load_wrapper(backend.url, TURN_STORE=args.store, RUN_POLL_INITIAL_SECONDS="0.05")
+        chat = handler(app, "chat")
+        thread_id = backend.seed_thread(0)
+        print("same thread, different prompts:", same_thread(backend, chat, thread_id, args.concurrent))
+        print("same Idempotency-Key retried:  ", retries(backend, chat, thread_id, args.retries))
+        print("guard:", app._TURNS.stats())
+    finally:
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
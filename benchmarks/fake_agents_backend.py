@@ -0,0 +1,577 @@
+"""Local stand-in for the Azure AI Agents REST endpoints used by the wrapper.
+
+Serves threads / messages / runs over HTTP/1.1 keep-alive and counts both
+requests (per endpoint) and TCP connections, so benchmarks can show how many
+round trips and handshakes a single chat turn costs.
+
+    backend = FakeAgentsBackend(run_duration=0.3).start()
+    ... point PROJECT_BASE at backend.url ...
+    print(backend.stats())
+    backend.stop()
+
+Faults can be injected per run (`failure_rate`: run ends "failed") and per
+request (`throttle_rate`: 429 with Retry-After). Prompts mentioning "validate"
+or "update" make the run call the matching OpenAPI tool, which adds
+`tool_duration` to the run and shows up in its run steps with an output.
+When the agent's instructions are known (`agents`, or a run's `instructions`)
+a tool is only called if they still direct it ("Call EmployeeUpdate"), so an
+instruction variant that drops a tool changes the calls; no other rule in
+the instructions is modelled.
+Prompts mentioning "lookup", "department" or "bonus" make the run stop
+halfway in "requires_action" for the matching function tool until its output
+is submitted (polled runs only). Runs can be cancelled while they work: like
+the real API they stay "cancelling" (still holding the thread) for
+`cancel_duration` before they read "cancelled";
+`stats()["active_runs"]` counts the threads a run is still holding.
+"""
+
+import json
+import re
+import socket
+import threading
+import time
+import random
+import itertools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+# Prompt keyword -> simulated OpenAPI tool call (run steps and streamed runs)
+TOOL_KEYWORDS = (
+    ("validate", "EmployeeValidation_ValidateEmployeeProfile"),
+    ("update", "EmployeeUpdate_UpdateEmployeeProfile"),
+)
+# What the Functions app answers for each tool (see Employee_Agent_OpenAPI_Tool)
+TOOL_OUTPUTS = {
+    "EmployeeValidation_ValidateEmployeeProfile": {"isValid": True, "validationMessage": "Matched in system."},
+    "EmployeeUpdate_UpdateEmployeeProfile": {"rowsUpdated": 1, "message": "Employee profile updated."},
+}
+# Prompt keyword -> function tool the run asks the caller for (status "requires_action")
+FUNCTION_KEYWORDS = (
+    ("lookup", "lookup_employee"),
+    ("department", "get_department"),
+    ("bonus", "calculate_bonus"),
+)
+
+
+class _State:
+    def __init__(self, run_duration: float | tuple[float, float], seed: int | None, latency: float = 0.0,
+                 combined_runs: bool = True, failure_rate: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 0.1, tool_duration: float = 0.0, cancel_duration: float = 0.05):
+        self.run_duration = run_duration
+        self.latency = latency
+        self.combined_runs = combined_runs
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.tool_duration = tool_duration
+        self.cancel_duration = cancel_duration
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.threads: dict[str, list[dict]] = {}
+        self.runs: dict[str, dict] = {}
+        self.last_run: dict[str, str] = {}  # thread -> newest run id
+        self.agents: dict[str, str] = {}  # agent id -> instructions
+        self.requests: dict[str, int] = {}
+        self.bytes_out: dict[str, int] = {}
+        self.connections = 0
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self.ids):06d}"
+
+    def sample_run_duration(self) -> float:
+        if isinstance(self.run_duration, tuple):
+            return self.rng.uniform(*self.run_duration)
+        return self.run_duration
+
+    def count(self, endpoint: str) -> None:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def chance(self, rate: float) -> bool:
+        return rate > 0 and self.rng.random() < rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive unless the client closes
+    server: "_Server"
+
+    ROUTES = [
+        ("POST", re.compile(r"^/threads$"), "create_thread"),
+        ("POST", re.compile(r"^/threads/runs$"), "create_thread_and_run"),
+        ("DELETE", re.compile(r"^/threads/(?P<thread>[^/]+)$"), "delete_thread"),
+        ("POST", re.compile(r"^/threads/(?P<thread>[^/]+)/messages$"), "create_message"),
+        ("GET", re.compile(r"^/threads/(?P<thread>[^/]+)/messages$"), "list_messages"),
+        ("POST", re.compile(r"^/threads/(?P<thread>[^/]+)/runs$"), "create_run"),
+        ("GET", re.compile(r"^/threads/(?P<thread>[^/]+)/runs/(?P<run>[^/]+)$"), "get_run"),
+        ("GET", re.compile(r"^/threads/(?P<thread>[^/]+)/runs/(?P<run>[^/]+)/steps$"), "list_run_steps"),
+        ("POST", re.compile(r"^/threads/(?P<thread>[^/]+)/runs/(?P<run>[^/]+)/cancel$"), "cancel_run"),
+        ("POST", re.compile(r"^/threads/(?P<thread>[^/]+)/runs/(?P<run>[^/]+)/submit_tool_outputs$"),
+         "submit_tool_outputs"),
+    ]
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def log_message(self, *args):  # keep benchmark output clean
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        body = json.loads(raw) if raw else {}
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        for route_method, pattern, endpoint in self.ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                state = self.server.state
+                if state.latency:
+                    time.sleep(state.latency)  # simulated network + service time, per request
+                with state.lock:
+                    state.count(endpoint)
+                    throttled = state.chance(state.throttle_rate)
+                    if throttled:
+                        state.count("throttled")
+                    else:
+                        status, payload = getattr(self, endpoint)(state, body, query, **match.groupdict())
+                if throttled:
+                    return self._send(429, {"error": {"code": "rate_limit_exceeded", "message": "Rate limit is exceeded."}},
+                                      headers={"Retry-After": str(state.retry_after)})
+                if (endpoint in ("create_run", "create_thread_and_run", "submit_tool_outputs")
+                        and body.get("stream") and status == 200):
+                    try:
+                        return self._stream_run(state, payload)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return  # client went away mid-stream
+                return self._send(status, payload, endpoint)
+        self._send(404, {"error": {"message": f"No route for {method} {url.path}"}})
+
+    def _send(self, status: int, payload: dict, endpoint: str | None = None, headers: dict | None = None):
+        data = json.dumps(payload).encode("utf-8")
+        if endpoint:
+            with self.server.state.lock:
+                sent = self.server.state.bytes_out
+                sent[endpoint] = sent.get(endpoint, 0) + len(data)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_run(self, state: _State, run: dict):
+        """Answer `stream: true` run creation with server-sent events, like the real API.
+
+        A run that asks for function tools stops at `thread.run.requires_action`;
+        submit_tool_outputs with `stream: true` streams the rest of it.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def emit(event: str, data):
+            payload = "[DONE]" if data is None else json.dumps(data)
+            self.wfile.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        with state.lock:
+            r = state.runs[run["id"]]
+            thread = r["thread_id"]
+            prompt = _last_prompt(state, thread)
+        resumed = "_outputs" in r
+        if not resumed:
+            emit("thread.run.created", _public(r))
+        r["status"] = "in_progress"
+        emit("thread.run.in_progress", _public(r))
+
+        tools = [] if resumed else r["_tools"]
+        words = _answer(r, prompt).split(" ")
+        pause = r["_duration"] / (len(tools) + len(words) + 1)
+
+        def cancelled() -> bool:
+            if r["status"] not in ("cancelling", "cancelled"):
+                return False
+            emit("thread.run.cancelling", _public(r))
+            time.sleep(max(0.0, r["_cancel_at"] - time.monotonic()))
+            with state.lock:
+                _settle_cancel(r)
+            emit("thread.run.cancelled", _public(r))
+            emit("done", None)
+            return True
+
+        for i, name in enumerate(tools):
+            time.sleep(pause)
+            if cancelled():
+                return
+            emit("thread.run.step.created", _tool_step(r, i, name, "in_progress"))
+        if r["_functions"] and not resumed:
+            time.sleep(pause)
+            with state.lock:
+                _require_action(r)
+            emit("thread.run.requires_action", _public(r))
+            emit("done", None)
+            return
+        for i, word in enumerate(words):
+            time.sleep(pause)
+            if cancelled():
+                return
+            emit("thread.message.delta", {"id": f"msg_{r['id']}", "object": "thread.message.delta",
+                                          "delta": {"content": [{"index": 0, "type": "text",
+                                                                 "text": {"value": word if i == 0 else " " + word}}]}})
+        time.sleep(pause)
+        if cancelled():
+            return
+
+        with state.lock:
+            r["status"] = "completed"
+            r["completed_at"] = int(time.time())
+            state.threads[thread].append(_message(state, thread, "assistant", " ".join(words), run_id=r["id"]))
+        emit("thread.run.completed", _public(r))
+        emit("done", None)
+
+    # ---------------- endpoints (called under state.lock) ----------------
+
+    def delete_thread(self, state, body, query, thread):
+        if state.threads.pop(thread, None) is None:
+            return 404, {"error": {"message": "thread not found"}}
+        return 200, {"id": thread, "object": "thread.deleted", "deleted": True}
+
+    def create_thread(self, state, body, query):
+        thread_id = state.new_id("thread")
+        state.threads[thread_id] = []
+        return 200, {"id": thread_id, "object": "thread", "created_at": int(time.time())}
+
+    def create_message(self, state, body, query, thread):
+        if thread not in state.threads:
+            return 404, {"error": {"message": "thread not found"}}
+        if _active_run(state, thread):
+            return 400, _busy_error(state, thread)
+        message = _message(state, thread, "user", body.get("content", ""))
+        state.threads[thread].append(message)
+        return 200, message
+
+    def list_messages(self, state, body, query, thread):
+        if thread not in state.threads:
+            return 404, {"error": {"message": "thread not found"}}
+        data = state.threads[thread]
+        if query.get("run_id"):
+            data = [m for m in data if m["run_id"] == query["run_id"]]
+        if query.get("order", "desc") == "desc":  # API default order is desc
+            data = list(reversed(data))
+        if query.get("after"):
+            ids = [m["id"] for m in data]
+            data = data[ids.index(query["after"]) + 1:] if query["after"] in ids else data
+        limit = int(query.get("limit", 20))  # API default page size
+        page = data[:limit]
+        return 200, {
+            "object": "list",
+            "data": page,
+            "first_id": page[0]["id"] if page else None,
+            "last_id": page[-1]["id"] if page else None,
+            "has_more": len(data) > limit,
+        }
+
+    def create_thread_and_run(self, state, body, query):
+        if not state.combined_runs:
+            return 404, {"error": {"message": "Resource not found"}}
+        thread = state.new_id("thread")
+        state.threads[thread] = []
+        for m in (body.get("thread") or {}).get("messages") or []:
+            state.threads[thread].append(_message(state, thread, m.get("role", "user"), m.get("content", "")))
+        return self.create_run(state, {k: v for k, v in body.items() if k != "thread"}, query, thread)
+
+    def create_run(self, state, body, query, thread):
+        if thread not in state.threads:
+            return 404, {"error": {"message": "thread not found"}}
+        if _active_run(state, thread):
+            return 400, _busy_error(state, thread)
+        if body.get("additional_messages"):
+            if not state.combined_runs:
+                return 400, {"error": {"message": "Unrecognized request argument: additional_messages"}}
+            for m in body["additional_messages"]:
+                state.threads[thread].append(_message(state, thread, m.get("role", "user"), m.get("content", "")))
+        run = {
+            "id": state.new_id("run"),
+            "object": "thread.run",
+            "thread_id": thread,
+            "assistant_id": body.get("assistant_id"),
+            "status": "queued",
+            "created_at": int(time.time()),
+            "_started": time.monotonic(),
+            "_tools": _tools_for(_last_prompt(state, thread),
+                                 body.get("instructions") or state.agents.get(body.get("assistant_id"))),
+            "_functions": _functions_for(_last_prompt(state, thread)),
+            "_fails": state.chance(state.failure_rate),
+        }
+        run["_duration"] = state.sample_run_duration() + state.tool_duration * len(run["_tools"])
+        state.runs[run["id"]] = run
+        state.last_run[thread] = run["id"]
+        return 200, _public(run)
+
+    def get_run(self, state, body, query, thread, run):
+        r = state.runs.get(run)
+        if not r or r["thread_id"] != thread:
+            return 404, {"error": {"message": "run not found"}}
+        _settle_cancel(r)
+        if r["status"] in ("queued", "in_progress"):
+            if r["_functions"] and "_outputs" not in r and time.monotonic() - r["_started"] >= r["_duration"] / 2:
+                _require_action(r)
+            elif time.monotonic() - r["_started"] >= r["_duration"] and r["_fails"]:
+                r["status"] = "failed"
+                r["failed_at"] = int(time.time())
+                r["last_error"] = {"code": "server_error", "message": "Simulated run failure"}
+            elif time.monotonic() - r["_started"] >= r["_duration"]:
+                r["status"] = "completed"
+                r["completed_at"] = int(time.time())
+                reply = _message(state, thread, "assistant", _answer(r, _last_prompt(state, thread)), run_id=r["id"])
+                state.threads[thread].append(reply)
+            else:
+                r["status"] = "in_progress"
+        return 200, _public(r)
+
+    def list_run_steps(self, state, body, query, thread, run):
+        r = state.runs.get(run)
+        if not r or r["thread_id"] != thread:
+            return 404, {"error": {"message": "run not found"}}
+        status = "completed" if r["status"] == "completed" else "in_progress"
+        data = [_tool_step(r, i, name, status) for i, name in enumerate(r["_tools"])]
+        if query.get("after"):  # the SDK pager keeps asking while last_id is set
+            ids = [s["id"] for s in data]
+            data = data[ids.index(query["after"]) + 1:] if query["after"] in ids else []
+        return 200, {
+            "object": "list",
+            "data": data,
+            "first_id": data[0]["id"] if data else None,
+            "last_id": data[-1]["id"] if data else None,
+            "has_more": False,
+        }
+
+    def submit_tool_outputs(self, state, body, query, thread, run):
+        r = state.runs.get(run)
+        if not r or r["thread_id"] != thread:
+            return 404, {"error": {"message": "run not found"}}
+        if r["status"] != "requires_action":
+            return 400, {"error": {"message": f"Runs in status '{r['status']}' do not accept tool outputs."}}
+        outputs = {o.get("tool_call_id"): o.get("output") for o in body.get("tool_outputs") or []}
+        expected = {call_id for call_id, _, _ in r["_functions"]}
+        if set(outputs) != expected:
+            return 400, {"error": {"message": f"Expected tool outputs for call ids {sorted(expected)}."}}
+        r["_outputs"] = outputs
+        r["_started"] += time.monotonic() - r.pop("_action_at")  # the clock stops while waiting on us
+        r["status"] = "in_progress"
+        r.pop("required_action", None)
+        return 200, _public(r)
+
+    def cancel_run(self, state, body, query, thread, run):
+        r = state.runs.get(run)
+        if not r or r["thread_id"] != thread:
+            return 404, {"error": {"message": "run not found"}}
+        working = r["status"] in ("queued", "in_progress") and time.monotonic() - r["_started"] < r["_duration"]
+        if r["status"] != "requires_action" and not working:
+            self.get_run(state, body, query, thread, run)  # settle it first, like the real API would have
+            return 400, {"error": {"message": f"Cannot cancel run with status '{r['status']}'."}}
+        r["status"] = "cancelling"
+        r["_cancel_at"] = time.monotonic() + state.cancel_duration
+        return 200, _public(r)
+
+
+def _settle_cancel(r: dict) -> None:
+    """A "cancelling" run becomes "cancelled" once its cancel_duration is over."""
+    if r["status"] == "cancelling" and time.monotonic() >= r["_cancel_at"]:
+        r["status"] = "cancelled"
+        r["cancelled_at"] = int(time.time())
+
+
+def _active_run(state: _State, thread: str) -> str | None:
+    """Id of a run still working on `thread` (the real API rejects new messages and runs then)."""
+    r = state.runs.get(state.last_run.get(thread, ""))
+    if r:
+        _settle_cancel(r)
+    if r and r["status"] in ("requires_action", "cancelling"):
+        return r["id"]
+    if r and r["status"] in ("queued", "in_progress") and time.monotonic() - r["_started"] < r["_duration"]:
+        return r["id"]
+    return None
+
+
+def _busy_error(state: _State, thread: str) -> dict:
+    return {"error": {"message": f"Thread {thread} already has an active run {_active_run(state, thread)}."}}
+
+
+def _last_prompt(state: _State, thread: str) -> str:
+    return next((m["content"][0]["text"]["value"] for m in reversed(state.threads[thread])
+                 if m["role"] == "user"), "")
+
+
+def _require_action(run: dict) -> None:
+    """Stop `run` until the caller submits outputs for its function tools."""
+    run["status"] = "requires_action"
+    run["_action_at"] = time.monotonic()
+    run["required_action"] = {"type": "submit_tool_outputs", "submit_tool_outputs": {"tool_calls": [
+        {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+        for call_id, name, args in run["_functions"]]}}
+
+
+def _answer(run: dict, prompt: str) -> str:
+    """The assistant's reply: an echo of the prompt plus every submitted tool output."""
+    return f"echo: {prompt}" + "".join(f" [{name}: {run['_outputs'][call_id]}]"
+                                       for call_id, name, _ in run["_functions"] if call_id in run.get("_outputs", {}))
+
+
+def _tools_for(prompt: str, instructions: str | None = None) -> list[str]:
+    """OpenAPI tools the prompt asks for that the instructions (when known) direct the agent to call."""
+    return [name for keyword, name in TOOL_KEYWORDS if keyword in prompt.lower()
+            and (instructions is None or re.search(rf"\bCall {name.split('_')[0]}\b", instructions))]
+
+
+def _functions_for(prompt: str) -> list[tuple[str, str, dict]]:
+    """(call id, function name, arguments) for each function tool the prompt asks for."""
+    employee = (re.findall(r"\d+", prompt) or ["1001"])[0]
+    return [(f"call_fn_{i}", name, {"employee_id": employee})
+            for i, (keyword, name) in enumerate(FUNCTION_KEYWORDS) if keyword in prompt.lower()]
+
+
+def _tool_step(run: dict, index: int, name: str, status: str) -> dict:
+    return {"id": f"step_{run['id']}_{index}", "object": "thread.run.step", "run_id": run["id"],
+            "thread_id": run["thread_id"], "type": "tool_calls", "status": status,
+            "created_at": run["created_at"], "completed_at": run.get("completed_at") if status == "completed" else None,
+            "step_details": {"type": "tool_calls", "tool_calls": [
+                {"id": f"call_{run['id']}_{index}", "type": "openapi", "function": {
+                    "name": name,
+                    "output": json.dumps(TOOL_OUTPUTS.get(name, {})) if status == "completed" else None,
+                }}]}}
+
+
+def _message(state: _State, thread: str, role: str, text: str, run_id: str | None = None) -> dict:
+    return {
+        "id": state.new_id("msg"),
+        "object": "thread.message",
+        "thread_id": thread,
+        "role": role,
+        "run_id": run_id,
+        "created_at": time.time(),
+        "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+    }
+
+
+def _public(run: dict) -> dict:
+    return {k: v for k, v in run.items() if not k.startswith("_")}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # concurrency benchmarks open hundreds of connections at once
+    state: _State
+
+
+class FakeAgentsBackend:
+    """Runs the fake API on a background thread at `self.url`.
+
+    `run_duration` is either fixed seconds or a (min, max) range sampled per run
+    (reproducibly when `seed` is given). `latency` adds a fixed delay to every
+    request, standing in for the round trip to the real service.
+    `combined_runs=False` emulates an API version without create-thread-and-run
+    or `additional_messages`. `failure_rate` and `throttle_rate` are fractions
+    of runs that fail and of requests answered 429; `tool_duration` is added to a
+    run once per tool it calls, `cancel_duration` is how long a cancelled run
+    stays "cancelling". `agents` maps agent ids to their instructions.
+    """
+
+    def __init__(self, run_duration: float | tuple[float, float] = 0.3,
+                 host: str = "127.0.0.1", port: int = 0, seed: int | None = None, latency: float = 0.0,
+                 combined_runs: bool = True, failure_rate: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 0.1, tool_duration: float = 0.0, cancel_duration: float = 0.05,
+                 agents: dict[str, str] | None = None):
+        self._server = _Server((host, port), _Handler)
+        self._server.state = _State(run_duration, seed, latency, combined_runs, failure_rate, throttle_rate,
+                                    retry_after, tool_duration, cancel_duration)
+        self._server.state.agents.update(agents or {})
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def state(self) -> _State:
+        return self._server.state
+
+    def start(self) -> "FakeAgentsBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self) -> None:
+        with self.state.lock:
+            self.state.requests.clear()
+            self.state.bytes_out.clear()
+            self.state.connections = 0
+
+    def seed_thread(self, turns: int, reply_chars: int = 400) -> str:
+        """Create a thread that already holds `turns` user/assistant exchanges."""
+        state = self.state
+        with state.lock:
+            thread = state.new_id("thread")
+            state.threads[thread] = []
+            for i in range(turns):
+                run_id = state.new_id("run")
+                state.threads[thread].append(_message(state, thread, "user", f"history {i}"))
+                state.threads[thread].append(_message(state, thread, "assistant", "x" * reply_chars, run_id=run_id))
+        return thread
+
+    def stats(self) -> dict:
+        with self.state.lock:
+            return {
+                "connections": self.state.connections,
+                "threads": len(self.state.threads),
+                "active_runs": sum(1 for t in self.state.threads if _active_run(self.state, t)),
+                "requests": dict(self.state.requests),
+                "bytes_out": dict(self.state.bytes_out),
+                "total_requests": sum(self.state.requests.values()),
+            }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake Agents backend")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--run-duration", type=float, default=0.3)
+    parser.add_argument("--latency", type=float, default=0.0, help="added to every request (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of runs that end 'failed'")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--tool-duration", type=float, default=0.0, help="added to a run per tool call (s)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    backend = FakeAgentsBackend(run_duration=args.run_duration, port=args.port, seed=args.seed,
+                                latency=args.latency, failure_rate=args.failure_rate,
+                                throttle_rate=args.throttle_rate, tool_duration=args.tool_duration).start()
+    print(f"Fake Agents backend listening on {backend.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        backend.stop()
@@ -0,0 +1,180 @@
+"""Replay recorded transcripts (TRANSCRIPT_DIR) against a chat endpoint, for regression and load tests.
+
+Every recorded thread is replayed as one conversation on a new thread, turn by
+turn, `--concurrency` conversations at a time (`--repeat` replays each one
+several times for load). Targets:
+  (default)   the wrapper in-process against the fake backend; the replay is
+              recorded too, so each turn's tool calls are checked against the recording
+              (except turns whose prompt redaction changed: see transcripts.conversations)
+  --url       any running /api/chat (func start, a deployed app): status and latency only
+
+    python benchmarks/replay_transcripts.py transcripts/
+    python benchmarks/replay_transcripts.py transcripts/ --url http://localhost:7071/api/chat --concurrency 16 --repeat 5
+
+The Foundry client replays the same store straight against the Agents API, with
+the same tool-call checks: python Employee_Agent_Foundry/main.py --batch transcripts/
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _harness import WRAPPER_DIR, load_wrapper, handler, chat_request
+from bench_suite import percentile, ms
+from fake_agents_backend import FakeAgentsBackend
+
+sys.path.insert(0, str(WRAPPER_DIR))
+import transcripts  # noqa: E402
+
+# ---------------- targets ----------------
+
+def http_target(url: str, timeout: float):
+    import requests
+
+    session = requests.Session()
+
+    def post(prompt: str, thread_id: str | None) -> tuple[int, dict]:
+        body = {"prompt": prompt, **({"thread_id": thread_id} if thread_id else {})}
+        resp = session.post(url, json=body, timeout=timeout)
+        try:
+            return resp.status_code, resp.json()
+        except ValueError:
+            return resp.status_code, {"error": resp.text[:200]}
+
+    return post
+
+
+def wrapper_target(app):
+    chat = handler(app, "chat")
+
+    def post(prompt: str, thread_id: str | None) -> tuple[int, dict]:
+        resp = chat(chat_request(prompt, thread_id))
+        return resp.status_code, json.loads(resp.get_body())
+
+    return post
+
+# ---------------- replay ----------------
+
+def replay_conversation(post, conversation: dict, copy: int) -> list[dict]:
+    records, thread_id = [], None
+    for index, turn in enumerate(conversation["turns"]):
+        started = time.perf_counter()
+        try:
+            http_status, body = post(turn["prompt"], thread_id)
+        except Exception as e:
+            http_status, body = None, {"error": f"{type(e).__name__}: {e}"}
+        record = {
+            "conversation": conversation["id"], "copy": copy, "turn": index,
+            "http_status": http_status, "status": body.get("status") or "error",
+            "run_id": body.get("run_id"), "latency_ms": ms(time.perf_counter() - started),
+        }
+        if "expect_tools" in turn:
+            record["expect_tools"] = turn["expect_tools"]
+        records.append(record)
+        thread_id = body.get("thread_id") or thread_id
+        if record["status"] != "completed":
+            break  # later turns depend on this one
+    return records
+
+
+def check_tools(records: list[dict], replayed: dict[str, list[str]]) -> None:
+    """Compare each turn's tool calls (from the replay's own transcript) with the recording."""
+    for record in records:
+        if "expect_tools" in record and record["run_id"] in replayed:
+            record["tools"] = replayed[record["run_id"]]
+            record["tools_match"] = record["tools"] == record["expect_tools"]
+
+
+def summarize(records: list[dict], wall_s: float, recorded_ms: list[float]) -> dict:
+    latencies = [r["latency_ms"] for r in records]
+    statuses: dict[str, int] = {}
+    for r in records:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    checked = [r for r in records if "tools_match" in r]
+    return {
+        "turns": len(records),
+        "statuses": statuses,
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "recorded_p50_ms": percentile(recorded_ms, 0.5),
+        "recorded_p95_ms": percentile(recorded_ms, 0.95),
+        "turns_per_s": round(len(records) / wall_s, 2) if wall_s else 0.0,
+        "tool_checks": len(checked),
+        "tool_mismatches": sum(1 for r in checked if not r["tools_match"]),
+    }
+
+
+def recorded_latencies(entries: list[dict]) -> list[float]:
+    """Request time of each recorded turn (root stage of the route that served it)."""
+    latencies = []
+    for entry in entries:
+        stages = entry.get("stages") or {}
+        root = stages.get("chat") or stages.get("chat_async") or stages.get("turn")
+        if root:
+            latencies.append(root["ms"])
+    return latencies
+
+
+def replay(path: str, post, concurrency: int, repeat: int) -> tuple[list[dict], float, list[float]]:
+    entries = list(transcripts.read(path))
+    conversations = transcripts.conversations(entries)
+    if not conversations:
+        raise SystemExit(f"No replayable turns in {path}")
+    work = [(conversation, copy) for copy in range(repeat) for conversation in conversations]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        sessions = list(pool.map(lambda item: replay_conversation(post, *item), work))
+    return [r for session in sessions for r in session], time.perf_counter() - started, recorded_latencies(entries)
+
+
+def replay_in_process(path: str, args) -> tuple[list[dict], float, list[float]]:
+    backend = FakeAgentsBackend(run_duration=args.run_duration, latency=args.latency).start()
+    try:
+        with tempfile.TemporaryDirectory() as replay_dir:
+            app = load_wrapper(backend.url, THREAD_POOL_SIZE="0", RUN_POLL_INITIAL_SECONDS=str(args.poll),
+                               PYTHON_THREADPOOL_THREAD_COUNT=str(args.concurrency), TRANSCRIPT_DIR=replay_dir)
+            records, wall_s, recorded = replay(path, wrapper_target(app), args.concurrency, args.repeat)
+            app._TRANSCRIPTS.close()
+            check_tools(records, {e["run_id"]: [c["name"] for c in e.get("tool_calls") or []]
+                                  for e in transcripts.read(replay_dir) if e.get("run_id")})
+        return records, wall_s, recorded
+    finally:
+        backend.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="transcript directory (TRANSCRIPT_DIR) or one .jsonl.gz file")
+    parser.add_argument("--url", help="POST turns to this /api/chat instead of an in-process wrapper")
+    parser.add_argument("--concurrency", type=int, default=4, help="conversations in flight at once")
+    parser.add_argument("--repeat", type=int, default=1, help="replay every conversation this many times")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout with --url (s)")
+    parser.add_argument("--run-duration", type=float, default=0.2, help="fake backend run time (s)")
+    parser.add_argument("--latency", type=float, default=0.01, help="fake backend round trip (s)")
+    parser.add_argument("--poll", type=float, default=0.05, help="RUN_POLL_INITIAL_SECONDS (in-process)")
+    parser.add_argument("--out", help="per-turn results as JSONL")
+    args = parser.parse_args()
+
+    if args.url:
+        records, wall_s, recorded = replay(args.path, http_target(args.url, args.timeout), args.concurrency, args.repeat)
+    else:
+        records, wall_s, recorded = replay_in_process(args.path, args)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+    for r in records:
+        if r.get("tools_match") is False:
+            print(f"  mismatch {r['conversation']}#{r['turn']}: recorded {r['expect_tools']}, replayed {r['tools']}")
+    summary = summarize(records, wall_s, recorded)
+    print(json.dumps(summary, indent=2))
+    if summary["tool_mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Put the wrapper, the Foundry client and the benchmark harness on sys.path.
+
+The wrapper and the Foundry client each deploy as a flat directory of modules,
+so the tests import them the way their hosts do (`import run_waiter`).
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for directory in ("benchmarks", "Employee_Agent_Foundry", "Employee_Agent_Foundry_Wrapper"):
+    path = str(ROOT / directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def load_app():
+    """`_harness.load_wrapper`, with os.environ restored after the test."""
+    from _harness import load_wrapper
+
+    saved = dict(os.environ)
+    yield lambda base_url="http://127.0.0.1:9", **env: load_wrapper(base_url, **env)
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+@pytest.fixture
+def backend():
+    """A running fake Agents API with short runs."""
+    from fake_agents_backend import FakeAgentsBackend
+
+    fake = FakeAgentsBackend(run_duration=0.1).start()
+    yield fake
+    fake.stop()
@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+from agent_registry import AgentRegistry, collect_stale_agents, ensure_agent
+
+
+class FakeAgents:
+    """project_client.agents of an SDK without in-place updates (2.0.0b1): create and delete."""
+
+    def __init__(self, existing=()):
+        self.ids = set(existing)
+        self.deleted = []
+        self._next = 0
+
+    async def create_agent(self, *, model, name, **kwargs):
+        self._next += 1
+        agent = SimpleNamespace(id=f"asst_new{self._next}", name=name, model=model)
+        self.ids.add(agent.id)
+        return agent
+
+    async def delete_agent(self, agent_id):
+        self.deleted.append(agent_id)
+        self.ids.discard(agent_id)
+
+
+def ensure(client, registry, instructions):
+    return asyncio.run(ensure_agent(client, registry, model="gpt-4o", name="EmployeeAssistant",
+                                    description="", instructions=instructions, tools=[]))
+
+
+def test_gc_never_deletes_agents_the_registry_did_not_record(tmp_path):
+    # Same name as ours, created by someone else in the shared project
+    agents = FakeAgents(existing={"asst_teammate"})
+    client = SimpleNamespace(agents=agents)
+    registry = AgentRegistry(str(tmp_path / "registry.json"), "https://project")
+
+    agent, action = ensure(client, registry, "v1")
+    deleted = asyncio.run(collect_stale_agents(client, registry, keep_id=agent.id))
+
+    assert action == "created"
+    assert deleted == [] and agents.deleted == []
+    assert "asst_teammate" in agents.ids
+
+
+def test_gc_deletes_only_superseded_agents(tmp_path):
+    agents = FakeAgents(existing={"asst_teammate"})
+    client = SimpleNamespace(agents=agents)
+    path = str(tmp_path / "registry.json")
+
+    first, _ = ensure(client, AgentRegistry(path, "https://project"), "v1")
+    registry = AgentRegistry(path, "https://project")
+    second, action = ensure(client, registry, "v2")  # no in-place update: created, v1 marked stale
+    deleted = asyncio.run(collect_stale_agents(client, registry, keep_id=second.id))
+
+    assert action == "created"
+    assert deleted == agents.deleted == [first.id]
+    assert registry.stale_ids() == []
+    assert agents.ids == {"asst_teammate", second.id}
+
+
+def test_gc_keeps_stale_ids_that_are_registered_again(tmp_path):
+    client = SimpleNamespace(agents=FakeAgents())
+    registry = AgentRegistry(str(tmp_path / "registry.json"), "https://project")
+    agent, _ = ensure(client, registry, "v1")
+    registry._project()["stale"].append(agent.id)  # e.g. marked stale, then recorded under a new hash
+
+    assert asyncio.run(collect_stale_agents(client, registry, keep_id="asst_other")) == []
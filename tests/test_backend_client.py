@@ -0,0 +1,319 @@
+import asyncio
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from async_backend_client import AsyncBackendClient, BackendTransportError
+from backend_client import BackendClient
+
+
+class SilentServer:
+    """Accepts connections and reads requests but never answers: every call hits the read timeout."""
+
+    def __init__(self):
+        self.connections = 0
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        self._open = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._sock.getsockname()[1]}"
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._open.append(conn)
+
+    def close(self):
+        self._sock.close()
+        for conn in self._open:
+            conn.close()
+
+
+@pytest.fixture
+def silent():
+    server = SilentServer()
+    yield server
+    server.close()
+
+
+async def call_async(url: str, method: str):
+    async def token():
+        return "token"
+
+    client = AsyncBackendClient(url, "v1", token, read_timeout=0.1, max_retries=2, backoff_base=0.01)
+    try:
+        await client.request(method, "/threads/t/runs/r", endpoint="get_run")
+    finally:
+        await client.close()
+
+
+@pytest.mark.parametrize("method, attempts", [("GET", 3), ("DELETE", 3), ("POST", 1)])
+def test_async_read_timeout_is_a_transport_error(silent, method, attempts):
+    with pytest.raises(BackendTransportError) as raised:
+        asyncio.run(call_async(silent.url, method))
+    assert not isinstance(raised.value, TimeoutError)  # routes read TimeoutError as a missed run deadline
+    assert silent.connections == attempts
+
+
+@pytest.mark.parametrize("method, attempts", [("GET", 3), ("POST", 1)])
+def test_sync_read_timeout_retries_idempotent_calls(silent, method, attempts):
+    import requests
+
+    client = BackendClient(silent.url, "v1", lambda: "token", read_timeout=0.1, max_retries=2, backoff_base=0.01)
+    with pytest.raises(requests.Timeout):
+        client.request(method, "/threads/t/runs/r", endpoint="get_run")
+    assert silent.connections == attempts
+
+
+class RotatedTokenServer:
+    """Answers 401 to every token but `accepted`, 200 otherwise."""
+
+    def __init__(self, accepted: str):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.tokens.append(self.headers.get("Authorization"))
+                status = 200 if self.headers.get("Authorization") == f"Bearer {accepted}" else 401
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.tokens = []
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class Credential:
+    """Issues token-1, token-2, ... (each valid for an hour)."""
+
+    def __init__(self):
+        self.issued = 0
+
+    def get_token(self, scope):
+        self.issued += 1
+        return SimpleNamespace(token=f"token-{self.issued}", expires_on=time.time() + 3600)
+
+
+class AsyncCredential(Credential):
+    async def get_token(self, scope):
+        return Credential.get_token(self, scope)
+
+
+@pytest.mark.parametrize("accepted", ["token-2", "never"])
+def test_sync_401_drops_the_cached_token_and_resends_once(accepted):
+    import requests
+    from token_cache import TokenCache
+
+    server = RotatedTokenServer(accepted)
+    cache = TokenCache(Credential, "scope")
+    client = BackendClient(server.url, "v1", cache.get, max_retries=2, on_unauthorized=cache.invalidate)
+    try:
+        if accepted == "never":
+            with pytest.raises(requests.HTTPError):
+                client.request("POST", "/threads", endpoint="create_thread")
+        else:
+            assert client.request("POST", "/threads", endpoint="create_thread") == {}
+    finally:
+        server.close()
+    assert server.tokens == ["Bearer token-1", "Bearer token-2"]  # one resend, not a retry loop
+
+
+@pytest.mark.parametrize("accepted", ["token-2", "never"])
+def test_async_401_drops_the_cached_token_and_resends_once(accepted):
+    from async_backend_client import BackendHTTPError
+    from token_cache import AsyncTokenCache
+
+    async def call():
+        cache = AsyncTokenCache(AsyncCredential, "scope")
+        client = AsyncBackendClient(server.url, "v1", cache.get, max_retries=2, on_unauthorized=cache.invalidate)
+        try:
+            return await client.request("POST", "/threads", endpoint="create_thread")
+        finally:
+            await client.close()
+
+    server = RotatedTokenServer(accepted)
+    try:
+        if accepted == "never":
+            with pytest.raises(BackendHTTPError):
+                asyncio.run(call())
+        else:
+            assert asyncio.run(call()) == {}
+    finally:
+        server.close()
+    assert server.tokens == ["Bearer token-1", "Bearer token-2"]  # one resend, not a retry loop
+
+
+class ScriptedStreamServer:
+    """Answers each connection per `script`: "drop" closes it unanswered, "cut" sends one event then
+    closes mid-body, "stream" sends a whole run. Connections are not kept alive."""
+
+    EVENT = b"event: thread.run.created\ndata: {\"id\": \"run_1\", \"status\": \"queued\"}\n\n"
+
+    def __init__(self, *script: str):
+        self.script = list(script)
+        self.connections = 0
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._sock.getsockname()[1]}"
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with conn:
+                action = self.script[min(self.connections, len(self.script) - 1)]
+                self.connections += 1
+                conn.recv(65536)
+                if action == "drop":
+                    continue
+                conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                             b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+                conn.sendall(self._chunk(self.EVENT))
+                if action == "stream":
+                    conn.sendall(self._chunk(b"event: done\ndata: [DONE]\n\n") + b"0\r\n\r\n")
+
+    @staticmethod
+    def _chunk(data: bytes) -> bytes:
+        return b"%x\r\n%s\r\n" % (len(data), data)
+
+    def close(self):
+        self._sock.close()
+
+
+async def stream_async(url: str, read_timeout: float = 5.0) -> list[str]:
+    async def token():
+        return "token"
+
+    client = AsyncBackendClient(url, "v1", token, read_timeout=read_timeout, max_retries=2, backoff_base=0.01)
+    events = []
+    try:
+        async for event, _ in client.stream_events("POST", "/threads/t/runs", endpoint="create_run_stream",
+                                                   json_body={"stream": True}):
+            events.append(event)
+    finally:
+        await client.close()
+    return events
+
+
+def test_async_stream_resends_a_request_the_backend_dropped_unanswered():
+    server = ScriptedStreamServer("drop", "stream")
+    try:
+        assert asyncio.run(stream_async(server.url)) == ["thread.run.created", "done"]
+    finally:
+        server.close()
+    assert server.connections == 2
+
+
+def test_async_stream_cut_mid_run_is_a_transport_error():
+    server = ScriptedStreamServer("cut", "stream")
+    try:
+        with pytest.raises(BackendTransportError):
+            asyncio.run(stream_async(server.url))
+    finally:
+        server.close()
+    assert server.connections == 1  # the run exists: never started twice
+
+
+def test_async_stream_read_timeout_is_a_transport_error(silent):
+    with pytest.raises(BackendTransportError) as raised:
+        asyncio.run(stream_async(silent.url, read_timeout=0.1))
+    assert not isinstance(raised.value, TimeoutError)  # routes read TimeoutError as a missed run deadline
+    assert silent.connections == 1
+
+
+class IdleClosingServer:
+    """Answers `answered` requests per keep-alive connection, then closes it on the next one unanswered,
+    as a server that timed the idle connection out while the client was reusing it."""
+
+    def __init__(self, answered: int):
+        self.answered = answered
+        self.connections = 0
+        self.requests = 0
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._sock.getsockname()[1]}"
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            with conn, conn.makefile("rb") as reader:
+                for n in range(self.answered + 1):
+                    if not self._read_request(reader):
+                        break
+                    self.requests += 1
+                    if n < self.answered:
+                        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\n{}")
+
+    @staticmethod
+    def _read_request(reader) -> bool:
+        length = 0
+        for line in iter(reader.readline, b""):
+            if line == b"\r\n":
+                reader.read(length)
+                return True
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        return False
+
+    def close(self):
+        self._sock.close()
+
+
+@pytest.mark.parametrize("answered, succeeds", [(1, True), (0, False)])
+def test_sync_post_resends_once_on_a_dropped_connection(answered, succeeds):
+    import requests
+
+    server = IdleClosingServer(answered)
+    client = BackendClient(server.url, "v1", lambda: "token", max_retries=3, backoff_base=0.01)
+    try:
+        for _ in range(answered):
+            client.post("/threads", endpoint="create_thread")  # leaves a pooled connection behind
+        if succeeds:
+            assert client.post("/threads", endpoint="create_thread") == {}
+        else:
+            with pytest.raises(requests.ConnectionError):
+                client.post("/threads", endpoint="create_thread")
+    finally:
+        client.close()
+        server.close()
+    # answered: the stale connection, then a new one. never answered: two drops, not a retry loop
+    assert (server.connections, server.requests) == ((2, 3) if succeeds else (2, 2))
@@ -0,0 +1,38 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def instant_backend():
+    """A fake backend of its own whose runs are over by the first poll: no timing in the outcome."""
+    from fake_agents_backend import FakeAgentsBackend
+
+    fake = FakeAgentsBackend(run_duration=0.0, seed=0).start()
+    yield fake
+    fake.stop()
+
+
+def test_offline_batch_keeps_stdout_for_jsonl(instant_backend, capsys, monkeypatch, tmp_path):
+    pytest.importorskip("azure.ai.agents")
+    import config
+    import main
+
+    # Nothing recorded or read from the developer's transcript store or .env
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("TRANSCRIPT_DIR", raising=False)
+    monkeypatch.setattr(config, "_SETTINGS", None)
+
+    args = main.parse_args(["--batch", str(ROOT / "Employee_Agent_Foundry" / "conversations.sample.jsonl"),
+                            "--offline-endpoint", instant_backend.url, "--out", "-", "--concurrency", "1"])
+    asyncio.run(main.main(args))
+    out, err = capsys.readouterr()
+
+    records = [json.loads(line) for line in out.splitlines()]
+    assert [r["status"] for r in records] == ["completed"] * 6, records
+    assert all(r["tools_match"] for r in records if "tools_match" in r), records
+    assert "Running 3 conversation(s)" in err and "Batch summary" in err
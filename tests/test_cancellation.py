@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from _harness import handler, chat_request
+from cancellation import RunCanceller, RunTimeoutError
+
+
+class SlowBackend:
+    """Accepts every cancel after `delay` seconds; records how many were in flight at once."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def post(self, path, body, *, endpoint):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return {"status": "cancelling"}
+
+
+def canceller_with(runs: int) -> RunCanceller:
+    canceller = RunCanceller()
+    for i in range(runs):
+        canceller.add(f"thread_{i}", f"run_{i}")
+    return canceller
+
+
+def test_timeout_payload_reports_a_cancel_in_progress():
+    assert RunTimeoutError("t", "r", 30, cancelled=True).payload()["status"] == "cancelling"
+    assert RunTimeoutError("t", "r", 30, cancelled=False).payload()["status"] == "in_progress"
+
+
+def test_shutdown_cancels_runs_concurrently():
+    backend = SlowBackend(delay=0.2)
+    started = time.monotonic()
+    assert canceller_with(10).cancel_in_flight(backend, timeout=5) == 10
+    assert time.monotonic() - started < 1.0  # 10 sequential cancels would take 2s
+    assert backend.peak == 10
+
+
+def test_shutdown_cancels_are_bounded_in_total():
+    backend = SlowBackend(delay=2.0)
+    started = time.monotonic()
+    assert canceller_with(40).cancel_in_flight(backend, timeout=0.2) == 0
+    assert time.monotonic() - started < 0.5
+    assert backend.peak == RunCanceller.SHUTDOWN_WORKERS
+
+
+@pytest.fixture
+def slow_backend():
+    from fake_agents_backend import FakeAgentsBackend
+
+    # Runs outlast the deadline; a cancelled run stays "cancelling" for a while, as on the real API
+    fake = FakeAgentsBackend(run_duration=2.0, cancel_duration=0.3).start()
+    yield fake
+    fake.stop()
+
+
+def test_turn_after_a_timeout_waits_out_the_cancelling_run(load_app, slow_backend):
+    app = load_app(slow_backend.url, RUN_POLL_INITIAL_SECONDS="0.02", RUN_POLL_MAX_SECONDS="0.05")
+    chat = handler(app, "chat")
+
+    resp = chat(chat_request("slow", options={"deadline_seconds": 0.3}))
+    timed_out = json.loads(resp.get_body())
+    assert resp.status_code == 504 and timed_out["status"] == "cancelling"
+    assert slow_backend.state.runs[timed_out["run_id"]]["status"] == "cancelling"
+
+    slow_backend.state.run_duration = 0.05
+    resp = chat(chat_request("again", timed_out["thread_id"]))
+    body = json.loads(resp.get_body())
+    assert resp.status_code == 200 and body["status"] == "completed", body
+    assert slow_backend.state.runs[timed_out["run_id"]]["status"] == "cancelled"
+
+
+def test_async_turn_after_a_timeout_waits_out_the_cancelling_run(load_app, slow_backend):
+    app = load_app(slow_backend.url, RUN_POLL_INITIAL_SECONDS="0.02", RUN_POLL_MAX_SECONDS="0.05")
+    chat = handler(app, "chat_async")
+
+    async def turns():
+        try:
+            first = await chat(chat_request("slow", options={"deadline_seconds": 0.3}))
+            slow_backend.state.run_duration = 0.05
+            timed_out = json.loads(first.get_body())
+            second = await chat(chat_request("again", timed_out["thread_id"]))
+            return first, second
+        finally:
+            await app._async_backend().close()
+
+    first, second = asyncio.run(turns())
+    assert first.status_code == 504 and json.loads(first.get_body())["status"] == "cancelling"
+    assert second.status_code == 200 and json.loads(second.get_body())["status"] == "completed"
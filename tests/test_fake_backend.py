@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+from _harness import handler, chat_request
+
+PROMPT = "Please validate me (employee 12345) and update my address"
+
+
+@pytest.mark.parametrize("instructions, tools", [
+    (None, ["EmployeeValidation_ValidateEmployeeProfile", "EmployeeUpdate_UpdateEmployeeProfile"]),
+    ("Call EmployeeValidation: {...}\nCall EmployeeUpdate: {...}",
+     ["EmployeeValidation_ValidateEmployeeProfile", "EmployeeUpdate_UpdateEmployeeProfile"]),
+    ("Call EmployeeValidation: {...}\nUpdates are out of scope.", ["EmployeeValidation_ValidateEmployeeProfile"]),
+])
+def test_tool_calls_follow_the_agent_instructions(load_app, backend, instructions, tools):
+    if instructions is not None:
+        backend.state.agents["asst_fake"] = instructions
+    app = load_app(backend.url, RUN_POLL_INITIAL_SECONDS="0.02")
+    body = json.loads(handler(app, "chat")(chat_request(PROMPT)).get_body())
+
+    assert body["status"] == "completed"
+    assert backend.state.runs[body["run_id"]]["_tools"] == tools
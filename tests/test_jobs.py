@@ -0,0 +1,206 @@
+import json
+import sys
+import time
+
+import pytest
+
+import jobs
+from jobs import callback_url_error, post_callback
+
+HOSTS = ["hooks.example.com", "*.contoso.com"]
+
+
+@pytest.mark.parametrize("url", [
+    "https://hooks.example.com/done",
+    "https://api.contoso.com/jobs?x=1",
+    "https://a.b.contoso.com:8443/",
+])
+def test_callback_url_allowed(url):
+    assert callback_url_error(url, HOSTS) is None
+
+
+@pytest.mark.parametrize("url, reason", [
+    ("http://hooks.example.com/done", "https"),
+    ("ftp://hooks.example.com/done", "https"),
+    ("https:///done", "https"),
+    ("https://hooks.example.com:99999/", "https"),
+    ("https://[::1/", "https"),
+    ("https://127.0.0.1/", "IP address"),
+    ("https://169.254.169.254/latest/meta-data", "IP address"),
+    ("https://[::1]:8080/", "IP address"),
+    ("https://evil.com/", "not allowed"),
+    ("https://hooks.example.com.evil.com/", "not allowed"),
+    ("https://hooks.example.com@evil.com/", "not allowed"),
+    ("https://contoso.com.evil.com/", "not allowed"),
+    ("https://evilcontoso.com/", "not allowed"),
+])
+def test_callback_url_refused(url, reason):
+    assert reason in callback_url_error(url, HOSTS)
+
+
+def test_callback_url_http_opt_in():
+    assert callback_url_error("http://hooks.example.com/", HOSTS, allow_http=True) is None
+
+
+class FakeRequests:
+    RequestException = OSError
+
+    def __init__(self):
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return type("Response", (), {"status_code": 204})()
+
+
+@pytest.fixture
+def fake_requests(monkeypatch):
+    fake = FakeRequests()
+    monkeypatch.setitem(sys.modules, "requests", fake)
+    return fake
+
+
+def test_post_callback_skips_private_addresses(fake_requests):
+    delivery = post_callback("https://localhost/hook", {"id": "job_1"})
+    assert delivery == {"delivered": False, "attempts": 0, "status_code": None}
+    assert fake_requests.calls == []
+
+
+def test_post_callback_does_not_follow_redirects(fake_requests, monkeypatch):
+    monkeypatch.setattr(jobs, "_private_address", lambda host: None)
+    delivery = post_callback("https://hooks.example.com/done", {"id": "job_1"})
+    assert delivery["delivered"] is True
+    assert fake_requests.calls[0][1]["allow_redirects"] is False
+
+
+def job_get(job_id, headers=None):
+    import azure.functions as func
+
+    return func.HttpRequest(method="GET", url=f"http://localhost/api/chat/jobs/{job_id}", headers=headers or {},
+                            body=b"", route_params={"job_id": job_id})
+
+
+def test_job_status_requires_api_key(load_app):
+    from _harness import handler
+
+    get = handler(load_app(REQUIRE_X_API_KEY="true", X_API_KEY="secret"), "chat_job")
+    assert get(job_get("job_x")).status_code == 401
+    assert get(job_get("job_x", {"x-api-key": "wrong"})).status_code == 401
+    assert get(job_get("job_x", {"x-api-key": "secret"})).status_code == 404
+
+
+class FlakyStore(jobs.MemoryJobStore):
+    """Fails the first `failures` updates."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def update(self, job_id, ttl, **fields):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("store unavailable")
+        return super().update(job_id, ttl, **fields)
+
+
+def run_sequence(*statuses):
+    remaining = list(statuses)
+    return lambda thread_id, run_id: {"id": run_id, "status": remaining.pop(0) if len(remaining) > 1 else remaining[0]}
+
+
+def watch(poller, store, deadline=5.0):
+    job = jobs.new_job("thread_1", "run_1", "queued", deadline)
+    store.create(job, 60)
+    poller.watch(job, iter(lambda: 0.01, None), deadline)
+    return job
+
+
+def wait_done(done, count=1, timeout=5.0):
+    limit = time.monotonic() + timeout
+    while len(done) < count and time.monotonic() < limit:
+        time.sleep(0.01)
+    return done
+
+
+def test_poller_survives_a_failing_job():
+    store, done = FlakyStore(failures=1), []
+    poller = jobs.RunPoller(store, run_sequence("in_progress", "completed"), lambda job, run: done.append(run))
+    try:
+        watch(poller, store)
+        assert wait_done(done) == [{"id": "run_1", "status": "completed"}]
+        assert poller.stats()["errors"] == 1
+        assert poller._thread.is_alive()
+    finally:
+        poller.stop()
+
+
+def test_poller_times_out_a_job_that_keeps_failing():
+    store, done = FlakyStore(failures=10 ** 6), []
+    flips = iter(lambda: ["in_progress", "queued"], None)
+    statuses = (status for pair in flips for status in pair)  # every poll is a status change to store
+    poller = jobs.RunPoller(store, lambda thread_id, run_id: {"status": next(statuses)},
+                            lambda job, run: done.append(run))
+    try:
+        watch(poller, store, deadline=0.1)
+        assert [run["status"] for run in wait_done(done)] == ["timeout"]
+    finally:
+        poller.stop()
+
+
+def test_watch_restarts_a_dead_poller_thread():
+    store, done = jobs.MemoryJobStore(), []
+    poller = jobs.RunPoller(store, run_sequence("completed"), lambda job, run: done.append(run))
+    try:
+        watch(poller, store)
+        wait_done(done)
+        with poller._cond:
+            poller._stopped = True  # let the loop exit, as if the thread had died
+            poller._cond.notify_all()
+        poller._thread.join(1)
+        poller._stopped = False
+        watch(poller, store)
+        assert len(wait_done(done, 2)) == 2
+    finally:
+        poller.stop()
+
+
+def wait_for_job(get, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = json.loads(get(job_get(job_id)).get_body())
+        if job["status"] not in ("queued", "in_progress", "requires_action"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def test_job_runs_to_completed(load_app, backend):
+    from _harness import handler, chat_request
+
+    app = load_app(backend.url, RUN_POLL_INITIAL_SECONDS="0.02")
+    resp = handler(app, "chat_jobs")(chat_request("hello"))
+    job = json.loads(resp.get_body())
+    assert resp.status_code == 202 and job["status"] == "queued" and job["result"] is None
+    assert resp.headers["Location"] == f"/api/chat/jobs/{job['id']}"
+
+    done = wait_for_job(handler(app, "chat_job"), job["id"])
+    assert done["status"] == "completed" and done["error"] is None
+    assert done["result"]["answer"] == "echo: hello" and done["result"]["run_id"] == job["run_id"]
+
+
+def test_job_past_its_deadline_times_out_and_cancels_the_run(load_app):
+    from _harness import handler, chat_request
+    from fake_agents_backend import FakeAgentsBackend
+
+    slow = FakeAgentsBackend(run_duration=5).start()
+    try:
+        app = load_app(slow.url, RUN_POLL_INITIAL_SECONDS="0.02")
+        options = {"deadline_seconds": 0.3, "max_poll_seconds": 0.05}
+        job = json.loads(handler(app, "chat_jobs")(chat_request("slow", options=options)).get_body())
+
+        done = wait_for_job(handler(app, "chat_job"), job["id"])
+        assert done["status"] == "timeout"
+        assert done["error"]["status"] == "cancelling" and done["error"]["run_id"] == job["run_id"]
+        assert slow.state.runs[job["run_id"]]["status"] in ("cancelling", "cancelled")
+    finally:
+        slow.stop()
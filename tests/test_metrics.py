@@ -0,0 +1,21 @@
+import json
+
+from _harness import handler
+
+
+def metrics_get(headers=None):
+    import azure.functions as func
+
+    return func.HttpRequest(method="GET", url="http://localhost/api/metrics", headers=headers or {}, body=b"")
+
+
+def test_metrics_requires_api_key(load_app):
+    get = handler(load_app(REQUIRE_X_API_KEY="true", X_API_KEY="secret"), "metrics")
+    assert get(metrics_get()).status_code == 401
+    assert get(metrics_get({"x-api-key": "wrong"})).status_code == 401
+    resp = get(metrics_get({"x-api-key": "secret"}))
+    assert resp.status_code == 200 and "token" in json.loads(resp.get_body())
+
+
+def test_metrics_open_without_api_key_gate(load_app):
+    assert handler(load_app(REQUIRE_X_API_KEY="false"), "metrics")(metrics_get()).status_code == 200
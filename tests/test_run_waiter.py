@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from run_waiter import WaitPolicy
+
+
+@pytest.mark.parametrize("value", ["NaN", "nan", "inf", "-Infinity", float("nan"), float("inf")])
+@pytest.mark.parametrize("key", list(WaitPolicy.OPTIONS))
+def test_with_options_rejects_non_finite(key, value):
+    with pytest.raises(ValueError, match="finite"):
+        WaitPolicy().with_options({key: value})
+
+
+def test_with_options_rejects_non_numbers():
+    with pytest.raises(ValueError, match="must be a number"):
+        WaitPolicy().with_options({"deadline_seconds": "soon"})
+
+
+@pytest.mark.parametrize("name", ["deadline", "initial_delay", "max_delay", "multiplier", "client_min_delay"])
+def test_policy_rejects_non_finite(name):
+    with pytest.raises(ValueError):
+        WaitPolicy(**{name: float("nan")})
+
+
+def test_client_poll_intervals_are_floored():
+    policy = WaitPolicy(initial_delay=0.05, client_min_delay=0.5).with_options(
+        {"initial_poll_seconds": 0.001, "max_poll_seconds": 0})
+    assert policy.initial_delay == 0.5
+    assert policy.max_delay == 0.5
+    assert min(policy.delays().__next__() for _ in range(20)) >= 0.5 * (1 - policy.jitter)
+
+
+def test_server_poll_interval_is_not_floored():
+    # The operator's own settings may poll faster than callers are allowed to
+    policy = WaitPolicy(initial_delay=0.05, client_min_delay=0.5)
+    assert policy.initial_delay == 0.05
+    assert policy.with_options({"deadline_seconds": 30}).initial_delay == 0.05
+
+
+def test_chat_returns_400_for_nan_option(load_app):
+    from _harness import handler, chat_request
+
+    resp = handler(load_app(), "chat")(chat_request("hi", options={"deadline_seconds": float("nan")}))
+    assert resp.status_code == 400
+    assert "finite" in json.loads(resp.get_body())["error"]
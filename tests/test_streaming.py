@@ -0,0 +1,105 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from _harness import handler
+from bench_stream_ttfb import StreamRequest
+
+
+async def stream(app, prompt: str) -> list[tuple[str, dict]]:
+    resp = await handler(app, "chat_stream")(StreamRequest({"prompt": prompt}))
+    events = []
+    async for chunk in resp.body_iterator:
+        head, data = chunk.decode("utf-8").strip().split("\n", 1)
+        events.append((head.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    await app._async_backend().close()
+    return events
+
+
+def test_stream_answers_function_tools(load_app, backend):
+    app = load_app(backend.url, HTTP_STREAMING="true")
+    app._TOOLS.register("lookup_employee", lambda employee_id: {"name": f"employee {employee_id}"})
+
+    events = asyncio.run(stream(app, "lookup employee 42"))
+
+    statuses = [data["status"] for event, data in events if event == "run"]
+    assert statuses == ["queued", "in_progress", "requires_action", "in_progress", "completed"]
+    event, done = events[-1]
+    assert event == "done" and done["status"] == "completed"
+    assert "lookup_employee" in done["answer"] and "employee 42" in done["answer"]
+    assert app._TOOLS.stats()["calls"] == {"lookup_employee": 1}
+
+
+def test_stream_cancels_run_without_tool_handler(load_app, backend):
+    app = load_app(backend.url, HTTP_STREAMING="true")
+
+    events = asyncio.run(stream(app, "lookup employee 42"))
+
+    event, error = events[-1]
+    assert event == "error" and error["tools"] == ["lookup_employee"]
+    assert backend.state.runs[error["run_id"]]["status"] in ("cancelling", "cancelled")
+    assert app._TURNS.store.active_run(error["thread_id"]) == error["run_id"]
+
+
+class StallingServer:
+    """Accepts messages; starts every run, then goes quiet with the connection open."""
+
+    def __init__(self):
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        self._open = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._sock.getsockname()[1]}"
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self._open.append(conn)
+            if b"/messages" in conn.recv(65536).split(b"\r\n", 1)[0]:
+                conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+                continue
+            conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n"
+                         b"event: thread.run.created\ndata: {\"id\": \"run_1\", \"status\": \"queued\"}\n\n")
+
+    def close(self):
+        self._sock.close()
+        for conn in self._open:
+            conn.close()
+
+
+def test_stream_deadline_holds_while_the_backend_is_silent():
+    from async_backend_client import AsyncBackendClient
+    from streaming import stream_turn
+
+    async def token():
+        return "token"
+
+    async def turn():
+        client = AsyncBackendClient(server.url, "v1", token, read_timeout=30)
+        events = []
+        try:
+            async for event, data in stream_turn(client, "asst_1", "hello", "thread_1", deadline=0.3):
+                events.append((event, data))
+        finally:
+            await client.close()
+            server.close()
+
+    server = StallingServer()
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(turn())
+    assert time.monotonic() - started < 2  # the deadline, not the 30s socket read timeout
+
+
+def test_stream_route_is_opt_in(load_app):
+    app = load_app(HTTP_STREAMING="false")
+    assert "chat_stream" not in {fn.get_function_name() for fn in app.app.get_functions()}
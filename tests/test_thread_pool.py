@@ -0,0 +1,27 @@
+import json
+import time
+
+from _harness import handler, chat_request
+
+
+def test_combined_start_never_uses_the_pool(load_app, backend):
+    app = load_app(backend.url, RUN_START_MODE="combined", THREAD_POOL_SIZE="2", RUN_POLL_INITIAL_SECONDS="0.02")
+    body = json.loads(handler(app, "chat")(chat_request("hello")).get_body())
+
+    assert body["status"] == "completed"
+    assert app._THREAD_POOL.stats()["created"] == 0
+    assert app._THREAD_POOL.stats()["misses"] == 0
+
+
+def test_auto_start_retires_the_pool_once_combined_works(load_app, backend):
+    app = load_app(backend.url, RUN_START_MODE="auto", THREAD_POOL_SIZE="2", RUN_POLL_INITIAL_SECONDS="0.02")
+    chat = handler(app, "chat")
+    assert json.loads(chat(chat_request("first")).get_body())["status"] == "completed"
+    assert app._RUN_STARTER.combined is True
+
+    json.loads(chat(chat_request("second")).get_body())
+    deadline = time.monotonic() + 2
+    while app._THREAD_POOL.stats()["available"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = app._THREAD_POOL.stats()
+    assert stats["stopped"] and stats["available"] == 0
@@ -0,0 +1,83 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from token_cache import TokenCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Credential:
+    """Issues token-1, token-2, ... each expiring 1000s after the clock's current time."""
+
+    def __init__(self, clock: Clock, gate: threading.Event | None = None):
+        self.clock = clock
+        self.gate = gate
+        self.issued = 0
+
+    def get_token(self, scope):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.issued += 1
+        return SimpleNamespace(token=f"token-{self.issued}", expires_on=self.clock.now + 1000)
+
+
+def wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert predicate()
+
+
+def make_cache(gate: threading.Event | None = None):
+    clock = Clock()
+    credential = Credential(clock, gate)
+    cache = TokenCache(lambda: credential, "scope", refresh_margin=300, expiry_skew=60, clock=clock)
+    return cache, clock, credential
+
+
+def test_token_is_served_from_cache_until_the_refresh_margin():
+    cache, clock, credential = make_cache()
+    assert cache.get() == "token-1"
+    clock.now = 699  # 301s left: outside the margin
+    assert cache.get() == "token-1"
+    assert credential.issued == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_refresh_margin_refreshes_in_background_while_serving_the_current_token():
+    gate = threading.Event()
+    cache, clock, credential = make_cache(gate)
+    gate.set()
+    cache.get()
+
+    gate.clear()
+    clock.now = 750  # inside the margin, before the skew
+    assert cache.get() == "token-1"  # not blocked by the pending refresh
+    assert cache.get() == "token-1"
+    gate.set()
+    wait_for(lambda: cache.stats()["refreshes"] == 2)
+    assert cache.get() == "token-2"
+    assert credential.issued == 2  # one background refresh for both callers
+
+
+def test_token_inside_the_expiry_skew_is_refreshed_before_use():
+    cache, clock, credential = make_cache()
+    cache.get()
+    clock.now = 945  # 55s left: less than the skew
+    assert cache.get() == "token-2"
+    assert cache.stats()["misses"] == 2
+
+
+def test_invalidate_forces_a_new_token():
+    cache, _, credential = make_cache()
+    cache.get()
+    cache.invalidate()
+    assert cache.get() == "token-2"
+    assert credential.issued == 2
@@ -0,0 +1,41 @@
+import json
+import threading
+import time
+
+from tool_dispatch import ToolDispatcher
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, path, body, *, endpoint):
+        self.posts.append((path, body))
+        return {"id": "run_1", "status": "in_progress"}
+
+
+def requires_action(*names: str) -> dict:
+    return {"id": "run_1", "status": "requires_action", "required_action": {"submit_tool_outputs": {"tool_calls": [
+        {"id": f"call_{i}", "type": "function", "function": {"name": name, "arguments": "{}"}}
+        for i, name in enumerate(names)]}}}
+
+
+def test_slow_tools_share_one_timeout():
+    release = threading.Event()
+    dispatcher = ToolDispatcher(max_workers=3, timeout=0.3)
+    dispatcher.register("slow", lambda: release.wait(5) and "late")
+    backend = RecordingBackend()
+
+    started = time.monotonic()
+    try:
+        dispatcher.submit(backend, "thread_1", requires_action("slow", "slow", "slow"))
+    finally:
+        release.set()
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6  # one timeout for the batch, not 0.3s per call
+    [(path, body)] = backend.posts
+    assert path == "/threads/thread_1/runs/run_1/submit_tool_outputs"
+    assert [o["tool_call_id"] for o in body["tool_outputs"]] == ["call_0", "call_1", "call_2"]
+    assert all("timed out" in json.loads(o["output"])["error"] for o in body["tool_outputs"])
+    assert dispatcher.stats()["errors"] == 3
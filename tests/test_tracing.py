@@ -0,0 +1,33 @@
+import logging
+import sys
+
+import tracing
+
+STEPS = [{
+    "id": "step_1", "type": "tool_calls", "status": "completed", "created_at": 100, "completed_at": 102,
+    "step_details": {"tool_calls": [{"type": "openapi", "openapi": {"name": "EmployeeValidation"}}]},
+}]
+
+
+def test_unknown_exporter_warns_and_exports_nothing(caplog):
+    with caplog.at_level(logging.WARNING):
+        tracing.configure("zipkin")
+    assert "zipkin" in caplog.text
+    assert not tracing.active()
+
+
+def test_azure_monitor_without_its_package_warns_and_exports_nothing(caplog, monkeypatch):
+    monkeypatch.setitem(sys.modules, "azure.monitor.opentelemetry", None)  # import raises ImportError
+    with caplog.at_level(logging.WARNING):
+        tracing.configure("azure_monitor")
+    assert "azure-monitor-opentelemetry" in caplog.text
+    assert not tracing.active()
+
+
+def test_tool_steps_stay_out_of_server_timing():
+    with tracing.collect() as timings:
+        with tracing.span("poll"):
+            pass
+        tracing.record_tool_steps(STEPS)
+    assert list(timings.as_dict()) == ["poll"]
+    assert "tool." not in timings.server_timing()
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import transcripts
+from transcripts import TranscriptRecorder, redact, redact_arguments
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Mail jane.doe@contoso.com now", "Mail <EMAIL> now"),
+    ("SSN 123-45-6789", "SSN <SSN>"),
+    ("call +1 (425) 555-0100", "call <PHONE>"),
+    ("I live at 12 Main St.", "I live at <ADDRESS>"),
+    ("employee id 12345", "employee id <NUMBER>"),
+    ("my name is Jane Doe", "my name is <NAME>"),
+    ("first name: Brian, last name Phillips", "first name: <NAME>, last name <NAME>"),
+    ("What can you help me with?", "What can you help me with?"),
+])
+def test_redact(text, expected):
+    assert redact(text) == expected
+
+
+def test_tool_arguments_keep_keys_only():
+    assert redact_arguments({"employee_id": "12345", "fields": ["address", None], "active": True}) == \
+        {"employee_id": "<REDACTED>", "fields": ["<REDACTED>", None], "active": True}
+
+
+def test_recorded_entry_is_redacted(tmp_path):
+    recorder = TranscriptRecorder(str(tmp_path))
+    recorder.record({"thread_id": "thread_1", "prompt": "I am Jane, mail jane@contoso.com",
+                     "answer": "Updated 12 Main St", "tool_calls": [{"name": "update", "arguments": '{"id": 7}'}]})
+    recorder.close()
+    [entry] = transcripts.read(str(tmp_path))
+    assert entry["prompt"] == "I am <NAME>, mail <EMAIL>"
+    assert entry["answer"] == "Updated <ADDRESS>"
+    assert entry["tool_calls"] == [{"name": "update", "arguments": {"id": "<REDACTED>"}}]
+
+
+def test_prune_only_removes_this_process_files(tmp_path):
+    pid = os.getpid()
+    others = [f"transcripts-20260101-000000-{pid + 1}-{n}.jsonl.gz" for n in range(1, 4)]
+    own = [f"transcripts-20260101-000000-{pid}-{n}.jsonl.gz" for n in (2, 10, 1)]
+    for name in others + own + [f"transcripts-20260101-000000-{pid}0-1.jsonl.gz"]:
+        (tmp_path / name).write_bytes(b"")
+
+    TranscriptRecorder(str(tmp_path), keep_files=2)._prune()
+
+    left = sorted(p.name for p in tmp_path.iterdir())
+    assert left == sorted(others + [f"transcripts-20260101-000000-{pid}-10.jsonl.gz",
+                                    f"transcripts-20260101-000000-{pid}0-1.jsonl.gz"])
+
+
+def test_foundry_client_imports_the_wrapper_module(tmp_path):
+    from conftest import ROOT
+
+    # A fresh interpreter with only the client's directory on the path, as `python main.py` has
+    code = "import main, transcripts; print(transcripts.__file__)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True,
+                         env={**os.environ, "PYTHONPATH": str(ROOT / "Employee_Agent_Foundry")}).stdout
+    assert os.path.samefile(out.strip(), ROOT / "Employee_Agent_Foundry_Wrapper" / "transcripts.py")
+
+
+def test_redacted_turns_replay_without_a_tool_check():
+    entries = [
+        {"thread_id": "t1", "ts": 1, "status": "completed", "prompt": "Hi", "tool_calls": []},
+        {"thread_id": "t1", "ts": 2, "status": "completed", "prompt": "Validate employee <NUMBER>",
+         "tool_calls": [{"name": "EmployeeValidation"}]},
+        {"thread_id": "t1", "ts": 3, "status": "completed", "prompt": "Update my department",
+         "tool_calls": [{"name": "EmployeeUpdate"}]},
+    ]
+    assert transcripts.conversations(entries) == [{"id": "t1", "turns": [
+        {"prompt": "Hi", "expect_tools": []},
+        {"prompt": "Validate employee <NUMBER>"},
+        {"prompt": "Update my department", "expect_tools": ["EmployeeUpdate"]},
+    ]}]
+
+
+def test_foundry_chat_turn_records_every_tool_call_kind():
+    from main import collect_tool_call
+
+    calls = {}
+    for content in [
+        SimpleNamespace(type="text", text="hi"),
+        SimpleNamespace(type="function_call", call_id="c1", name="lookup", arguments='{"id": '),
+        SimpleNamespace(type="function_call", call_id="c1", name=None, arguments='"7"}'),
+        SimpleNamespace(type="openapi_call", call_id="c2", name="EmployeeValidation", arguments={"x": 1}),
+        SimpleNamespace(type="code_interpreter_call", call_id=None, arguments=None),
+        SimpleNamespace(type="function_result", call_id="c1", result="ok"),
+    ]:
+        collect_tool_call(calls, content)
+
+    assert list(calls.values()) == [
+        {"name": "lookup", "type": "function", "arguments": '{"id": "7"}'},
+        {"name": "EmployeeValidation", "type": "openapi", "arguments": {"x": 1}},
+        {"name": "code_interpreter", "type": "code_interpreter", "arguments": None},
+    ]
+    assert json.loads(calls["c1"]["arguments"]) == {"id": "7"}
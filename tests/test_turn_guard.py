@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+from turn_guard import MemoryTurnStore, SqliteTurnStore, ThreadBusyError, TurnGuard
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store_factory(request, tmp_path):
+    def make(clock=None):
+        kwargs = {"clock": clock} if clock else {}
+        if request.param == "memory":
+            return MemoryTurnStore(**kwargs)
+        return SqliteTurnStore(str(tmp_path / "turns.sqlite"), **kwargs)
+    return make
+
+
+def test_claim_active_is_exclusive(store_factory):
+    clock = Clock()
+    store = store_factory(clock)
+    assert store.claim_active("thread_1", "claim_a", lease=30) is None
+    assert store.claim_active("thread_1", "claim_b", lease=30) == "claim_a"
+    assert store.claim_active("thread_1", "claim_b", lease=30, replace="run_other") == "claim_a"
+    assert store.claim_active("thread_1", "claim_b", lease=30, replace="claim_a") is None
+    assert store.active_run("thread_1") == "claim_b"
+
+    clock.now += 31  # the holder's worker died: its lease runs out
+    assert store.claim_active("thread_1", "claim_c", lease=30) is None
+
+
+def test_sqlite_claims_race_across_connections(tmp_path):
+    path = str(tmp_path / "turns.sqlite")
+    stores = [SqliteTurnStore(path) for _ in range(8)]  # one per "worker"
+    barrier = threading.Barrier(len(stores))
+    results = []
+
+    def claim(index):
+        barrier.wait()
+        results.append(stores[index].claim_active("thread_1", f"claim_{index}", lease=30))
+
+    threads = [threading.Thread(target=claim, args=(i,)) for i in range(len(stores))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    winners = [r for r in results if r is None]
+    assert len(winners) == 1
+    assert len(set(results) - {None}) == 1  # every loser saw the same holder
+
+
+def test_claim_thread_waits_out_another_workers_run(store_factory):
+    store = store_factory()
+    store.set_active("thread_1", "run_other", lease=30)
+    guard, waited = TurnGuard(store), []
+
+    claim = guard.claim_thread("thread_1", lease=30, timeout=5, wait_for=waited.append)
+
+    assert waited == ["run_other"]
+    assert claim.startswith(TurnGuard.CLAIM_PREFIX) and store.active_run("thread_1") == claim
+    guard.started(None, "thread_1", "run_mine", lease=30)
+    assert store.active_run("thread_1") == "run_mine"
+    guard.release("thread_1", claim)  # already replaced by the run: no-op
+    assert store.active_run("thread_1") == "run_mine"
+
+
+def test_claim_thread_busy_while_another_worker_starts_a_run(store_factory):
+    store = store_factory()
+    store.claim_active("thread_1", "claim_elsewhere", lease=30)
+    guard = TurnGuard(store, sleep=lambda s: None)
+
+    with pytest.raises(ThreadBusyError):
+        guard.claim_thread("thread_1", lease=30, timeout=0.05, wait_for=lambda run_id: None)
+    assert guard.stats()["busy"] == 1
+
+
+def test_sync_and_async_turns_share_one_lock():
+    guard = TurnGuard(MemoryTurnStore())
+    entered, release = threading.Event(), threading.Event()
+
+    def sync_turn():
+        with guard.hold("thread_1", timeout=5):
+            entered.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=sync_turn)
+    worker.start()
+    entered.wait(5)
+
+    async def async_turn(timeout):
+        async with guard.hold_async("thread_1", timeout):
+            return True
+
+    with pytest.raises(ThreadBusyError):
+        asyncio.run(async_turn(0.05))
+    release.set()
+    assert asyncio.run(async_turn(5))
+    worker.join(5)
+    assert guard.stats()["locked_threads"] == 0